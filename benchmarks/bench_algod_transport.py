@@ -0,0 +1,85 @@
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from algosdk.v2client import algod
+
+
+# adjust path at runtime since src and benchmarks are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from algod_transport import PooledAlgodClient
+
+
+'''
+    Latency of algod requests (status()) with AlgodClient (a new connection per request) against
+    PooledAlgodClient (persistent connections), on a local HTTP server answering like algod.
+    --delay adds a round trip to the handshake, as with a remote node.
+
+    Run from the root of the project: python benchmarks/bench_algod_transport.py [--requests 2000] [--delay 0.002]
+'''
+
+TOKEN = 'a' * 64
+STATUS = json.dumps({'last-round': 1000, 'catchup-time': 0, 'time-since-last-round': 0}).encode()
+
+
+class AlgodHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # answer in one segment, as algod does, without waiting for delayed ACKs
+    disable_nagle_algorithm = True
+    connect_delay = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    # a new connection: simulated round trip of the TCP handshake
+    def setup(self):
+        time.sleep(self.connect_delay)
+        super().setup()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(STATUS)))
+        self.end_headers()
+        self.wfile.write(STATUS)
+
+
+def measure(client, count):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        client.status()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99)]
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="algod requests: new connection per request against pooled connections.")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--delay', type=float, default=0.0, help="seconds added to each new connection")
+    args = parser.parse_args()
+
+    AlgodHandler.connect_delay = args.delay
+    server = ThreadingHTTPServer(('127.0.0.1', 0), AlgodHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    address = f'http://127.0.0.1:{server.server_address[1]}'
+
+    print(f"{args.requests} status() requests, {args.delay * 1000:g} ms per new connection\n")
+    for name, client in (('AlgodClient', algod.AlgodClient(TOKEN, address)),
+                         ('PooledAlgodClient', PooledAlgodClient(TOKEN, address))):
+        measure(client, 50)
+        p50, p99 = measure(client, args.requests)
+        print(f"{name:<20} p50 {p50 * 1000:>6.3f} ms   p99 {p99 * 1000:>6.3f} ms")
+        if isinstance(client, PooledAlgodClient):
+            print(f"{'':<20} {client.connection_stats()}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
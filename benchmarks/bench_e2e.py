@@ -0,0 +1,194 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+
+
+# adjust path at runtime since src and benchmarks are in separate folders
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+os.chdir(ROOT)
+from algosdk import account
+import server
+import compile_cache
+import message_store
+import program_registry
+import sms_ingest
+import backends
+from bench_sms_codec import MY_TEAL_PROGRAM, SHOP_ADDRESS
+from fake_services import FakeAlgod, FakeVonage
+
+
+'''
+    End-to-end benchmark of the routes of the two apps, against in-process stand-ins of algod and Vonage
+    (see fake_services.py): no node, network or live server needed.
+    Each iteration runs, for a new user:
+    - the issue flow: POST /upload, POST /generate_logic_signature, POST /sign_lsig, POST /send_sms
+    - the redeem flow: POST /webhooks/inbound (the token SMS forwarded to the system), GET /fetch_sms_data,
+      GET /decode_lsig, POST /create_transaction
+    Reports throughput and p50/p99 latency per route, compared with the baseline in benchmarks/baselines/bench_e2e.json.
+
+    Run from the root of the project: python benchmarks/bench_e2e.py [--save-baseline]
+'''
+
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baselines', 'bench_e2e.json')
+TEAL_SOURCE = open(os.path.join(ROOT, 'smart_contracts', 'my_teal.teal'), 'rb').read()
+SYSTEM_NUMBER = '447451281414'
+
+
+class Recorder:
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.failures = defaultdict(int)
+
+    # Time a request; non-successful responses are counted as failures
+
+    def request(self, route, call, *args, **kwargs):
+        start = time.perf_counter()
+        response = call(*args, **kwargs)
+        self.latencies[route].append(time.perf_counter() - start)
+        body = response.get_json(silent=True) or {}
+        if response.status_code >= 400 or body.get('success') is False:
+            self.failures[route] += 1
+        return response
+
+
+def upload(client, path):
+    return client.post(path, data={'file': (io.BytesIO(TEAL_SOURCE), 'my_teal.teal')}, content_type='multipart/form-data')
+
+
+def run_iteration(recorder, fake_sms, i):
+    ui = server.flask_app.test_client()
+    sms = server.app_sms.test_client()
+    phone = f'44700{i:06d}'
+    private_key, address = account.generate_account()
+
+    # issue a token
+    recorder.request('POST /upload', upload, ui, '/upload')
+    recorder.request('POST /generate_logic_signature', upload, ui, '/generate_logic_signature')
+    signed = recorder.request('POST /sign_lsig', ui.post, '/sign_lsig', json={'privateKey': private_key})
+    text = f"Amount: 100000 microAlgos\nFrom Address: {address}\nYour Token: {signed.get_json()['final_lsig']}"
+    recorder.request('POST /send_sms', ui.post, '/send_sms', json={'receiver_number': phone, 'text': text})
+
+    # the user forwards the token SMS (all its parts) to the system's number
+    for part in fake_sms.sent_to(phone):
+        if part.startswith('This message represents your Token'):
+            continue
+        recorder.request('POST /webhooks/inbound', sms.post, '/webhooks/inbound',
+                         json={'msisdn': phone, 'to': SYSTEM_NUMBER, 'text': part, 'messageId': uuid.uuid4().hex})
+    sms_ingest.flush(timeout=10)
+
+    # redeem it
+    recorder.request('GET /fetch_sms_data', ui.get, '/fetch_sms_data', query_string={'sender': phone})
+    recorder.request('GET /decode_lsig', ui.get, '/decode_lsig')
+    recorder.request('POST /create_transaction', ui.post, '/create_transaction',
+                     json={'sender_address': address, 'receiver_address': SHOP_ADDRESS, 'amount': 1000})
+
+
+# Results per route. Throughput is in requests per second of the run (wall-clock seconds)
+
+def summarize(recorder, seconds):
+    summary = {}
+    for route, latencies in recorder.latencies.items():
+        latencies = sorted(latencies)
+        summary[route] = {
+            'requests': len(latencies),
+            'failures': recorder.failures[route],
+            'throughput': len(latencies) / seconds,
+            'p50_ms': statistics.median(latencies) * 1000,
+            'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        }
+    return summary
+
+
+def report(summary, baseline, tolerance):
+    regressions = []
+    print(f"{'route':<32} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}   {'baseline p50':>12}  failures")
+    for route, result in summary.items():
+        line = f"{route:<32} {result['throughput']:>9,.0f} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}"
+        reference = baseline.get('routes', {}).get(route)
+        if reference:
+            change = result['p50_ms'] / reference['p50_ms'] - 1
+            line += f"   {reference['p50_ms']:>8.2f} {change:>+4.0%}"
+            if change > tolerance:
+                regressions.append(route)
+                line += ' REGRESSION'
+        else:
+            line += f"   {'-':>12}"
+        print(f"{line}  {result['failures']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the issue and redeem flows.")
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--algod-latency', type=float, default=0.002, help="seconds per algod request")
+    parser.add_argument('--sms-latency', type=float, default=0.01, help="seconds per Vonage request")
+    parser.add_argument('--block-time', type=float, default=0.01, help="seconds between blocks")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="p50 increase reported as a regression")
+    parser.add_argument('--save-baseline', action='store_true', help="save the results as the new baseline")
+    args = parser.parse_args()
+    settings = {'iterations': args.iterations, 'algod_latency': args.algod_latency,
+                'sms_latency': args.sms_latency, 'block_time': args.block_time}
+
+    fake_algod = FakeAlgod(MY_TEAL_PROGRAM, block_time=args.block_time, latency=args.algod_latency)
+    fake_vonage = FakeVonage(latency=args.sms_latency)
+    fake_sms = fake_vonage.sms
+    backends.use('algod', fake_algod)
+    backends.use('sms', fake_vonage)
+    recorder = Recorder()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # keep every file written by the apps in a temporary directory
+        compile_cache.cache_dir = os.path.join(tmp_dir, 'compiled_teal')
+        program_registry.registry_dir = os.path.join(tmp_dir, 'programs')
+        program_registry.reset()
+        message_store.db_path = os.path.join(tmp_dir, 'messages.db')
+        os.chdir(tmp_dir)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            # warm-up
+            for i in range(min(10, args.iterations)):
+                run_iteration(Recorder(), fake_sms, -i - 1)
+            start = time.perf_counter()
+            for i in range(args.iterations):
+                run_iteration(recorder, fake_sms, i)
+            seconds = time.perf_counter() - start
+        os.chdir(ROOT)
+        message_store.close()
+
+    summary = summarize(recorder, seconds)
+    print(f"{args.iterations} issue + redeem flows in {seconds:.1f} s ({args.iterations / seconds:.1f} flows/s), "
+          f"algod latency {args.algod_latency * 1000:g} ms, Vonage latency {args.sms_latency * 1000:g} ms, "
+          f"block time {args.block_time * 1000:g} ms\n")
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+        if baseline.get('settings') != settings:
+            print("Settings differ from the baseline's: comparison skipped.\n")
+            baseline = {}
+    regressions = report(summary, baseline, args.tolerance)
+    print(f"\nalgod requests: {dict(fake_algod.calls)}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump({'settings': settings, 'routes': summary}, f, indent=2)
+        print(f"Baseline saved to {BASELINE_PATH}")
+    elif regressions:
+        print(f"\nRegressions (p50 more than {args.tolerance:.0%} above baseline): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
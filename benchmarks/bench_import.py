@@ -0,0 +1,83 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+
+# adjust path at runtime since src and benchmarks are in separate folders
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+
+
+'''
+    Cold-start cost of the system: time to import server.py (both apps, all their modules) in a new
+    Python process, and cost of creating each backend client on first use (see backends.py).
+    Every measure runs in a fresh interpreter, so nothing is already imported or cached in memory.
+
+    Run from the root of the project: python benchmarks/bench_import.py [--runs 10] [--importtime]
+'''
+
+IMPORT_SERVER = """
+import time
+start = time.perf_counter()
+import server
+print(time.perf_counter() - start)
+"""
+
+FIRST_USE = """
+import os, time
+os.environ.setdefault('VONAGE_API_KEY', 'benchmark')
+os.environ.setdefault('VONAGE_API_SECRET', 'benchmark')
+import server, backends
+start = time.perf_counter()
+backends.get({name!r})
+print(time.perf_counter() - start)
+"""
+
+
+def run(code, *options):
+    # no Vonage credentials: importing the system must not need them
+    env = {k: v for k, v in os.environ.items() if not k.startswith('VONAGE_')}
+    env['PYTHONPATH'] = SRC
+    result = subprocess.run([sys.executable, *options, '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return result
+
+
+def median_seconds(code, runs):
+    return statistics.median(float(run(code).stdout.split()[-1]) for _ in range(runs))
+
+
+# Slowest modules to import (cumulative time), from python -X importtime
+
+def slowest_imports(count=15):
+    rows = []
+    for line in run('import server', '-X', 'importtime').stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = (field.strip() for field in line[len('import time:'):].split('|'))
+        rows.append((int(cumulative), name))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start cost of server.py and of the backend clients.")
+    parser.add_argument('--runs', type=int, default=10, help="fresh processes per measure")
+    parser.add_argument('--importtime', action='store_true', help="also list the slowest modules to import")
+    args = parser.parse_args()
+
+    print(f"median of {args.runs} fresh processes\n")
+    print(f"{'import server':<28} {median_seconds(IMPORT_SERVER, args.runs) * 1000:>8.2f} ms")
+    for name in ('algod', 'sms'):
+        seconds = median_seconds(FIRST_USE.format(name=name), args.runs)
+        print(f"{f'first use of {name!r} client':<28} {seconds * 1000:>8.2f} ms")
+
+    if args.importtime:
+        print("\nslowest imports (cumulative):")
+        for microseconds, name in slowest_imports():
+            print(f"{name:<40} {microseconds / 1000:>8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
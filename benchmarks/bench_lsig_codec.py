@@ -0,0 +1,59 @@
+import ast
+import base64
+import os
+import sys
+import timeit
+
+
+# adjust path at runtime since src and benchmarks are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from algosdk.transaction import LogicSigAccount
+import lsig_codec
+from bench_sms_codec import make_lsig
+
+
+'''
+    Micro-benchmark of the Logic Signature codec: encode and decode throughput,
+    on lsigs of the size of smart_contracts/my_teal.teal signed by a new account.
+
+    Run from the root of the project: python benchmarks/bench_lsig_codec.py
+'''
+
+
+# Decoder used before lsig_codec (ast.literal_eval, without the prints), kept here for comparison
+def previous_decoder(strEncoded):
+    dic = ast.literal_eval(base64.urlsafe_b64decode(strEncoded).decode())
+    dic["lsig"]["l"] = base64.urlsafe_b64decode(dic["lsig"]["l"])
+    dic["lsig"]["sig"] = base64.urlsafe_b64decode(dic["lsig"]["sig"])
+    dic["sigkey"] = base64.urlsafe_b64decode(dic["sigkey"])
+    return LogicSigAccount.undictify(dic)
+
+
+def measure(name, function, tokens):
+    number = len(tokens)
+    iterator = iter(tokens)
+    seconds = timeit.timeit(lambda: function(next(iterator)), number=number)
+    print(f"{name:<32} {number / seconds:>10,.0f} ops/s   {seconds / number * 1e6:>8.1f} us/op")
+
+
+def main(count=2000):
+    lsigs = [make_lsig()[0] for _ in range(count)]
+    legacy_tokens = [lsig_codec.encode_legacy(lsig) for lsig in lsigs]
+    compact_tokens = [lsig_codec.encode_compact(lsig) for lsig in lsigs]
+
+    measure('encode previous format', lsig_codec.encode_legacy, lsigs)
+    measure('encode compact format', lsig_codec.encode_compact, lsigs)
+    measure('decode previous (literal_eval)', previous_decoder, legacy_tokens)
+    measure('decode previous format', lsig_codec.decode_legacy, legacy_tokens)
+    measure('decode compact format', lsig_codec.decode_compact, compact_tokens)
+
+    # same tokens decoded twice: the second pass is served by the memo
+    lsig_codec.decoded_tokens.clear()
+    lsig_codec.decoded_tokens.maxsize = count
+    for token in compact_tokens:
+        lsig_codec.decode(token)
+    measure('decode (memo hit)', lsig_codec.decode, compact_tokens)
+
+
+if __name__ == '__main__':
+    main()
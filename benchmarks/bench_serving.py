@@ -0,0 +1,101 @@
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Process
+import requests
+
+
+# adjust path at runtime since src and benchmarks are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import server
+import serving
+import message_store
+
+
+'''
+    Throughput of the apps served as before (Flask development server) against production mode (gunicorn),
+    with concurrent clients keeping their connections open:
+    - SMS app: POST /webhooks/inbound (messages saved in a temporary database)
+    - UI app: GET /fetch_sms_data (server-side session and message store)
+
+    Run from the root of the project: python benchmarks/bench_serving.py
+'''
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def run(app, mode, port, db_path):
+    message_store.db_path = db_path
+    if mode == 'development':
+        app.run(port=port)
+    else:
+        settings = serving.options('BENCH', f'127.0.0.1:{port}')
+        settings['loglevel'] = 'warning'
+        serving.serve(app, settings)
+
+
+def wait_until_up(url):
+    for _ in range(100):
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server not started: {url}")
+
+
+def load(method, url, requests_count, clients, payload=None):
+    def client(count):
+        latencies = []
+        with requests.Session() as http:
+            for i in range(count):
+                start = time.perf_counter()
+                response = http.request(method, url, json=payload)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = [l for ls in pool.map(client, [requests_count // clients] * clients) for l in ls]
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    return len(latencies) / seconds, statistics.median(latencies), latencies[int(len(latencies) * 0.99)]
+
+
+def report(name, mode, result):
+    throughput, p50, p99 = result
+    print(f"{name:<26} {mode:<12} {throughput:>8,.0f} req/s   p50 {p50 * 1000:>6.1f} ms   p99 {p99 * 1000:>6.1f} ms")
+
+
+def main(requests_count=4000, clients=32):
+    print(f"{requests_count} requests, {clients} concurrent clients\n")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'messages.db')
+        for mode in ('development', 'production'):
+            for name, app, method, path, payload in (
+                    ('SMS POST /webhooks/inbound', server.app_sms, 'POST', '/webhooks/inbound', {'text': 'Hi!', 'from': '7711111222'}),
+                    ('UI GET /fetch_sms_data', server.flask_app, 'GET', '/fetch_sms_data?sender=7711111222', None)):
+                port = free_port()
+                process = Process(target=run, args=(app, mode, port, db_path))
+                process.start()
+                try:
+                    url = f"http://127.0.0.1:{port}{path}"
+                    wait_until_up(f"http://127.0.0.1:{port}/")
+                    load(method, url, clients * 10, clients)
+                    report(name, mode, load(method, url, requests_count, clients, payload))
+                finally:
+                    process.terminate()
+                    process.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import os
+import sys
+import tempfile
+import timeit
+
+
+# adjust path at runtime since src and benchmarks are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from algosdk import account
+from algosdk.transaction import LogicSigAccount
+import lsig_codec
+import program_registry
+import core
+
+
+'''
+    Compare the size of SMS tokens in the previous format (base64 of JSON) and in the compact format.
+    Reports characters and SMS segments for the token alone and for the full SMS text sent to the user.
+
+    Run from the root of the project: python benchmarks/bench_sms_codec.py
+'''
+
+# smart_contracts/my_teal.teal assembled by hand (TEAL v2, 71 bytes): a realistic program size
+SHOP_ADDRESS = 'OOGPCELYKLWNTNUBAYP5RCKZHJJZ22F3TJXWZZOGGJO3FRMD6GFZQFWFNM'
+MY_TEAL_PROGRAM = (
+    b'\x02'                                          # version 2
+    + b'\x20\x03\x01\xa0\x8d\x06\x00'                # intcblock 1 100000 0
+    + b'\x26\x01\x20' + core.encoding.decode_address(SHOP_ADDRESS)  # bytecblock addr
+    + b'\x28\x31\x07\x12\x41\x00\x0d'                # addr == txn Receiver, bz fail
+    + b'\x31\x10\x22\x12\x41\x00\x07'                # txn TypeEnum == pay, bz fail
+    + b'\x31\x08\x23\x0e\x41\x00\x01'                # txn Amount <= 100000, bz fail
+    + b'\x42\x00\x02'                                # b pass
+    + b'\x24\x43'                                    # fail: int 0, return
+    + b'\x22\x43'                                    # pass: int 1, return
+)
+
+
+def make_lsig():
+    private_key, address = account.generate_account()
+    lsig = LogicSigAccount(MY_TEAL_PROGRAM)
+    lsig.sign(private_key)
+    return lsig, address
+
+
+# full SMS text, as composed by the UI after signing
+def sms_text(token, address):
+    return f"Amount: 100000 microAlgos\nFrom Address: {address}\nYour Token: {token}"
+
+
+def report(name, token, address):
+    text = sms_text(token, address)
+    print(f"{name:<10} token: {len(token):>4} chars, {lsig_codec.sms_segments(token)} segment(s)   "
+          f"full SMS: {len(text):>4} chars, {lsig_codec.sms_segments(text)} segment(s)")
+
+
+def main():
+    lsig, address = make_lsig()
+    # silence the prints of the previous encoder
+    with open(os.devnull, 'w') as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        legacy_token = core.lsig_to_sms_text(lsig)
+        sys.stdout = stdout
+    compact_token = lsig_codec.encode_compact(lsig)
+    # register the program in a temporary registry, for tokens referencing it
+    with tempfile.TemporaryDirectory() as registry_dir:
+        program_registry.registry_dir = registry_dir
+        program_registry.register(MY_TEAL_PROGRAM)
+        reference_token = lsig_codec.encode_compact(lsig)
+
+    print(f"Program: {len(MY_TEAL_PROGRAM)} bytes (smart_contracts/my_teal.teal)\n")
+    report('previous', legacy_token, address)
+    report('compact', compact_token, address)
+    report('reference', reference_token, address)
+
+    number = 2000
+    encode_time = timeit.timeit(lambda: lsig_codec.encode_compact(lsig), number=number) / number
+    decode_time = timeit.timeit(lambda: lsig_codec.decode_compact(compact_token), number=number) / number
+    print(f"\ncompact encode: {encode_time * 1e6:.1f} us   compact decode: {decode_time * 1e6:.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+import base64
+import threading
+import time
+from collections import Counter
+import msgpack
+from algosdk import logic
+from algosdk.transaction import SuggestedParams
+
+
+'''
+    In-process stand-ins of the Algorand node and of the Vonage SMS API, for the benchmarks.
+    They answer like the real services, with a configurable latency per request,
+    so the benchmarks measure the code of the system without network or node.
+'''
+
+GENESIS_HASH = 'SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI='
+GENESIS_ID = 'benchnet-v1'
+
+
+'''
+    Algod client stand-in: compiles every source into the given program, accepts the transactions sent
+    and includes them in a new block every block_time seconds.
+'''
+class FakeAlgod:
+
+    def __init__(self, program, block_time=0.01, latency=0.0, first_round=1000):
+        self.program = program
+        self.block_time = block_time
+        self.latency = latency
+        self.round = first_round
+        self.pool = {}
+        self.confirmed = {}
+        self.blocks = {}
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+
+    def _request(self, name):
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+    def compile(self, source):
+        self._request('compile')
+        return {'hash': logic.address(self.program), 'result': base64.b64encode(self.program).decode()}
+
+
+    def status(self):
+        self._request('status')
+        return {'last-round': self.round, 'catchup-time': 0, 'time-since-last-round': 0}
+
+
+    def suggested_params(self):
+        self._request('suggested_params')
+        return SuggestedParams(1000, self.round, self.round + 1000, GENESIS_HASH, GENESIS_ID, flat_fee=True)
+
+
+    def account_info(self, address):
+        self._request('account_info')
+        return {'address': address, 'amount': 10 ** 12, 'round': self.round}
+
+
+    def send_transaction(self, signed_txn):
+        self._request('send_transaction')
+        txid = signed_txn.get_txid()
+        with self._lock:
+            self.pool[txid] = signed_txn
+        return txid
+
+
+    def send_transactions(self, signed_txns):
+        self._request('send_transactions')
+        with self._lock:
+            for signed_txn in signed_txns:
+                self.pool[signed_txn.get_txid()] = signed_txn
+        return signed_txns[0].get_txid()
+
+
+    def pending_transaction_info(self, txid):
+        self._request('pending_transaction_info')
+        with self._lock:
+            if txid in self.confirmed:
+                return {'confirmed-round': self.confirmed[txid], 'pool-error': ''}
+        return {'pool-error': ''}
+
+
+    # Wait for the next block, which includes all the transactions of the pool
+
+    def status_after_block(self, round_number):
+        self._request('status_after_block')
+        if self.round <= round_number:
+            time.sleep(self.block_time)
+            with self._lock:
+                self.round += 1
+                txns, self.pool = self.pool, {}
+                self.blocks[self.round] = list(txns.values())
+                for txid in txns:
+                    self.confirmed[txid] = self.round
+        return {'last-round': self.round, 'catchup-time': 0}
+
+
+    # Block in msgpack, with the genesis hash and ID stripped from its transactions as algod does
+
+    def block_info(self, round_number, response_format='msgpack'):
+        self._request('block_info')
+        txns = []
+        for signed_txn in self.blocks.get(round_number, []):
+            entry = signed_txn.dictify()
+            txn = dict(entry['txn'])
+            txn.pop('gh', None)
+            txn.pop('gen', None)
+            entry['txn'] = txn
+            entry['hgi'] = True
+            txns.append(entry)
+        header = {'rnd': round_number, 'gh': base64.b64decode(GENESIS_HASH), 'gen': GENESIS_ID, 'txns': txns}
+        return msgpack.packb({'block': header}, use_bin_type=True)
+
+
+'''
+    Vonage client stand-in, with the SMS API only.
+'''
+class FakeVonage:
+
+    def __init__(self, latency=0.0):
+        self.sms = FakeVonageSms(latency)
+
+
+'''
+    Vonage SMS API stand-in (client.sms): accepts every message after latency seconds, and keeps them.
+'''
+class FakeVonageSms:
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.messages = []
+        self._lock = threading.Lock()
+
+
+    def send_message(self, params):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.messages.append(dict(params))
+        return {'message-count': '1', 'messages': [{'status': '0', 'to': params['to']}]}
+
+
+    # Messages sent to a number, in order
+
+    def sent_to(self, number):
+        with self._lock:
+            return [message['text'] for message in self.messages if message['to'] == number]
@@ -0,0 +1,30 @@
+import os
+import threading
+
+
+# Generated accounts are appended to the accounts file, in the format:
+#   Address: ...
+#   Private Key: ...
+#   Mnemonic: ...
+#   ----------
+accounts_file_path = 'data/generated_accounts.txt'
+_lock = threading.Lock()
+
+
+def format_record(account_info):
+    return (f"Address: {account_info['address']}\n"
+            f"Private Key: {account_info['private_key']}\n"
+            f"Mnemonic: {account_info['mnemonic']}\n"
+            "----------\n")
+
+
+'''
+    Append many accounts to the store with one buffered write to the accounts file.
+'''
+def append_accounts(accounts):
+    if not accounts:
+        return
+    with _lock:
+        os.makedirs(os.path.dirname(accounts_file_path) or '.', exist_ok=True)
+        with open(accounts_file_path, 'ab') as f:
+            f.write(b''.join(format_record(account_info).encode() for account_info in accounts))
@@ -0,0 +1,210 @@
+import itertools
+import threading
+import time
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError
+from algosdk import error
+from algosdk.v2client import algod
+
+
+# Pool of algod clients over several nodes, used as a single client (same methods as AlgodClient).
+# The health of each node comes from its status(), checked by check(): in the background by the node monitor
+# (see node_monitor.py), not by the requests. A node is healthy when it answers, is not catching up
+# (catchup-time 0) and is at most max_lag rounds behind the most advanced node.
+# - reads are spread over the healthy nodes (round-robin),
+# - transactions are sent to the most advanced healthy node,
+# and a read failing because of its node (unreachable, timeout, server error) is sent again to the next node.
+# A transaction is only sent to the next node if the connection to its node could not be opened: after a timeout
+# or a server error, the node may have accepted it, and sending it again would report a failure.
+# Errors of the request itself (e.g. a transaction rejected by logic) are raised as they are.
+# Without any healthy node, the nodes still answering are tried, most advanced first.
+SUBMISSIONS = frozenset({'send_transaction', 'send_transactions', 'send_raw_transaction'})
+
+
+# Whether a request failed before reaching its node: the connection could not be opened
+
+def _not_sent(exception):
+    if isinstance(exception, MaxRetryError):
+        exception = exception.reason
+    return isinstance(exception, (ConnectTimeoutError, ConnectionRefusedError))
+
+
+'''
+    Health of one algod node.
+'''
+class AlgodNode:
+
+    def __init__(self, client):
+        self.client = client
+        self.address = getattr(client, 'algod_address', repr(client))
+        self.last_round = 0
+        self.catchup_time = 0
+        self.up = True
+        self.checked_at = 0.0
+        # the node is not queried again before down_until (time.monotonic()) after a failure
+        self.down_until = 0.0
+        self.failures = 0
+        self.requests = 0
+
+
+    def as_dict(self, healthy):
+        return {'address': self.address, 'up': self.up, 'healthy': healthy, 'last_round': self.last_round,
+                'catchup_time': self.catchup_time, 'failures': self.failures, 'requests': self.requests}
+
+
+'''
+    algod client over several nodes, routing requests by node health, with failover.
+    clients: one algod client per node (e.g. PooledAlgodClient).
+    max_lag: rounds a node can be behind the most advanced one and still be healthy.
+    retry_after: seconds during which a failed node is left out.
+'''
+class AlgodPool:
+
+    def __init__(self, clients, max_lag=2, retry_after=5.0):
+        if not clients:
+            raise ValueError("An algod pool needs at least one node.")
+        self.nodes = [AlgodNode(client) for client in clients]
+        self.max_lag = max_lag
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._checked = threading.Event()
+        self._next = itertools.count()
+        self.stats = {'failovers': 0, 'checks': 0}
+
+
+    @property
+    def algod_address(self):
+        return ','.join(node.address for node in self.nodes)
+
+
+    # Check the status of the nodes (those not left out after a failure, or those given),
+    # marking those not answering as down
+
+    def check(self, nodes=None):
+        if nodes is None:
+            now = time.monotonic()
+            nodes = [node for node in self.nodes if now >= node.down_until]
+        self._checked.set()
+        for node in nodes:
+            try:
+                status = node.client.status()
+            except Exception as e:
+                self._failed(node, e)
+                continue
+            with self._lock:
+                node.last_round = status.get('last-round', 0)
+                node.catchup_time = status.get('catchup-time', 0)
+                node.up = True
+                node.checked_at = time.monotonic()
+                self.stats['checks'] += 1
+
+
+    # Without node monitor (e.g. tools), the nodes are checked once, before the first request
+
+    def _check_once(self):
+        if not self._checked.is_set():
+            self.check()
+
+
+    def _failed(self, node, exception):
+        print(f"algod node {node.address} failed: {exception}")
+        with self._lock:
+            node.up = False
+            node.failures += 1
+            node.checked_at = time.monotonic()
+            node.down_until = node.checked_at + self.retry_after
+
+
+    def _is_healthy(self, node, best_round, now):
+        return (node.up and now >= node.down_until and node.catchup_time == 0
+                and node.last_round >= best_round - self.max_lag)
+
+
+    '''
+        Healthy nodes, most advanced first.
+    '''
+    def healthy_nodes(self):
+        self._check_once()
+        now = time.monotonic()
+        with self._lock:
+            best_round = max((node.last_round for node in self.nodes if node.up), default=0)
+            healthy = [node for node in self.nodes if self._is_healthy(node, best_round, now)]
+        return sorted(healthy, key=lambda node: -node.last_round)
+
+
+    # Nodes to try for a request, in order: the healthy ones (rotated for reads), then the others still up
+
+    def _candidates(self, submission):
+        healthy = self.healthy_nodes()
+        if healthy and not submission:
+            start = next(self._next) % len(healthy)
+            healthy = healthy[start:] + healthy[:start]
+        now = time.monotonic()
+        others = sorted((node for node in self.nodes if node not in healthy and node.up and now >= node.down_until),
+                        key=lambda node: -node.last_round)
+        # as a last resort, the nodes left out after a failure
+        down = [node for node in self.nodes if node not in healthy and node not in others]
+        return healthy + others + down
+
+
+    def _call(self, name, *args, **kwargs):
+        submission = name in SUBMISSIONS
+        last_error = None
+        for attempt, node in enumerate(self._candidates(submission)):
+            if attempt:
+                self.stats['failovers'] += 1
+            node.requests += 1
+            try:
+                result = getattr(node.client, name)(*args, **kwargs)
+            except error.AlgodHTTPError as e:
+                # an unknown transaction or block may be known to another node
+                if e.code == 404 and not submission:
+                    last_error = e
+                    continue
+                if e.code is not None and e.code < 500:
+                    raise
+                self._failed(node, e)
+                if submission:
+                    raise
+                last_error = e
+                continue
+            except Exception as e:
+                self._failed(node, e)
+                if submission and not _not_sent(e):
+                    raise
+                last_error = e
+                continue
+            if not node.up:
+                with self._lock:
+                    node.up = True
+                    node.down_until = 0.0
+            return result
+        raise last_error
+
+
+    # Methods of AlgodClient are routed to the nodes of the pool
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not callable(getattr(algod.AlgodClient, name, None)):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._call(name, *args, **kwargs)
+
+
+    '''
+        Health of the nodes, as a list of dictionaries.
+    '''
+    def nodes_status(self):
+        now = time.monotonic()
+        with self._lock:
+            best_round = max((node.last_round for node in self.nodes if node.up), default=0)
+            return [node.as_dict(self._is_healthy(node, best_round, now)) for node in self.nodes]
+
+
+    # Connection reuse of all the nodes (see algod_transport.py)
+
+    def connection_stats(self):
+        total = {}
+        for node in self.nodes:
+            stats = getattr(node.client, 'connection_stats', None)
+            for key, value in (stats() if callable(stats) else {}).items():
+                total[key] = total.get(key, 0) + value
+        return total
@@ -0,0 +1,98 @@
+import json
+import os
+import threading
+from urllib import parse
+import urllib3
+from algosdk import constants, error
+from algosdk.v2client import algod
+
+
+# Pooled HTTP transport of the algod client.
+# AlgodClient opens a new connection (urllib) for every request, so each redemption pays several TCP
+# handshakes to the node. PooledAlgodClient sends the same requests through a pool of persistent
+# (keep-alive) connections (urllib3, installed with requests), shared by all the threads of the process.
+# Pool size and timeouts (seconds) can be set in environment variables.
+pool_size = int(os.getenv('ALGOD_POOL_SIZE', '16'))
+connect_timeout = float(os.getenv('ALGOD_CONNECT_TIMEOUT', '3.05'))
+read_timeout = float(os.getenv('ALGOD_READ_TIMEOUT', '30'))
+# status_after_block waits on the node for the next round (up to a minute)
+wait_timeout = float(os.getenv('ALGOD_WAIT_TIMEOUT', '70'))
+
+
+'''
+    AlgodClient sending its requests through a pool of persistent HTTP connections.
+    Same methods, results and HTTP errors (AlgodHTTPError) as AlgodClient; failures to reach the node
+    raise the urllib3 exceptions (urllib3.exceptions.HTTPError).
+'''
+class PooledAlgodClient(algod.AlgodClient):
+
+    def __init__(self, algod_token, algod_address, headers=None, maxsize=None, timeout=None):
+        super().__init__(algod_token, algod_address, headers)
+        self.pool_size = maxsize or pool_size
+        self.timeout = timeout or urllib3.Timeout(connect=connect_timeout, read=read_timeout)
+        self.wait_timeout = urllib3.Timeout(connect=self.timeout.connect_timeout, read=wait_timeout)
+        # A request is sent again only if the connection failed before sending it,
+        # or if a GET found its kept-alive connection closed by the node
+        retries = urllib3.Retry(total=1, connect=1, read=1, status=0, redirect=0,
+                                allowed_methods=frozenset({'GET'}), raise_on_status=False)
+        self._pool = urllib3.PoolManager(num_pools=4, maxsize=self.pool_size, retries=retries)
+        self._lock = threading.Lock()
+        self._requests = 0
+
+
+    # Same request as AlgodClient.algod_request, on a pooled connection
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        header = {"User-Agent": "py-algorand-sdk"}
+        if self.headers:
+            header.update(self.headers)
+        if headers:
+            header.update(headers)
+        if requrl not in constants.no_auth:
+            header.update({constants.algod_auth_header: self.algod_token})
+
+        timeout = self.wait_timeout if 'wait-for-block-after' in requrl else self.timeout
+        if requrl not in constants.unversioned_paths:
+            requrl = algod.api_version_path_prefix + requrl
+        if params:
+            requrl = requrl + "?" + parse.urlencode(params)
+
+        with self._lock:
+            self._requests += 1
+        response = self._pool.request(method, self.algod_address + requrl, headers=header, body=data, timeout=timeout)
+
+        if response.status >= 400:
+            message = response.data.decode('utf-8', errors='replace')
+            try:
+                message = json.loads(message)["message"]
+            except Exception:
+                pass
+            raise error.AlgodHTTPError(message, response.status)
+        if response_format == "json":
+            # some algod responses are a 200 OK with an empty body
+            if response.status == 200 and not response.data:
+                return {}
+            try:
+                return json.loads(response.data)
+            except Exception as e:
+                raise error.AlgodResponseError("Failed to parse JSON response from algod") from e
+        return response.data
+
+
+    # Connection reuse: requests sent, connections opened (one handshake each) and requests on a reused connection
+
+    def connection_stats(self):
+        pools = self._pool.pools
+        connections = sent = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+                sent += pool.num_requests
+        with self._lock:
+            requests_count = self._requests
+        return {'requests': requests_count, 'connections': connections, 'reused': max(sent - connections, 0)}
+
+
+    def close(self):
+        self._pool.clear()
@@ -0,0 +1,89 @@
+import importlib
+import os
+import threading
+
+
+# Registry of the clients of the external services ('algod': the Algorand node, 'sms': the Vonage client).
+# Each module registers a factory for its client; the client is only created on first use, so importing
+# the system (server, tests, tools) builds no client and needs no credentials.
+# A process can replace a client:
+# - in code, with use(name, client), e.g. a mock or a local stand-in,
+# - with the environment variable <NAME>_BACKEND='module:factory' (e.g. ALGOD_BACKEND=stand_ins:create_algod),
+#   the factory being called without arguments on first use.
+_factories = {}
+_clients = {}
+_lock = threading.Lock()
+
+
+'''
+    Register the factory creating the client name. A client already created is kept until reset(name).
+'''
+def register(name, factory):
+    with _lock:
+        _factories[name] = factory
+
+
+'''
+    Use client as the client name, instead of creating one.
+'''
+def use(name, client):
+    with _lock:
+        _clients[name] = client
+
+
+'''
+    Forget the client name (or all of them): it is created again on next use.
+'''
+def reset(name=None):
+    with _lock:
+        if name is None:
+            _clients.clear()
+        else:
+            _clients.pop(name, None)
+
+
+def _factory(name):
+    spec = os.getenv(f'{name.upper()}_BACKEND')
+    if spec:
+        module_name, _, attribute = spec.partition(':')
+        return getattr(importlib.import_module(module_name), attribute)
+    if name not in _factories:
+        raise KeyError(f"No backend registered for '{name}'.")
+    return _factories[name]
+
+
+'''
+    Client name, created on first use.
+'''
+def get(name):
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(name)
+        if client is None:
+            client = _clients[name] = _factory(name)()
+        return client
+
+
+'''
+    Stand-in for the client name, resolving every attribute on the current client of the registry:
+    modules expose it as their client (e.g. core.algod_client) without creating the client at import.
+'''
+class LazyClient:
+
+    def __init__(self, name):
+        object.__setattr__(self, '_name', name)
+
+    def __getattr__(self, attribute):
+        return getattr(get(self._name), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(get(self._name), attribute, value)
+
+    def __repr__(self):
+        return f"<LazyClient '{self._name}'>"
+
+
+def lazy(name):
+    return LazyClient(name)
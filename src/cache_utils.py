@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+'''
+    Thread-safe LRU cache with an optional time-to-live.
+    Shared by the caches of the system (compiled programs, account info, sessions, ...).
+'''
+class LRUCache:
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+    # Return the cached value for key, or default when missing or expired
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return default
+
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self.stats['misses'] += 1
+                return default
+
+            # mark as most recently used
+            self._data.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+
+
+    # Store value under key, evicting the least recently used entries above maxsize
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats['evictions'] += 1
+
+
+    # Remove key from the cache, return the removed value (or None)
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return entry[0] if entry else None
+
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import threading
+from cache_utils import LRUCache
+
+
+# Compiled TEAL programs are cached by the SHA-256 of their normalized source.
+# Tier 1: in-memory LRU. Tier 2: one JSON file per program on disk, surviving restarts.
+cache_dir = 'data/compiled_teal'
+memory_cache = LRUCache(maxsize=256)
+stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+'''
+    Normalize TEAL source, such that sources differing only in line endings
+    or trailing whitespace map to the same cache key.
+'''
+def normalize_source(teal_source):
+    lines = teal_source.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line.rstrip() for line in lines).strip('\n')
+
+
+'''
+    Cache key of a TEAL source: SHA-256 hex digest of the normalized source.
+'''
+def source_key(teal_source):
+    return hashlib.sha256(normalize_source(teal_source).encode()).hexdigest()
+
+
+def _count(counter):
+    with _stats_lock:
+        stats[counter] += 1
+
+
+def _disk_path(key):
+    return os.path.join(cache_dir, f'{key}.json')
+
+
+def _read_from_disk(key):
+    try:
+        with open(_disk_path(key), 'r') as f:
+            compiled_response = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if 'hash' not in compiled_response or 'result' not in compiled_response:
+        return None
+    return compiled_response
+
+
+def _write_to_disk(key, compiled_response):
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # write to a temporary file first, then rename it: readers never see a partial file
+        tmp_path = _disk_path(key) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'hash': compiled_response['hash'], 'result': compiled_response['result']}, f)
+        os.replace(tmp_path, _disk_path(key))
+    except OSError as e:
+        print(f"Unable to persist compiled program {key}: {e}")
+
+
+'''
+    Compile TEAL source through the cache.
+    On a miss in both tiers, the source is compiled by algod and stored in both tiers.
+    Returns a dictionary with the 'hash' and 'result' of the compiled program, like algod_client.compile.
+'''
+def compile_teal(algod_client, teal_source):
+    key = source_key(teal_source)
+
+    compiled_response = memory_cache.get(key)
+    if compiled_response is not None:
+        _count('hits')
+        return compiled_response
+
+    compiled_response = _read_from_disk(key)
+    if compiled_response is not None:
+        _count('disk_hits')
+        memory_cache.put(key, compiled_response)
+        return compiled_response
+
+    _count('misses')
+    response = algod_client.compile(teal_source)
+    compiled_response = {'hash': response['hash'], 'result': response['result']}
+    memory_cache.put(key, compiled_response)
+    _write_to_disk(key, compiled_response)
+    return compiled_response
+
+
+'''
+    Empty the in-memory tier and reset the counters. Files on disk are left untouched.
+'''
+def clear():
+    memory_cache.clear()
+    with _stats_lock:
+        for counter in stats:
+            stats[counter] = 0
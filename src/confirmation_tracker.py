@@ -0,0 +1,168 @@
+import base64
+import threading
+from concurrent.futures import Future
+import msgpack
+from algosdk import constants, encoding, error
+
+
+'''
+    Compute the IDs of the transactions included in a block.
+    block_bytes is the block as returned by algod_client.block_info(round, response_format='msgpack').
+    In a block, the genesis hash (and, unless 'hgi' is set, the genesis ID) are stripped from each
+    transaction: they are restored from the block header before hashing the canonical encoding.
+'''
+def block_txids(block_bytes):
+    block = msgpack.unpackb(block_bytes, raw=False, strict_map_key=False)
+    header = block.get('block', {})
+    txids = []
+    for signed_txn in header.get('txns', []):
+        txn = dict(signed_txn['txn'])
+        if signed_txn.get('hgi'):
+            txn['gen'] = header.get('gen')
+        txn['gh'] = header.get('gh')
+        to_sign = constants.txid_prefix + base64.b64decode(encoding.msgpack_encode(txn))
+        txid = base64.b32encode(encoding.checksum(to_sign)).decode()
+        txids.append(encoding._undo_padding(txid))
+    return txids
+
+
+'''
+    Shared tracker of pending transactions.
+    A single background thread follows new rounds with status_after_block and, for each new round,
+    fetches the block once and resolves every tracked transaction included in it.
+    Load on algod is one status and one block request per round, whatever the number of pending transactions.
+    Each tracked transaction gets a Future, resolved with its info ({'confirmed-round': ...})
+    or failed with the same errors raised by wait_for_confirmation.
+'''
+class ConfirmationTracker:
+
+    def __init__(self, get_client, wait_rounds=1000, on_round=None):
+        # get_client returns the algod client to query, resolved at every request
+        self.get_client = get_client
+        self.wait_rounds = wait_rounds
+        # on_round(round_number) is called for every new round observed
+        self.on_round = on_round
+        self._pending = {}
+        self._new = []
+        self._condition = threading.Condition()
+        self._thread = None
+        self._last_round = None
+        self.stats = {'rounds': 0, 'blocks_fetched': 0, 'probes': 0, 'confirmed': 0, 'failed': 0}
+
+
+    '''
+        Track a transaction sent to the network. Returns a Future.
+        wait_rounds: number of rounds to wait before failing with ConfirmationTimeoutError.
+        last_valid: last valid round of the transaction, after which it can no longer be confirmed.
+    '''
+    def track(self, txid, wait_rounds=None, last_valid=None):
+        future = Future()
+        item = {'txid': txid, 'future': future, 'wait_rounds': wait_rounds or self.wait_rounds,
+                'last_valid': last_valid, 'deadline': None}
+        with self._condition:
+            self._pending.setdefault(txid, []).append(item)
+            self._new.append(item)
+            self._condition.notify_all()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='confirmation-tracker', daemon=True)
+                self._thread.start()
+        return future
+
+
+    # Block until the transaction is confirmed, like algosdk's wait_for_confirmation
+
+    def wait(self, txid, wait_rounds=None, last_valid=None, timeout=None):
+        return self.track(txid, wait_rounds, last_valid).result(timeout)
+
+
+    def pending_count(self):
+        with self._condition:
+            return len(self._pending)
+
+
+    def _run(self):
+        while True:
+            with self._condition:
+                # idle: no pending transactions, no requests to algod
+                while not self._pending:
+                    self._last_round = None
+                    self._condition.wait()
+                new_items, self._new = self._new, []
+
+            try:
+                client = self.get_client()
+                if self._last_round is None:
+                    self._last_round = client.status()['last-round']
+                self._probe(client, new_items)
+                if not self.pending_count():
+                    continue
+
+                status = client.status_after_block(self._last_round)
+                current_round = status['last-round']
+                for round_number in range(self._last_round + 1, current_round + 1):
+                    self._scan_block(client, round_number)
+                    self._last_round = round_number
+                    self.stats['rounds'] += 1
+                    if self.on_round:
+                        self.on_round(round_number)
+                self._expire(self._last_round)
+            except Exception as e:
+                print(f"Confirmation tracker error: {e}")
+                # the probe will run again for the items that were not checked
+                with self._condition:
+                    self._new = new_items + self._new
+                    self._condition.wait(1.0)
+
+
+    # Items tracked after the last block scan may already be confirmed: check them once each.
+    # Their deadline is also fixed here, relative to the current round.
+
+    def _probe(self, client, items):
+        for item in items:
+            if item['future'].done():
+                continue
+            if item['deadline'] is None:
+                item['deadline'] = self._last_round + item['wait_rounds']
+                if item['last_valid'] is not None:
+                    item['deadline'] = min(item['deadline'], item['last_valid'])
+            self.stats['probes'] += 1
+            try:
+                tx_info = client.pending_transaction_info(item['txid'])
+            except error.AlgodHTTPError:
+                continue
+            if tx_info.get('pool-error'):
+                self._resolve(item['txid'], exception=error.TransactionRejectedError(
+                    "Transaction rejected: " + tx_info['pool-error']))
+            elif tx_info.get('confirmed-round'):
+                self._resolve(item['txid'], result=tx_info)
+
+
+    def _scan_block(self, client, round_number):
+        block_bytes = client.block_info(round_number, response_format='msgpack')
+        self.stats['blocks_fetched'] += 1
+        for txid in block_txids(block_bytes):
+            if txid in self._pending:
+                self._resolve(txid, result={'confirmed-round': round_number, 'txid': txid})
+
+
+    def _expire(self, current_round):
+        with self._condition:
+            expired = [txid for txid, items in self._pending.items()
+                       if all(item['deadline'] is not None and item['deadline'] < current_round for item in items)]
+        for txid in expired:
+            self._resolve(txid, exception=error.ConfirmationTimeoutError(
+                "Wait for transaction id {} timed out".format(txid)))
+
+
+    def _resolve(self, txid, result=None, exception=None):
+        with self._condition:
+            items = self._pending.pop(txid, [])
+        for item in items:
+            if item['future'].done():
+                continue
+            if exception is not None:
+                self.stats['failed'] += 1
+                item['future'].set_exception(exception)
+            else:
+                self.stats['confirmed'] += 1
+                item['future'].set_result(result)
@@ -1,19 +1,102 @@
-from algosdk import account, mnemonic
-from algosdk.transaction import LogicSigAccount, LogicSigTransaction, PaymentTxn, wait_for_confirmation
-from algosdk.v2client import algod
+from algosdk import account, mnemonic, encoding, constants
+from algosdk.transaction import LogicSigAccount, LogicSigTransaction, PaymentTxn, calculate_group_id
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
 import base64
-import json
 import base64
 import hashlib
-import ast
-import sms_utils
-
-
-
-# Instantiate client: connect to the local Algorand node in docker's container.
-algod_address = "http://localhost:4001"
-algod_token = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
-algod_client = algod.AlgodClient(algod_token, algod_address)
+import os
+import time
+import message_store
+import compile_cache
+import lsig_codec
+import program_registry
+import teal_constraints
+import node_cache
+import backends
+import metrics
+from cache_utils import LRUCache
+from lease_index import LeaseIndex
+from confirmation_tracker import ConfirmationTracker
+from node_monitor import NodeMonitor, NodeNotSyncedError
+
+
+
+# Client of the local Algorand node in docker's container (address and token can be set in ALGOD_ADDRESS and ALGOD_TOKEN).
+# The client is created on first use, through the backend registry (see backends.py), and keeps its
+# connections to the node open (see algod_transport.py).
+# With several nodes (comma-separated ALGOD_ADDRESSES, and ALGOD_TOKENS if their tokens differ), requests are
+# routed to the healthy nodes, with failover (see algod_pool.py).
+algod_address = os.getenv('ALGOD_ADDRESS', "http://localhost:4001")
+algod_token = os.getenv('ALGOD_TOKEN', "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa")
+algod_addresses = [address.strip() for address in os.getenv('ALGOD_ADDRESSES', algod_address).split(',') if address.strip()]
+algod_tokens = [token.strip() for token in os.getenv('ALGOD_TOKENS', '').split(',') if token.strip()]
+# rounds a node can be behind the most advanced one and still receive requests
+algod_max_lag = int(os.getenv('ALGOD_MAX_LAG', '2'))
+
+def create_algod_client():
+    # urllib3 is only imported when the client is needed
+    import algod_transport
+    tokens = algod_tokens or [algod_token] * len(algod_addresses)
+    if len(tokens) != len(algod_addresses):
+        raise ValueError("ALGOD_TOKENS must have one token per address of ALGOD_ADDRESSES.")
+    clients = [algod_transport.PooledAlgodClient(token, address) for token, address in zip(tokens, algod_addresses)]
+    if len(clients) == 1:
+        return clients[0]
+    import algod_pool
+    return algod_pool.AlgodPool(clients, max_lag=algod_max_lag)
+
+backends.register('algod', create_algod_client)
+algod_client = backends.lazy('algod')
+
+# Health published by the node monitor, as numbers: last round, synced (1 or 0), average round time and
+# age of the last status, in seconds. Empty if the monitor is not running.
+
+def node_health_metrics():
+    health = node_monitor.health()
+    if health is None:
+        return {}
+    values = {'last_round': health['last_round'] or 0, 'synced': int(health['synced']),
+              'status_age_seconds': round(time.time() - health['checked_at'], 3)}
+    if health['round_time'] is not None:
+        values['round_time_seconds'] = round(health['round_time'], 3)
+    return values
+
+# Connection reuse of the algod client: requests, connections opened and requests on a reused connection.
+# Empty if the client has no connection pool (e.g. a stand-in).
+
+def algod_connection_stats():
+    stats = getattr(algod_client, 'connection_stats', None)
+    stats = stats() if callable(stats) else None
+    return stats if isinstance(stats, dict) else {}
+
+# Health of the algod nodes, a dictionary by address. Empty with a single node.
+
+def algod_nodes_status():
+    nodes = getattr(algod_client, 'nodes_status', None)
+    nodes = nodes() if callable(nodes) else None
+    return {node['address']: node for node in nodes} if isinstance(nodes, list) else {}
+
+# Node status and suggested parameters, shared by all the transaction builders and refreshed once per round.
+# The client is looked up at fetch time, such that it can be replaced (e.g. mocked in tests).
+node_state = node_cache.NodeStateCache(lambda: algod_client)
+
+# Confirmations of all the transactions sent are followed by one shared tracker, scanning each new block once.
+confirmation_tracker = ConfirmationTracker(lambda: algod_client, on_round=node_state.observe_round)
+
+# Health of the node (round, sync state, round timing), followed in the background by the process serving
+# the UI (see node_monitor.py): transactions are refused right away when the node is out of sync.
+# A node without new round for ALGOD_STALL_AFTER seconds is also out of sync, if set.
+node_stall_after = os.getenv('ALGOD_STALL_AFTER')
+node_monitor = NodeMonitor(lambda: algod_client, interval=float(os.getenv('ALGOD_MONITOR_INTERVAL', '1.0')),
+                           stall_after=float(node_stall_after) if node_stall_after else None,
+                           on_round=node_state.observe_round)
+
+# Account information by address, valid until a newer round is observed
+# or until a transaction touching the account is sent.
+account_cache = LRUCache(maxsize=1024, ttl=10)
+# Leases of the transactions sent, to reject reused tokens locally
+lease_index = LeaseIndex()
 
 
 
@@ -42,12 +125,61 @@ def generate_account():
         return None
 
 
+# Account information through the account cache: entries fetched in an older round than
+# the latest one observed are refreshed.
+
+def get_account_info(account_address):
+    cached = account_cache.get(account_address)
+    if cached is not None and cached.get('round', 0) >= node_state.known_round():
+        return cached
+
+    with metrics.timed('account_info'):
+        account_info = algod_client.account_info(account_address)
+    node_state.observe_round(account_info.get('round'))
+    account_cache.put(account_address, account_info)
+    return account_info
+
+
+# Drop cached information of accounts touched by a transaction
+
+def invalidate_accounts(*addresses):
+    for address in addresses:
+        account_cache.pop(address)
+
+
+# Processes of generate_accounts are not forked from the server process: its threads (node monitor, confirmation
+# tracker, executors) and their locks would be copied in any state. They are forked from a fresh server
+# process (forkserver), or spawned where it is not available.
+process_context = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+
+# Generate a keypair and its mnemonic. Runs in the worker processes of generate_accounts.
+
+def _new_account(_=None):
+    new_private_key, new_address = account.generate_account()
+    return {
+        'address': new_address,
+        'private_key': new_private_key,
+        'mnemonic': mnemonic.from_private_key(new_private_key)
+    }
+
+
+# Generate many accounts across a pool of processes.
+# Returns an iterator over the new accounts, yielded as soon as they are generated.
+
+def generate_accounts(count, processes=None, chunksize=64):
+    with process_context.Pool(processes=processes) as pool:
+        for account_info in pool.imap_unordered(_new_account, range(count), chunksize=chunksize):
+            yield account_info
+
+
 # If user already has an Algorand account,
 # fetch info about that existing account
 
 def fetch_info(account_address):
     try:
-        account_info = algod_client.account_info(account_address)
+        account_info = get_account_info(account_address)
         balance = account_info.get('amount') / 1e6
 
         print(f"\nAccount balance for {account_address}: {balance} Algos")
@@ -67,7 +199,7 @@ def construct_simple_transaction(sender, receiver, amount, note, private_key, pa
 
     # Set transaction arguments
     if params is None:
-        params = algod_client.suggested_params()
+        params = node_state.suggested_params()
 
     # Ensure that either private_key or mnemonics is provided
     if not private_key and not mnemonics:
@@ -91,13 +223,17 @@ def construct_simple_transaction(sender, receiver, amount, note, private_key, pa
     fetch_info(receiver)
 
     # send transaction to the network
-    txid = algod_client.send_transaction(signed_txn)
+    with metrics.timed('send_transaction'):
+        txid = algod_client.send_transaction(signed_txn)
     print("Successfully sent transaction with ID: {}".format(txid))
+    invalidate_accounts(sender, receiver)
 
     # wait confirmation
     try:
-        confirmed_txn = wait_for_confirmation(algod_client, txid, 4)
+        with metrics.timed('confirmation_wait'):
+            confirmed_txn = confirmation_tracker.wait(txid, wait_rounds=4)
         print("\nTransaction confirmed in round {}".format(confirmed_txn.get('confirmed-round'))) 
+        node_state.observe_round(confirmed_txn.get('confirmed-round'))
 
         # fetch accounts information after transaction
         print(f"\n\n#### After the transaction #### \n")
@@ -112,14 +248,20 @@ def construct_simple_transaction(sender, receiver, amount, note, private_key, pa
 def create_lsig(teal_source):
 
     # Compile TEAL program: returns a dictionary with 
-    # the 'hash' = address of the program and 'result' = base64 representation of the TEAL contract
-    compiled_response = algod_client.compile(teal_source)
+    # the 'hash' = address of the program and 'result' = base64 representation of the TEAL contract.
+    # Sources already compiled are served from the compile cache, without calling algod.
+    with metrics.timed('teal_compile'):
+        compiled_response = compile_cache.compile_teal(algod_client, teal_source)
     print(f"\n\nCompiled response: ", compiled_response)
 
     # Decode result of compiled response from base64 to bytes
     program_bytes = base64.b64decode(compiled_response['result'])
     print(f"\n\nProgram in Bytes: {program_bytes}")
 
+    # Register the program, such that tokens can reference it instead of carrying the bytecode,
+    # with its constraints, such that transactions can be checked locally before being sent
+    program_registry.register(program_bytes, teal_constraints.parse_constraints(teal_source))
+
     # Create logic sig account from the program bytes to prepare the account for delegation
     lsig = LogicSigAccount(program_bytes)
 
@@ -128,186 +270,317 @@ def create_lsig(teal_source):
 
 # Sign LogiSignature object with user's private key
 
+@metrics.timed('lsig_sign')
 def sign_lsig(lsig, private_key):
     lsig.sign(private_key)
     print("\n\nLogic Signature Signed Correctly!")
     return lsig
 
 
-# Encode lsig object to SMS text string
+# Encode lsig object to SMS text string.
+# With compact=True, the token uses the compact format of lsig_codec, needing fewer SMS segments.
 
-def lsig_to_sms_text(lsig):
+@metrics.timed('token_encode')
+def lsig_to_sms_text(lsig, compact=False):
+    return lsig_codec.encode(lsig, compact=compact)
 
-    # lsig fields as ordered dictionary
-    dict = lsig.dictify()
-    print("\n\nDictified Lsig ")
-    print(dict)
 
-    # Encode ditionary fields to b64 urlsafe, then decode to convert this to a UTF-8 string.
-    dict["lsig"]['l'] = base64.urlsafe_b64encode(dict["lsig"]['l']).decode()
-    dict["lsig"]['sig'] = base64.urlsafe_b64encode(dict["lsig"]['sig']).decode()
-    dict["sigkey"] = base64.urlsafe_b64encode(dict["sigkey"]).decode()
-    print("\n\nDecoded bytes Dict: {}".format(dict))
+# Decode SMS text string to lsig object. Both compact and previous format tokens are accepted.
 
-    # Create JSON string
-    dictStr= json.dumps(dict)
-    print("\n\nDictStr JSON: {}".format(dictStr))
+@metrics.timed('token_decode')
+def sms_text_to_lsig(strEncoded):
+    return lsig_codec.decode(strEncoded)
 
-    # Make JSON string a UTF-8 encoded bytes object
-    encoded = dictStr.encode()
-    print("\n\nDictBytes: {}".format(encoded))
 
-    # Encode bytes object from UTF-8 to base64, to get a string
-    b64 = base64.urlsafe_b64encode(encoded)
-    print("\n\nB64 Encoded DictStr: {}".format(b64))
+# Create a payment transaction signed with the lsig.
+# The lease, derived from the token, makes the network reject transactions reusing the token within the valid rounds.
 
-    # Base64-encoded bytes object to string
-    strEncoded = b64.decode()
-    print("\n\nFinal DATA ENCODED in text string: {}".format(strEncoded))
-    return strEncoded
+def build_lsig_transaction(senders_address, receivers_address, amount, logicSig, token, params):
+    lease = generate_lease(token)
 
+    # create transaction
+    txn = PaymentTxn(senders_address, params, receivers_address, amount, lease=lease)
 
-# Decode SMS text string to lsig object
+    # check the transaction against the lsig conditions, when known, before it reaches the network
+    preflight_check(txn, logicSig)
 
-def sms_text_to_lsig(strEncoded):
-    # Decode from Base64 URL Safe String to bytes object
-    decoded_bytes = base64.urlsafe_b64decode(strEncoded).decode()
-    print("\n\n Decoded Lsig: {}".format(decoded_bytes))    
+    # sign transaction with LogicSig
+    return LogicSigTransaction(txn, logicSig)
 
-    # String to dictionary
-    dic = ast.literal_eval(decoded_bytes)
-    print("\n\n To Dictionary: {}".format(dic))
 
-    # Decode encoded dictionary values
-    dic["lsig"]["l"] = base64.urlsafe_b64decode(dic["lsig"]["l"])
-    dic["lsig"]["sig"] = base64.urlsafe_b64decode(dic["lsig"]["sig"])
-    dic["sigkey"] = base64.urlsafe_b64decode(dic["sigkey"])
-    print("\n\nlsig After decoding: {}".format(dic))
+# Check a transaction against the constraints of the lsig's program, extracted from its TEAL source.
+# Raises an exception worded like algod's rejection ('rejected by logic') if a constraint is violated.
 
-    # Final Lsig
-    finalLsig = LogicSigAccount.undictify(dic)
-    #print("\n\n Finallsig OBJECT after decoding: {}".format(finalLsig))
-    print(f"\n\nFINAL DATA DECODED in LogicSigAccount object: {finalLsig}")
-    return finalLsig
+def preflight_check(txn, logicSig):
+    constraints = program_registry.constraints_of(logicSig.lsig.logic)
+    if not constraints:
+        return
+    violations = teal_constraints.check(constraints, teal_constraints.transaction_fields(txn))
+    if violations:
+        raise ValueError("Transaction rejected by logic (local pre-flight check): " + "; ".join(violations))
 
 
-# Create a transaction with lsig attached
+# Create a transaction with lsig attached and send it to the network, without waiting for confirmation.
+# Returns the transaction ID.
 
-def construct_lsig_transaction(senders_address, receivers_address, amount, logicSig, token):
+def submit_lsig_transaction(senders_address, receivers_address, amount, logicSig, token):
+    check_node_sync()
+
+    # get suggested parameters, valid from the current round for the next 1000 rounds.
+    with metrics.timed('suggested_params'):
+        params = node_state.suggested_params()
+    with metrics.timed('build_transaction'):
+        signed_txn = build_lsig_transaction(senders_address, receivers_address, amount, logicSig, token, params)
+
+    # reject a reused token locally, then send transaction to the network
+    reserve_lease(signed_txn.transaction, signed_txn.get_txid())
+    try:
+        with metrics.timed('send_transaction'):
+            txid = algod_client.send_transaction(signed_txn)
+    except Exception as e:
+        release_lease(signed_txn.transaction, e)
+        raise
+    print("Successfully sent transaction with txID: {}".format(txid))
+    invalidate_accounts(senders_address, receivers_address)
+    return txid
+
+
+# Check that the node is synced before sending a transaction.
+# With the node monitor running, its published health is read and NodeNotSyncedError raised if the node
+# is out of sync; otherwise the node status is queried and its sync state only reported.
+
+def check_node_sync():
+    if node_monitor.require_synced() is not None:
+        return
+    status = None
     try:
-        status = algod_client.status()
+        with metrics.timed('node_status'):
+            status = node_state.status()
         print("Node status:", status)
     except Exception as e:
         print("An error occurred checking node status:", e)
 
-    if status and 'lastRound' in status and 'catchupTime' in status:
-        if status['catchupTime'] == 0:
+    if status and 'last-round' in status and 'catchup-time' in status:
+        if status['catchup-time'] == 0:
             print("Node is fully synced.")
         else:
             print("Node is catching up, not fully synced.")
     else:
         print("Unable to determine node sync status.")
- 
 
-    # get suggested parameters
-    params = algod_client.suggested_params()
-    
-    # set transaction rounds in which transactions with the same lease will be rejected
-    current_round = algod_client.status().get('last-round')
-    first_valid_round = current_round + 1
-    last_valid_round = first_valid_round + 1000 
-    lease = generate_lease(token)
 
-    # create transaction
-    txn = PaymentTxn(senders_address, params, receivers_address, amount, lease=lease)
+# Reserve the lease of a transaction in the local lease index, before sending it, with the transaction ID if
+# given (its lease is then released if its confirmation fails, see track_lsig_transaction).
+# Raises an exception worded like algod's rejection ('overlapping lease') if the token has already been used.
 
-    # sign transaction with LogicSig
-    signed_txn = LogicSigTransaction(txn, logicSig)
+def reserve_lease(txn, txid=None):
+    lease_index.reserve(txn.sender, txn.lease, txn.first_valid_round, txn.last_valid_round, txid)
 
-    # send transaction to the network
-    txid = algod_client.send_transaction(signed_txn)
-    print("Successfully sent transaction with txID: {}".format(txid))
 
-    # wait confirmation
-    try:
-        confirmed_txn = wait_for_confirmation(algod_client, txid, 4)
-        print("\nTransaction confirmed in round {}".format(confirmed_txn.get('confirmed-round')))
-           # fetch accounts information after transaction
-        print(f"\n\n#### After the transaction #### \n")
-        fetch_info(senders_address)
-        fetch_info(receivers_address) 
-    except Exception as e:
-        print(e)
+# Release the lease of a transaction that the network did not accept, unless algod found the lease in use
 
+def release_lease(txn, error):
+    if 'overlapping lease' not in str(error):
+        lease_index.release(txn.sender, txn.lease)
 
-# Send lsig via SMS to mobile phone
 
-def send_SMS(sender_number, receiver_number, text):
-    success = sms_utils.send_sms_text(sender_number, receiver_number, text)
-    if success:
-        print("The message was successfully sent.")
-        return success
-    else:
-        print("Failed to send the message.")
+# Release the lease of a transaction whose confirmation failed (rejected or timed out), by its ID
 
+def release_lease_on_failure(txid, future):
+    error = future.exception()
+    if error is not None and 'overlapping lease' not in str(error):
+        lease_index.release_transaction(txid)
 
-# Retrieve SMS data from the file where the info was saved
 
-def get_data_from_file():
-    with open('tmp/received_sms_data.json', 'r') as f:
-        data = json.load(f)
-        message_text = data.get('text', '')
-        sender_number = data.get('from', '')
-        receiver_number = data.get('to', '')
-        timestamp = data.get('timestamp', '')
+# Track the confirmation of a lsig transaction sent. Returns a Future, resolved with its info
+# or failed if the transaction is rejected or times out, in which case its lease is released.
 
-    return message_text, sender_number, receiver_number, timestamp
+def track_lsig_transaction(txid):
+    future = confirmation_tracker.track(txid, wait_rounds=4)
+    future.add_done_callback(lambda future: release_lease_on_failure(txid, future))
+    return future
 
 
-# Serialize: convert from LogicSig object to dictionary
+# Report a confirmed lsig transaction
 
-def serialize_logic_sig(lsig):
-    lsig_dict = lsig.dictify()
-    lsig_dict["lsig"]['l'] = base64.urlsafe_b64encode(lsig_dict["lsig"]['l']).decode()
-    lsig_dict["lsig"]['sig'] = base64.urlsafe_b64encode(lsig_dict["lsig"]['sig']).decode() if lsig_dict["lsig"]['sig'] else ''
-    lsig_dict["sigkey"] = base64.urlsafe_b64encode(lsig_dict["sigkey"]).decode() if lsig_dict["sigkey"] else ''
-    
-    dict_str = json.dumps(lsig_dict)
-    encoded = dict_str.encode()
-    b64_encoded = base64.urlsafe_b64encode(encoded).decode()
+def lsig_transaction_confirmed(confirmed_round, senders_address, receivers_address):
+    print("\nTransaction confirmed in round {}".format(confirmed_round))
+    node_state.observe_round(confirmed_round)
+    # fetch accounts information after transaction
+    print(f"\n\n#### After the transaction #### \n")
+    fetch_info(senders_address)
+    fetch_info(receivers_address)
 
-    return b64_encoded
 
+# Wait for the confirmation of a lsig transaction. Raises an exception if it is rejected or times out.
 
-# Deserialize: convert from dictionary to LogicSig object
+def confirm_lsig_transaction(txid, senders_address, receivers_address):
+    with metrics.timed('confirmation_wait'):
+        confirmed_txn = track_lsig_transaction(txid).result()
+    lsig_transaction_confirmed(confirmed_txn.get('confirmed-round'), senders_address, receivers_address)
+    return confirmed_txn
 
-def deserialize_logic_sig(encoded_str):
-    decoded_bytes = base64.urlsafe_b64decode(encoded_str.encode())
-    decoded_str = decoded_bytes.decode()
-    lsig_dict = json.loads(decoded_str)
 
-    # decoding the base64 fields back to their original binary format
-    lsig_dict["lsig"]['l'] = base64.urlsafe_b64decode(lsig_dict["lsig"]['l'])
-    lsig_dict["lsig"]['sig'] = base64.urlsafe_b64decode(lsig_dict["lsig"]['sig']) if lsig_dict["lsig"]['sig'] else None
-    lsig_dict["sigkey"] = base64.urlsafe_b64decode(lsig_dict["sigkey"]) if lsig_dict["sigkey"] else None
+# Create a transaction with lsig attached, send it and wait for its confirmation
+
+def construct_lsig_transaction(senders_address, receivers_address, amount, logicSig, token):
+    txid = submit_lsig_transaction(senders_address, receivers_address, amount, logicSig, token)
+
+    # wait confirmation
+    try:
+        confirm_lsig_transaction(txid, senders_address, receivers_address)
+    except Exception as e:
+        print(e)
+
+
+# Validate one item of a batch redemption and build its signed transaction. Raises ValueError if invalid.
+
+def build_batch_item(item, params):
+    senders_address = item.get('sender_address')
+    receivers_address = item.get('receiver_address')
+    amount = item.get('amount')
+    token = item.get('token')
+
+    if not senders_address or not receivers_address or not amount or not token:
+        raise ValueError("All fields must be provided.")
+    if not encoding.is_valid_address(senders_address) or not encoding.is_valid_address(receivers_address):
+        raise ValueError("Invalid account address.")
+    if not isinstance(amount, int) or isinstance(amount, bool) or amount <= 0:
+        raise ValueError("Amount must be a positive integer of microAlgos.")
 
-    return LogicSigAccount.undictify(lsig_dict)
+    try:
+        logic_sig = sms_text_to_lsig(token)
+    except Exception as e:
+        raise ValueError(f"Invalid token: {e}")
+    if not logic_sig.verify() or logic_sig.address() != senders_address:
+        raise ValueError("Token not signed by the sender's account.")
+
+    return build_lsig_transaction(senders_address, receivers_address, amount, logic_sig, token, params)
+
+
+# Redeem many tokens in one call.
+# Each item of redemptions is a dictionary with 'sender_address', 'receiver_address', 'amount' and 'token'.
+# All the transactions are built against one suggested parameters fetch. By default each one is sent and
+# confirmed independently; with atomic=True they are sent with send_transactions in atomic groups of up
+# to the protocol group limit, where a group succeeds or fails as a whole.
+# Returns a report with, for each item in order: 'index', 'success', 'txid', 'confirmed_round' and 'error'.
+
+@metrics.timed('batch_redemption')
+def construct_lsig_batch(redemptions, atomic=False, wait_rounds=4):
+    results = [{'index': i, 'success': False, 'txid': None, 'confirmed_round': None, 'error': None}
+               for i in range(len(redemptions))]
+    node_monitor.require_synced()
+    params = node_state.suggested_params()
+
+    # validate and build all the transactions first
+    built = []
+    leases = set()
+    for i, item in enumerate(redemptions):
+        try:
+            signed_txn = build_batch_item(item, params)
+            if signed_txn.transaction.lease in leases:
+                raise ValueError("Token repeated in the batch.")
+            leases.add(signed_txn.transaction.lease)
+            reserve_lease(signed_txn.transaction)
+            built.append((i, signed_txn))
+        except Exception as e:
+            results[i]['error'] = str(e)
+
+    # submit: each transaction independently, or in atomic groups
+    submitted = []
+    if atomic:
+        for start in range(0, len(built), constants.TX_GROUP_LIMIT):
+            group = built[start:start + constants.TX_GROUP_LIMIT]
+            txns = [signed_txn.transaction for i, signed_txn in group]
+            group_id = calculate_group_id(txns)
+            for txn in txns:
+                txn.group = group_id
+            try:
+                algod_client.send_transactions([signed_txn for i, signed_txn in group])
+                submitted.extend((i, signed_txn.get_txid()) for i, signed_txn in group)
+            except Exception as e:
+                # algod names the transaction rejecting the group: the other ones were not used
+                rejected = [i for i, signed_txn in group if signed_txn.get_txid() in str(e)]
+                for i, signed_txn in group:
+                    if rejected and i not in rejected:
+                        results[i]['error'] = "Not sent: another transaction of its atomic group was rejected."
+                    else:
+                        results[i]['error'] = str(e)
+                    # only the lease of the rejected transaction may be in use
+                    if i in rejected:
+                        release_lease(signed_txn.transaction, e)
+                    else:
+                        lease_index.release(signed_txn.transaction.sender, signed_txn.transaction.lease)
+    else:
+        def send(entry):
+            i, signed_txn = entry
+            try:
+                return i, algod_client.send_transaction(signed_txn), None
+            except Exception as e:
+                release_lease(signed_txn.transaction, e)
+                return i, None, str(e)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for i, txid, error_message in executor.map(send, built):
+                if txid:
+                    submitted.append((i, txid))
+                else:
+                    results[i]['error'] = error_message
+
+    for i, signed_txn in built:
+        invalidate_accounts(signed_txn.transaction.sender, signed_txn.transaction.receiver)
+
+    # wait for all the confirmations at once through the shared tracker
+    futures = [(i, txid, confirmation_tracker.track(txid, wait_rounds=wait_rounds)) for i, txid in submitted]
+    transactions = dict(built)
+    for i, txid, future in futures:
+        results[i]['txid'] = txid
+        try:
+            confirmed_txn = future.result()
+            results[i]['success'] = True
+            results[i]['confirmed_round'] = confirmed_txn.get('confirmed-round')
+        except Exception as e:
+            results[i]['error'] = str(e)
+            release_lease(transactions[i].transaction, e)
+
+    print(f"Batch redemption: {sum(r['success'] for r in results)}/{len(results)} transactions confirmed.")
+    return results
+
+
+# Retrieve the data of a received SMS from the message store: the given message, or the most recent one
+# from the given sender (or to the given receiver). Without any of them, no message is returned:
+# the most recent message of all senders may be the token of another user.
+
+def get_sms_data(message_id=None, sender=None, receiver=None):
+    message = None
+    if message_id:
+        message = message_store.get_message(message_id)
+    elif sender or receiver:
+        message = message_store.latest_message(sender=sender or None, receiver=receiver or None)
+    if message is None:
+        return '', '', '', '', None
+
+    return message['text'], message['sender'], message['receiver'], message['timestamp'], message['message_id']
+
+
+# Serialize: convert from LogicSig object to a string that can be saved in session data
+
+def serialize_logic_sig(lsig):
+    return lsig_codec.encode_legacy(lsig)
+
+
+# Deserialize: convert from string back to LogicSig object
+
+def deserialize_logic_sig(encoded_str):
+    return lsig_codec.decode(encoded_str)
 
 
-# Read .teal contract to extract the value under the condition 'Amount'
+# Read .teal contract to extract the spending limit of the condition on 'Amount'
 
 def extract_txn_amount_from_teal(file_path):
     with open(file_path, 'r') as file:
-        for line in file:
-            if 'txn Amount' in line:
-                amount_line = next(file, '').strip()
-                parts = amount_line.split()
-                if len(parts) > 1 and parts[0] == 'int':
-                    try:
-                        return int(parts[1])
-                    except ValueError:
-                        continue
-    return None
+        teal_source = file.read()
+    return teal_constraints.displayed_amount_limit(teal_source)
 
 
 # Check matching between account's private key and account's address
@@ -0,0 +1,78 @@
+import heapq
+import threading
+
+
+# Local index of the leases of the transactions sent, to reject a reused token before it reaches algod.
+# The network rejects a transaction whose (sender, lease) is used by another transaction still valid:
+# each entry records the last valid round of the transaction holding the lease, and expires once the
+# rounds go past it. Reserving a lease is atomic, so of concurrent attempts with the same token only one proceeds.
+# A lease reserved with the ID of its transaction can be released by that ID, when its confirmation fails.
+
+
+class LeaseInUseError(ValueError):
+    pass
+
+
+class LeaseIndex:
+
+    def __init__(self):
+        # (sender, lease) -> (last valid round, transaction ID or None)
+        self._leases = {}
+        # transaction ID -> (sender, lease)
+        self._txids = {}
+        # (last valid round, key) of the entries, to expire them in order
+        self._expiry = []
+        self._lock = threading.Lock()
+
+
+    # Remove the entries whose last valid round is before current_round
+
+    def _expire(self, current_round):
+        while self._expiry and self._expiry[0][0] < current_round:
+            last_valid, key = heapq.heappop(self._expiry)
+            entry = self._leases.get(key)
+            if entry is not None and entry[0] == last_valid:
+                self._remove(key)
+
+
+    def _remove(self, key):
+        last_valid, txid = self._leases.pop(key)
+        if txid is not None:
+            self._txids.pop(txid, None)
+
+
+    # Reserve the lease of a transaction valid from first_valid to last_valid, with its ID if given.
+    # Raises LeaseInUseError if a transaction sent before holds the same lease.
+
+    def reserve(self, sender, lease, first_valid, last_valid, txid=None):
+        key = (sender, lease)
+        with self._lock:
+            self._expire(first_valid)
+            if key in self._leases:
+                raise LeaseInUseError("Transaction rejected: overlapping lease (token already used, local lease index).")
+            self._leases[key] = (last_valid, txid)
+            if txid is not None:
+                self._txids[txid] = key
+            heapq.heappush(self._expiry, (last_valid, key))
+
+
+    # Release a reserved lease, when its transaction has not been accepted by the network
+
+    def release(self, sender, lease):
+        with self._lock:
+            if (sender, lease) in self._leases:
+                self._remove((sender, lease))
+
+
+    # Release the lease reserved by a transaction, by its ID
+
+    def release_transaction(self, txid):
+        with self._lock:
+            key = self._txids.get(txid)
+            if key is not None:
+                self._remove(key)
+
+
+    def __len__(self):
+        with self._lock:
+            return len(self._leases)
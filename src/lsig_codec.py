@@ -0,0 +1,230 @@
+import base64
+import binascii
+import json
+import zlib
+import msgpack
+from algosdk.transaction import LogicSigAccount
+from cache_utils import LRUCache
+import program_registry
+
+
+# Codec of the Logic Signature tokens sent via SMS and kept in session data.
+#
+# Previous format (version 0): base64url of the JSON of lsig.dictify(), its binary fields
+# ('l', 'sig', 'arg', 'sigkey') written in base64url.
+#
+# Compact format, version 1:
+#   '!1' + text encoding of (0x01 sentinel + msgpack(lsig.dictify()) + 2-byte checksum)
+# Compact format, version 2, for programs of the program registry:
+#   '!2' + text encoding of (0x01 sentinel + program reference + signature + signer key + 2-byte checksum)
+# The text is the binary data written as a number in base 82, using only characters of the
+# GSM-7 basic alphabet (1 septet each), so a token never switches the SMS to UCS-2 encoding.
+# Tokens in the previous format (base64 of JSON) never contain '!': decoders tell them apart by the prefix.
+COMPACT_PREFIX = '!1'
+REFERENCE_PREFIX = '!2'
+ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz!#$%&()*+,-./:;<=>?_'
+_BASE = len(ALPHABET)
+_DIGITS = {char: value for value, char in enumerate(ALPHABET)}
+
+# GSM 03.38 character sets: basic characters take one septet, extension characters two
+GSM7_BASIC = ("@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+              "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà")
+GSM7_EXTENSION = "^{}\\[~]|€\f"
+
+# Recently decoded tokens: decoding the same token again returns the same LogicSigAccount object,
+# which must therefore not be modified by callers.
+decoded_tokens = LRUCache(maxsize=512)
+
+
+def _checksum(data):
+    return (zlib.crc32(data) & 0xFFFF).to_bytes(2, 'big')
+
+
+# Base conversions work on chunks of _CHUNK digits, to limit the operations on the large integer
+_CHUNK = 9
+_CHUNK_BASE = _BASE ** _CHUNK
+
+
+def _to_text(data):
+    # the sentinel byte preserves leading zero bytes
+    number = int.from_bytes(b'\x01' + data, 'big')
+    chunks = []
+    while number:
+        number, chunk = divmod(number, _CHUNK_BASE)
+        chunks.append(chunk)
+
+    chars = []
+    for chunk in chunks:
+        for _ in range(_CHUNK):
+            chunk, digit = divmod(chunk, _BASE)
+            chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars)).lstrip(ALPHABET[0])
+
+
+def _from_text(text):
+    try:
+        digits = [_DIGITS[char] for char in text]
+    except KeyError as e:
+        raise ValueError(f"Invalid character in token: {e.args[0]!r}")
+
+    # pad with leading zero digits to whole chunks
+    digits = [0] * (-len(digits) % _CHUNK) + digits
+    number = 0
+    for start in range(0, len(digits), _CHUNK):
+        chunk = 0
+        for digit in digits[start:start + _CHUNK]:
+            chunk = chunk * _BASE + digit
+        number = number * _CHUNK_BASE + chunk
+    data = number.to_bytes((number.bit_length() + 7) // 8, 'big')
+    if not data or data[0] != 1:
+        raise ValueError("Invalid token encoding.")
+    return data[1:]
+
+
+def is_compact(text):
+    return text.startswith(COMPACT_PREFIX) or text.startswith(REFERENCE_PREFIX)
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def _unb64(text, field):
+    if not isinstance(text, str):
+        raise ValueError(f"Invalid token field '{field}'.")
+    try:
+        return base64.urlsafe_b64decode(text)
+    except (binascii.Error, ValueError):
+        raise ValueError(f"Invalid token field '{field}'.")
+
+
+'''
+    Encode a LogicSigAccount into a token in the previous format (base64 of JSON).
+'''
+def encode_legacy(lsig):
+    lsig_dict = lsig.dictify()
+    program = lsig_dict['lsig']
+    if 'msig' in program:
+        raise ValueError("Multisig delegation is only supported by the compact format.")
+
+    encoded_program = {}
+    for field, value in program.items():
+        encoded_program[field] = [_b64(arg) for arg in value] if field == 'arg' else _b64(value)
+    encoded = {'lsig': encoded_program}
+    if 'sigkey' in lsig_dict:
+        encoded['sigkey'] = _b64(lsig_dict['sigkey'])
+
+    return _b64(json.dumps(encoded).encode())
+
+
+'''
+    Decode a token in the previous format back into a LogicSigAccount.
+    Raises ValueError if the token is malformed.
+'''
+def decode_legacy(text):
+    try:
+        encoded = json.loads(base64.urlsafe_b64decode(text))
+    except (binascii.Error, ValueError):
+        raise ValueError("Invalid token encoding.")
+    if not isinstance(encoded, dict) or not isinstance(encoded.get('lsig'), dict) or 'l' not in encoded['lsig']:
+        raise ValueError("Invalid token content.")
+
+    program = {'l': _unb64(encoded['lsig']['l'], 'l')}
+    # empty fields were written for missing signatures
+    if encoded['lsig'].get('sig'):
+        program['sig'] = _unb64(encoded['lsig']['sig'], 'sig')
+    if encoded['lsig'].get('arg'):
+        if not isinstance(encoded['lsig']['arg'], list):
+            raise ValueError("Invalid token field 'arg'.")
+        program['arg'] = [_unb64(arg, 'arg') for arg in encoded['lsig']['arg']]
+    lsig_dict = {'lsig': program}
+    if encoded.get('sigkey'):
+        lsig_dict['sigkey'] = _unb64(encoded['sigkey'], 'sigkey')
+
+    return LogicSigAccount.undictify(lsig_dict)
+
+
+def _pack(prefix, payload):
+    return prefix + _to_text(payload + _checksum(payload))
+
+
+def _unpack(prefix, text):
+    data = _from_text(text[len(prefix):].strip())
+    payload, checksum = data[:-2], data[-2:]
+    if not payload or _checksum(payload) != checksum:
+        raise ValueError("Token checksum mismatch: the token is incomplete or corrupted.")
+    return payload
+
+
+'''
+    Encode a LogicSigAccount into a compact token.
+    If the program is in the program registry, the token references it (version 2),
+    otherwise the program bytecode is embedded (version 1).
+'''
+def encode_compact(lsig):
+    lsig_dict = lsig.dictify()
+    program = lsig_dict['lsig']
+    if set(program) == {'l', 'sig'} and len(lsig_dict.get('sigkey', b'')) == 32:
+        ref = program_registry.reference_of(program['l'])
+        if ref is not None:
+            return _pack(REFERENCE_PREFIX, ref + program['sig'] + lsig_dict['sigkey'])
+    return _pack(COMPACT_PREFIX, msgpack.packb(lsig_dict, use_bin_type=True))
+
+
+'''
+    Decode a compact token back into a LogicSigAccount.
+    Raises ValueError if the token is malformed, its checksum does not match
+    or it references a program missing from the program registry.
+'''
+def decode_compact(text):
+    if text.startswith(REFERENCE_PREFIX):
+        payload = _unpack(REFERENCE_PREFIX, text)
+        if len(payload) != program_registry.REF_SIZE + 64 + 32:
+            raise ValueError("Invalid token content.")
+        ref = payload[:program_registry.REF_SIZE]
+        program_bytes = program_registry.lookup(ref)
+        if program_bytes is None:
+            raise ValueError("Token references an unknown program.")
+        signature = payload[program_registry.REF_SIZE:program_registry.REF_SIZE + 64]
+        return LogicSigAccount.undictify({'lsig': {'l': program_bytes, 'sig': signature}, 'sigkey': payload[-32:]})
+
+    if not text.startswith(COMPACT_PREFIX):
+        raise ValueError("Not a compact token.")
+    payload = _unpack(COMPACT_PREFIX, text)
+    try:
+        return LogicSigAccount.undictify(msgpack.unpackb(payload, raw=False))
+    except (KeyError, TypeError, ValueError, msgpack.UnpackException) as e:
+        raise ValueError(f"Invalid token content: {e}")
+
+
+'''
+    Encode a LogicSigAccount into a token: compact format by default, or previous format.
+'''
+def encode(lsig, compact=True):
+    return encode_compact(lsig) if compact else encode_legacy(lsig)
+
+
+'''
+    Decode a token in either format back into a LogicSigAccount.
+    Recently decoded tokens are served from memory.
+    Raises ValueError if the token is malformed.
+'''
+def decode(text):
+    text = text.strip()
+    lsig = decoded_tokens.get(text)
+    if lsig is None:
+        lsig = decode_compact(text) if is_compact(text) else decode_legacy(text)
+        decoded_tokens.put(text, lsig)
+    return lsig
+
+
+'''
+    Number of SMS segments needed to send text.
+    GSM-7 text: 160 septets in a single SMS, 153 per segment when concatenated.
+    Otherwise the SMS is sent as UCS-2: 70 characters in a single SMS, 67 per segment.
+'''
+def sms_segments(text):
+    if all(char in GSM7_BASIC or char in GSM7_EXTENSION for char in text):
+        septets = sum(2 if char in GSM7_EXTENSION else 1 for char in text)
+        return 1 if septets <= 160 else -(-septets // 153)
+    return 1 if len(text) <= 70 else -(-len(text) // 67)
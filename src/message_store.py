@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+# Durable store of the SMS messages received, in a SQLite database in WAL mode:
+# concurrent readers never block the writer, and each message is indexed by
+# message ID, sender and receiver. The database also holds the outbox of the SMS to send (see notification_outbox)
+# and the parts of long texts waiting for their other parts (see sms_concat).
+db_path = 'tmp/messages.db'
+_local = threading.local()
+_schema_lock = threading.Lock()
+_initialised = set()
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        message_id TEXT NOT NULL UNIQUE,
+        sender TEXT,
+        receiver TEXT,
+        text TEXT,
+        timestamp TEXT,
+        received_at REAL NOT NULL,
+        consumed INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS messages_sender ON messages (sender, id);
+    CREATE INDEX IF NOT EXISTS messages_receiver ON messages (receiver, id);
+    CREATE TABLE IF NOT EXISTS outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sender TEXT NOT NULL,
+        receiver TEXT NOT NULL,
+        text TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        error TEXT
+    );
+    CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+    CREATE TABLE IF NOT EXISTS message_parts (
+        sender TEXT NOT NULL,
+        ref TEXT NOT NULL,
+        total INTEGER NOT NULL,
+        number INTEGER NOT NULL,
+        message_id TEXT NOT NULL,
+        text TEXT NOT NULL,
+        received_at REAL NOT NULL,
+        PRIMARY KEY (sender, ref, total, number)
+    );
+'''
+
+
+'''
+    Connection of the current thread to the database, created on first use.
+'''
+def connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.path == db_path:
+        return conn
+
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    with _schema_lock:
+        if db_path not in _initialised:
+            conn.executescript(SCHEMA)
+            _initialised.add(db_path)
+    _local.conn = conn
+    _local.path = db_path
+    return conn
+
+
+'''
+    Convert the data of an inbound SMS webhook into a message record.
+    Both the Messages API ('from', 'message_uuid') and the SMS API ('msisdn', 'messageId') formats are accepted.
+'''
+def to_record(data):
+    return {
+        'message_id': str(data.get('message_uuid') or data.get('messageId') or uuid.uuid4().hex),
+        'sender': data.get('from') or data.get('msisdn', ''),
+        'receiver': data.get('to', ''),
+        'text': data.get('text', ''),
+        'timestamp': data.get('timestamp') or data.get('message-timestamp', ''),
+        'received_at': time.time(),
+    }
+
+
+'''
+    Save many messages in one transaction. Messages already saved (same message ID,
+    e.g. a webhook retried by Vonage) are ignored. Returns the message IDs.
+'''
+def save_messages(messages):
+    records = [to_record(data) for data in messages]
+    conn = connection()
+    with conn:
+        conn.executemany(
+            'INSERT OR IGNORE INTO messages (message_id, sender, receiver, text, timestamp, received_at) '
+            'VALUES (:message_id, :sender, :receiver, :text, :timestamp, :received_at)', records)
+    return [record['message_id'] for record in records]
+
+
+def save_message(data):
+    return save_messages([data])[0]
+
+
+def _to_dict(row):
+    if row is None:
+        return None
+    return {key: row[key] for key in ('message_id', 'sender', 'receiver', 'text', 'timestamp', 'consumed')}
+
+
+'''
+    Message with the given message ID, or None.
+'''
+def get_message(message_id):
+    row = connection().execute('SELECT * FROM messages WHERE message_id = ?', (message_id,)).fetchone()
+    return _to_dict(row)
+
+
+'''
+    Most recent message, optionally from a given sender or to a given receiver, or None.
+'''
+def latest_message(sender=None, receiver=None):
+    if sender is not None:
+        query, args = 'SELECT * FROM messages WHERE sender = ? ORDER BY id DESC LIMIT 1', (sender,)
+    elif receiver is not None:
+        query, args = 'SELECT * FROM messages WHERE receiver = ? ORDER BY id DESC LIMIT 1', (receiver,)
+    else:
+        query, args = 'SELECT * FROM messages ORDER BY id DESC LIMIT 1', ()
+    return _to_dict(connection().execute(query, args).fetchone())
+
+
+'''
+    Erase the text (the token) of a message once it has been used.
+    With conn, the update is part of the transaction in progress on conn, committed by the caller.
+'''
+def consume_message(message_id, conn=None):
+    if conn is not None:
+        conn.execute("UPDATE messages SET text = '', consumed = 1 WHERE message_id = ?", (message_id,))
+        return
+    conn = connection()
+    with conn:
+        consume_message(message_id, conn)
+
+
+# Close the connection of the current thread, e.g. before removing the database
+
+def close():
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
@@ -0,0 +1,177 @@
+import bisect
+import threading
+import time
+from functools import wraps
+
+
+# Latency histograms and counters of the stages of the system (TEAL compilation, signing, token codec,
+# Vonage calls, node requests, confirmations, HTTP routes), rendered in Prometheus text format.
+# Recording a value takes a lock and a binary search over the buckets: cheap enough to stay on in production.
+# Each process (UI app, SMS app) has its own metrics, served by its own /metrics route.
+
+# Bucket upper bounds, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_lock = threading.Lock()
+# name -> (help, {labels: [bucket counts..., count, sum]})
+_histograms = {}
+# name -> (help, {labels: value})
+_counters = {}
+# name -> (help, function returning {labels: value})
+_gauges = {}
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+'''
+    Record a duration, in seconds, in the histogram name.
+'''
+def observe(name, seconds, help='', **labels):
+    key = _labels(labels)
+    index = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        series = _histograms.setdefault(name, (help, {}))[1]
+        values = series.get(key)
+        if values is None:
+            values = series[key] = [0] * (len(BUCKETS) + 2)
+        if index < len(BUCKETS):
+            values[index] += 1
+        values[-2] += 1
+        values[-1] += seconds
+
+
+'''
+    Increment the counter name.
+'''
+def increment(name, value=1, help='', **labels):
+    key = _labels(labels)
+    with _lock:
+        series = _counters.setdefault(name, (help, {}))[1]
+        series[key] = series.get(key, 0) + value
+
+
+'''
+    Register a gauge, whose values are read from function when rendering: a number, or a dictionary
+    of numbers by label value (label named label_name).
+'''
+def gauge(name, function, help='', label_name=None):
+    with _lock:
+        _gauges[name] = (help, function, label_name)
+
+
+'''
+    Time a stage: its duration is recorded in the histogram 'stage_duration_seconds',
+    and its failures (exceptions) counted in 'stage_errors_total'.
+    Used as a context manager (with metrics.timed('compile'): ...) or as a decorator (@metrics.timed('compile')).
+'''
+class timed:
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe('stage_duration_seconds', time.perf_counter() - self.start,
+                help='Duration of the stages of the system, in seconds.', stage=self.stage)
+        if exc_type is not None:
+            increment('stage_errors_total', help='Stages ended by an exception.', stage=self.stage)
+        return False
+
+    def __call__(self, function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with timed(self.stage):
+                return function(*args, **kwargs)
+        return wrapper
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+'''
+    Instrument the requests of a Flask app: their durations by route and status are recorded
+    in 'http_request_duration_seconds', and the metrics are served at /metrics.
+'''
+def instrument(app, app_name):
+    from flask import Response, g, request
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None and request.endpoint != 'metrics':
+            observe('http_request_duration_seconds', time.perf_counter() - start,
+                    help='Duration of the HTTP requests, in seconds.',
+                    app=app_name, route=request.url_rule.rule if request.url_rule else 'unmatched',
+                    method=request.method, status=response.status_code)
+        return response
+
+    @app.route('/metrics', methods=['GET'], endpoint='metrics')
+    def serve_metrics():
+        return Response(render(), mimetype='text/plain; version=0.0.4')
+
+
+'''
+    All the metrics, in Prometheus text format.
+'''
+def render():
+    lines = []
+    with _lock:
+        histograms = {name: (help, {key: list(values) for key, values in series.items()})
+                      for name, (help, series) in _histograms.items()}
+        counters = {name: (help, dict(series)) for name, (help, series) in _counters.items()}
+        gauges = dict(_gauges)
+
+    for name, (help, series) in sorted(histograms.items()):
+        lines.append(f'# HELP {name} {help}')
+        lines.append(f'# TYPE {name} histogram')
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, values):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(key, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(key, [("le", "+Inf")])} {values[-2]}')
+            lines.append(f'{name}_count{_format_labels(key)} {values[-2]}')
+            lines.append(f'{name}_sum{_format_labels(key)} {_number(values[-1])}')
+
+    for name, (help, series) in sorted(counters.items()):
+        lines.append(f'# HELP {name} {help}')
+        lines.append(f'# TYPE {name} counter')
+        for key, value in sorted(series.items()):
+            lines.append(f'{name}{_format_labels(key)} {_number(value)}')
+
+    for name, (help, function, label_name) in sorted(gauges.items()):
+        try:
+            value = function()
+        except Exception as e:
+            print(f"Unable to read gauge {name}: {e}")
+            continue
+        lines.append(f'# HELP {name} {help}')
+        lines.append(f'# TYPE {name} gauge')
+        if isinstance(value, dict):
+            for label, number in sorted(value.items()):
+                lines.append(f'{name}{_format_labels([(label_name, label)])} {_number(number)}')
+        else:
+            lines.append(f'{name} {_number(value)}')
+
+    return '\n'.join(lines) + '\n'
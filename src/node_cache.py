@@ -0,0 +1,83 @@
+import copy
+import threading
+import time
+
+
+'''
+    Round-aware cache of the node status and of the suggested transaction parameters.
+    Values are refreshed at most once per round: when the time-to-live expires
+    or when a newer round has been observed (see observe_round).
+    Concurrent callers share a single fetch: while one thread queries the node,
+    the others wait on the lock and then read the fresh value.
+'''
+class NodeStateCache:
+
+    def __init__(self, get_client, ttl=3.0):
+        # get_client returns the algod client to query, resolved at fetch time
+        self.get_client = get_client
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._status = None
+        self._status_fetched_at = 0.0
+        self._params = None
+        self._params_fetched_at = 0.0
+        self._known_round = 0
+        self.stats = {'status_fetches': 0, 'params_fetches': 0, 'hits': 0}
+
+
+    def _is_fresh(self, fetched_at, fetched_round):
+        if time.monotonic() - fetched_at > self.ttl:
+            return False
+        # a newer round has been observed since the fetch
+        return fetched_round >= self._known_round
+
+
+    # Node status, as returned by algod_client.status()
+
+    def status(self):
+        with self._lock:
+            if self._status is not None and self._is_fresh(self._status_fetched_at, self._status.get('last-round', 0)):
+                self.stats['hits'] += 1
+                return self._status
+
+            self._status = self.get_client().status()
+            self._status_fetched_at = time.monotonic()
+            self._known_round = max(self._known_round, self._status.get('last-round', 0))
+            self.stats['status_fetches'] += 1
+            return self._status
+
+
+    # Suggested parameters, as returned by algod_client.suggested_params().
+    # Each caller gets its own copy, so that it can change fee or rounds safely.
+
+    def suggested_params(self):
+        with self._lock:
+            if self._params is None or not self._is_fresh(self._params_fetched_at, self._params.first):
+                self._params = self.get_client().suggested_params()
+                self._params_fetched_at = time.monotonic()
+                self._known_round = max(self._known_round, self._params.first)
+                self.stats['params_fetches'] += 1
+            else:
+                self.stats['hits'] += 1
+            return copy.copy(self._params)
+
+
+    # Record a round seen elsewhere (e.g. a confirmation): cached values of older rounds expire
+
+    def observe_round(self, round_number):
+        with self._lock:
+            if round_number and round_number > self._known_round:
+                self._known_round = round_number
+
+
+    # Most recent round known, from fetches or observations
+
+    def known_round(self):
+        with self._lock:
+            return self._known_round
+
+
+    def invalidate(self):
+        with self._lock:
+            self._status = None
+            self._params = None
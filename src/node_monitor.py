@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+
+
+'''
+    Raised when a transaction is refused because the node is out of sync.
+'''
+class NodeNotSyncedError(RuntimeError):
+    pass
+
+
+'''
+    Background monitor of the algod node health.
+    A thread queries the node status every interval seconds and publishes, in memory:
+    - 'last_round', 'catchup_time' and 'last_round_at' (time.time() of the start of the last round),
+    - 'round_time': average duration of a round, in seconds,
+    - 'synced': the node answers and is not catching up
+      (and, if stall_after is set, its last round started less than stall_after seconds ago),
+    - 'reason' why it is not synced, and 'checked_at' (time.time() of the last status).
+    Request handlers read the published health without querying the node: a dictionary lookup.
+    With several nodes (see algod_pool.py), the monitor also checks the health of each node of the pool,
+    and the status comes from a healthy node.
+'''
+class NodeMonitor:
+
+    def __init__(self, get_client, interval=1.0, stall_after=None, on_round=None):
+        # get_client returns the algod client to query, resolved at every check
+        self.get_client = get_client
+        self.interval = interval
+        # a node without new round for stall_after seconds is out of sync; None: not checked,
+        # as a dev mode node (e.g. the sandbox) only makes a block when transactions arrive
+        self.stall_after = stall_after
+        # health older than max_age seconds is not trusted: the monitor is stuck on the node
+        self.max_age = max(5.0, 5 * interval)
+        # on_round(round_number) is called for every new round observed
+        self.on_round = on_round
+        self._health = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.stats = {'checks': 0, 'errors': 0}
+
+
+    # Start the monitor thread of this process, if not running
+
+    def start(self):
+        with self._lock:
+            # a thread does not survive a fork: a worker process forked from a preloaded app starts its own
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='node-monitor', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(self.interval)
+
+
+    # Query the node status once and publish the node health
+
+    def check(self):
+        previous = self._health or {'last_round': None, 'catchup_time': None, 'last_round_at': None, 'round_time': None}
+        try:
+            client = self.get_client()
+            # a pool of nodes (see algod_pool.py) checks the health of each of its nodes
+            check_nodes = getattr(client, 'check', None)
+            if callable(check_nodes):
+                check_nodes()
+            status = client.status()
+        except Exception as e:
+            self.stats['errors'] += 1
+            if previous.get('error') is None:
+                print(f"Node monitor: node not answering: {e}")
+            self._health = dict(previous, synced=False, reason='node not answering', error=str(e), checked_at=time.time())
+            return self._health
+
+        now = time.time()
+        self.stats['checks'] += 1
+        last_round = status.get('last-round', 0)
+        catchup_time = status.get('catchup-time', 0)
+        # time-since-last-round is in nanoseconds
+        last_round_at = now - status.get('time-since-last-round', 0) / 1e9
+        round_time = previous.get('round_time')
+        if previous.get('last_round') and last_round > previous['last_round']:
+            duration = (last_round_at - previous['last_round_at']) / (last_round - previous['last_round'])
+            # moving average over the last rounds
+            round_time = duration if round_time is None else 0.8 * round_time + 0.2 * duration
+        elif previous.get('last_round') == last_round:
+            last_round_at = previous['last_round_at']
+
+        reason = None
+        if catchup_time:
+            reason = 'node catching up'
+        elif self.stall_after is not None and now - last_round_at > self.stall_after:
+            reason = f'no new round for {now - last_round_at:.0f} seconds'
+        self._health = {'last_round': last_round, 'catchup_time': catchup_time, 'last_round_at': last_round_at,
+                        'round_time': round_time, 'synced': reason is None, 'reason': reason,
+                        'error': None, 'checked_at': now}
+
+        if self.on_round and last_round != previous.get('last_round'):
+            self.on_round(last_round)
+        return self._health
+
+
+    '''
+        Health last published, as a dictionary. None if the monitor is not running or has no status yet.
+        Health older than max_age seconds is reported as not synced.
+    '''
+    def health(self):
+        health = self._health
+        if health is None or not self.running():
+            return None
+        if time.time() - health['checked_at'] > self.max_age:
+            return dict(health, synced=False, reason='no recent node status')
+        return health
+
+
+    '''
+        Raise NodeNotSyncedError if the monitor reports the node out of sync.
+        Returns the health, or None if unknown (monitor not running).
+    '''
+    def require_synced(self):
+        health = self.health()
+        if health is not None and not health['synced']:
+            raise NodeNotSyncedError(f"Node out of sync ({health['reason']}), try again later.")
+        return health
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+import message_store
+import sms_dispatcher
+
+
+# Outbox of the SMS notifications, in the message store database.
+# A notification is recorded in the same transaction as the change it reports (e.g. the token of a message
+# being consumed), and delivered later by a background dispatcher, with retries: requests don't wait for
+# Vonage, and notifications not yet delivered survive a restart.
+# Notifications are delivered at least once: the dispatcher claims due notifications for CLAIM_TIMEOUT seconds,
+# so a notification claimed by a process that stopped before delivering it is sent again later.
+SENDER = "Vonage APIs"
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 8
+RETRY_BASE = 5.0
+RETRY_MAX = 3600.0
+CLAIM_TIMEOUT = 120.0
+POLL_INTERVAL = 1.0
+
+_condition = threading.Condition()
+_worker = None
+_worker_pid = None
+stats = {'sent': 0, 'retried': 0, 'failed': 0}
+
+
+'''
+    Record a notification to send to receiver. With consume_message_id, the token of that message
+    is erased in the same transaction. Returns the ID of the notification.
+'''
+def add(receiver, text, consume_message_id=None):
+    conn = message_store.connection()
+    now = time.time()
+    with conn:
+        if consume_message_id:
+            message_store.consume_message(consume_message_id, conn)
+        cursor = conn.execute(
+            'INSERT INTO outbox (sender, receiver, text, created_at, next_attempt_at) VALUES (?, ?, ?, ?, ?)',
+            (SENDER, receiver, text, now, now))
+    start()
+    with _condition:
+        _condition.notify_all()
+    return cursor.lastrowid
+
+
+'''
+    Start the background dispatcher of this process, if not running.
+    The dispatcher first delivers the notifications left by a previous run.
+'''
+def start():
+    global _worker, _worker_pid
+    with _condition:
+        # a thread does not survive a fork: a worker process forked from a preloaded app starts its own
+        if _worker is not None and _worker.is_alive() and _worker_pid == os.getpid():
+            return
+        _worker = threading.Thread(target=_run, name='notification-outbox', daemon=True)
+        _worker_pid = os.getpid()
+        _worker.start()
+
+
+# Claim the due notifications: they are not due again before CLAIM_TIMEOUT seconds
+
+def _claim():
+    conn = message_store.connection()
+    now = time.time()
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        rows = conn.execute(
+            "SELECT * FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+            (now, BATCH_SIZE)).fetchall()
+        conn.executemany('UPDATE outbox SET next_attempt_at = ? WHERE id = ?',
+                         [(now + CLAIM_TIMEOUT, row['id']) for row in rows])
+    return rows
+
+
+def _retry_delay(attempts):
+    return min(RETRY_MAX, RETRY_BASE * 2 ** (attempts - 1))
+
+
+'''
+    Deliver the due notifications. Returns the number of notifications processed.
+'''
+def deliver_due():
+    rows = _claim()
+    if not rows:
+        return 0
+
+    # send them all concurrently through the SMS dispatcher, which retries transient errors itself
+    sent = [(row, sms_dispatcher.send(row['sender'], row['receiver'], row['text'])) for row in rows]
+    updates = []
+    now = time.time()
+    for row, future in sent:
+        try:
+            success = future.result()
+            error = None if success else 'SMS sending failed'
+        except Exception as e:
+            success, error = False, str(e)
+        attempts = row['attempts'] + 1
+        if success:
+            updates.append(('sent', attempts, row['next_attempt_at'], None, row['id']))
+            stats['sent'] += 1
+        elif attempts >= MAX_ATTEMPTS:
+            updates.append(('failed', attempts, row['next_attempt_at'], error, row['id']))
+            stats['failed'] += 1
+            print(f"Notification {row['id']} to {row['receiver']} failed after {attempts} attempts: {error}")
+        else:
+            updates.append(('pending', attempts, now + _retry_delay(attempts), error, row['id']))
+            stats['retried'] += 1
+
+    conn = message_store.connection()
+    with conn:
+        conn.executemany('UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, error = ? WHERE id = ?', updates)
+    return len(rows)
+
+
+def _run():
+    while True:
+        try:
+            if deliver_due():
+                continue
+        except Exception as e:
+            print(f"An error occurred while delivering notifications: {e}")
+        with _condition:
+            _condition.wait(POLL_INTERVAL)
+
+
+'''
+    Number of notifications by status ('pending', 'sent', 'failed').
+'''
+def counts():
+    rows = message_store.connection().execute('SELECT status, COUNT(*) AS n FROM outbox GROUP BY status').fetchall()
+    return {row['status']: row['n'] for row in rows}
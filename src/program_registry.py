@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+from algosdk import encoding, logic
+
+
+# Registry of the compiled programs issued by the system, keyed by program hash
+# (the 32 bytes behind the program's contract address, as returned by algod_client.compile).
+# Tokens carry a short reference to the program, the first REF_SIZE bytes of its hash, instead of the bytecode.
+# Programs are kept in memory and in one file per program on disk, next to a file with the
+# constraints extracted from their TEAL source (see teal_constraints), when known.
+# A reference missing from memory is looked up on disk, where other processes register their programs.
+registry_dir = 'data/programs'
+REF_SIZE = 8
+_programs = None
+_constraints = {}
+_lock = threading.Lock()
+
+
+'''
+    Hash of a program: the public key of its contract address.
+'''
+def program_hash(program_bytes):
+    return encoding.decode_address(logic.address(program_bytes))
+
+
+def _load():
+    global _programs
+    if _programs is not None:
+        return _programs
+    programs = {}
+    if os.path.isdir(registry_dir):
+        for filename in os.listdir(registry_dir):
+            if filename.endswith('.bin'):
+                _read(filename, programs)
+    _programs = programs
+    return _programs
+
+
+# Read a program file of the registry, and its constraints, into programs
+
+def _read(filename, programs):
+    with open(os.path.join(registry_dir, filename), 'rb') as f:
+        program_bytes = f.read()
+    ref = program_hash(program_bytes)[:REF_SIZE]
+    programs[ref] = program_bytes
+    constraints_path = os.path.join(registry_dir, filename[:-len('.bin')] + '.json')
+    if os.path.exists(constraints_path):
+        with open(constraints_path, 'r') as f:
+            _constraints[ref] = [tuple(constraint) for constraint in json.load(f)]
+    return program_bytes
+
+
+# Program bytes of a reference: from memory, or else from disk, where another process
+# (e.g. another UI worker) may have registered it since; then kept in memory
+
+def _get(ref):
+    programs = _load()
+    if ref in programs:
+        return programs[ref]
+    # program files are named after the full hash, which starts with the reference
+    prefix = ref.hex()
+    try:
+        filenames = [filename for filename in os.listdir(registry_dir)
+                     if filename.startswith(prefix) and filename.endswith('.bin')]
+    except OSError:
+        return None
+    for filename in filenames:
+        try:
+            return _read(filename, programs)
+        except OSError:
+            continue
+    return None
+
+
+'''
+    Register a program, with the constraints extracted from its source if given.
+    Returns its reference, or None if another registered program has the same reference
+    (tokens then keep embedding the bytecode).
+'''
+def register(program_bytes, constraints=None):
+    full_hash = program_hash(program_bytes)
+    ref = full_hash[:REF_SIZE]
+    with _lock:
+        programs = _load()
+        registered = _get(ref)
+        if registered is not None and registered != program_bytes:
+            return None
+        is_new = registered is None
+        programs[ref] = program_bytes
+        if constraints is not None:
+            constraints = [tuple(constraint) for constraint in constraints]
+            new_constraints = _constraints.get(ref) != constraints
+            _constraints[ref] = constraints
+        try:
+            os.makedirs(registry_dir, exist_ok=True)
+            if is_new:
+                _write(full_hash.hex() + '.bin', program_bytes)
+            if constraints is not None and new_constraints:
+                _write(full_hash.hex() + '.json', json.dumps(constraints).encode())
+        except OSError as e:
+            print(f"Unable to persist program {logic.address(program_bytes)}: {e}")
+        return ref
+
+
+# Write a file of the registry: to a temporary file first, then renamed
+
+def _write(filename, data):
+    tmp_path = os.path.join(registry_dir, filename + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, os.path.join(registry_dir, filename))
+
+
+'''
+    Constraints of a registered program, or None if unknown.
+'''
+def constraints_of(program_bytes):
+    ref = program_hash(program_bytes)[:REF_SIZE]
+    with _lock:
+        if _get(ref) != program_bytes:
+            return None
+        return _constraints.get(ref)
+
+
+'''
+    Reference of a registered program, or None if the program is not registered.
+'''
+def reference_of(program_bytes):
+    ref = program_hash(program_bytes)[:REF_SIZE]
+    with _lock:
+        return ref if _get(ref) == program_bytes else None
+
+
+'''
+    Program bytes of a reference, or None if unknown.
+'''
+def lookup(ref):
+    with _lock:
+        return _get(ref)
+
+
+# Forget the programs loaded in memory, e.g. after changing registry_dir
+
+def reset():
+    global _programs
+    with _lock:
+        _programs = None
+        _constraints.clear()
@@ -0,0 +1,105 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Token redemptions submitted in asynchronous mode.
+# The transaction is sent within the request; its confirmation is followed by the confirmation tracker
+# (a Future per transaction, without a thread per pending redemption), while clients poll (or long-poll)
+# the redemption status by its ID. The work after a confirmation (notification, ...) runs on a small pool.
+executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='redemption')
+max_records = 10000
+_redemptions = {}
+_condition = threading.Condition()
+
+
+'''
+    Start tracking a submitted transaction.
+    confirmation is a Future of the transaction (see ConfirmationTracker.track), resolved with its info
+    or failed if it is rejected or times out.
+    on_confirmed(record), if given, runs in the background pool after confirmation.
+    Returns the redemption ID.
+'''
+def start(txid, confirmation, on_confirmed=None):
+    redemption_id = uuid.uuid4().hex
+    record = {
+        'redemption_id': redemption_id,
+        'txid': txid,
+        'status': 'pending',
+        'confirmed_round': None,
+        'error': None,
+        'submitted_at': time.time(),
+    }
+    with _condition:
+        _redemptions[redemption_id] = record
+        _prune()
+
+    confirmation.add_done_callback(lambda future: _done(redemption_id, future, on_confirmed))
+    return redemption_id
+
+
+# Record the outcome of a confirmation, in the thread resolving it: the rest is left to the pool
+
+def _done(redemption_id, future, on_confirmed):
+    error = future.exception()
+    if error is not None:
+        print(f"Redemption {redemption_id} failed: {error}")
+        _update(redemption_id, status='failed', error=str(error))
+        return
+    _update(redemption_id, status='confirmed', confirmed_round=future.result().get('confirmed-round'))
+    if on_confirmed:
+        executor.submit(_after_confirmation, redemption_id, on_confirmed)
+
+
+def _after_confirmation(redemption_id, on_confirmed):
+    try:
+        on_confirmed(get(redemption_id))
+    except Exception as e:
+        print(f"An error occurred after confirmation of redemption {redemption_id}: {e}")
+
+
+def _update(redemption_id, **fields):
+    with _condition:
+        record = _redemptions.get(redemption_id)
+        if record is not None:
+            record.update(fields)
+        _condition.notify_all()
+
+
+# Drop the oldest completed records above max_records
+
+def _prune():
+    if len(_redemptions) <= max_records:
+        return
+    completed = [r for r in _redemptions.values() if r['status'] != 'pending']
+    completed.sort(key=lambda r: r['submitted_at'])
+    for record in completed[:len(_redemptions) - max_records]:
+        del _redemptions[record['redemption_id']]
+
+
+'''
+    Return a copy of the redemption record, or None if unknown.
+'''
+def get(redemption_id):
+    with _condition:
+        record = _redemptions.get(redemption_id)
+        return dict(record) if record else None
+
+
+'''
+    Wait up to timeout seconds for the redemption to leave the 'pending' status.
+    Returns a copy of the record (still pending if the timeout expired), or None if unknown.
+'''
+def wait(redemption_id, timeout):
+    deadline = time.monotonic() + timeout
+    with _condition:
+        while True:
+            record = _redemptions.get(redemption_id)
+            if record is None or record['status'] != 'pending':
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            _condition.wait(remaining)
+        return dict(record) if record else None
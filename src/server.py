@@ -1,10 +1,20 @@
-import json
+import os
+import signal
 from multiprocessing import Process
-from flask import Flask, render_template, request, session, jsonify
+from flask import Flask, Response, render_template, request, session, jsonify, stream_with_context
 import werkzeug
 import core
 import sms_utils
-import base64
+import sms_dispatcher
+import sms_concat
+import session_store
+import serving
+import metrics
+import redemptions
+import account_store
+import message_store
+import notification_outbox
+import sms_ingest
 from algosdk.transaction import LogicSigAccount
 
 
@@ -28,6 +38,28 @@ flask_app.config.update({
 with open('config/secret_key', 'rb') as f:
     flask_app.secret_key = f.read()
 
+# Keep session data on the server (see session_store): the cookie only carries the signed session ID
+flask_app.session_interface = session_store.ServerSideSessionInterface()
+
+
+# Latency of the routes and of the stages of the system, served in Prometheus text format at /metrics on both apps.
+# Each app runs in its own process and serves its own metrics.
+metrics.instrument(flask_app, 'ui')
+metrics.instrument(app_sms, 'sms')
+metrics.gauge('algod_http_connections', core.algod_connection_stats, 'Requests to algod, connections opened and requests on a reused connection.', 'kind')
+metrics.gauge('algod_node_round', lambda: {address: node['last_round'] for address, node in core.algod_nodes_status().items()}, 'Last round of each algod node.', 'address')
+metrics.gauge('algod_node_healthy', lambda: {address: int(node['healthy']) for address, node in core.algod_nodes_status().items()}, 'Algod nodes receiving requests (1) or left out (0).', 'address')
+metrics.gauge('algod_node_health', core.node_health_metrics, 'Health of the node published by the node monitor (UI app).', 'value')
+metrics.gauge('compile_cache_events', lambda: dict(core.compile_cache.stats), 'Compiled TEAL cache lookups, by outcome.', 'outcome')
+metrics.gauge('confirmations_pending', lambda: core.confirmation_tracker.pending_count(), 'Transactions waiting for confirmation.')
+metrics.gauge('leases_active', lambda: len(core.lease_index), 'Leases of the local lease index still valid.')
+metrics.gauge('sessions_active', lambda: len(flask_app.session_interface.store), 'Server-side sessions in memory.')
+metrics.gauge('sms_dispatcher_events', lambda: dict(sms_dispatcher.stats), 'Outgoing SMS, by outcome.', 'outcome')
+metrics.gauge('sms_ingest_events', lambda: dict(sms_ingest.stats), 'Inbound SMS ingestion, by outcome.', 'outcome')
+metrics.gauge('sms_ingest_queue_depth', sms_ingest.depth, 'Inbound SMS waiting to be saved.')
+metrics.gauge('sms_incomplete_texts', lambda: sms_utils.reassembly.pending_count(), 'Long texts waiting for some of their parts.')
+metrics.gauge('notification_outbox', notification_outbox.counts, 'Notifications of the outbox, by status.', 'status')
+
 
 '''
     Allow only files with .teal extension.
@@ -58,17 +90,9 @@ def generate_account():
         if request.method == 'GET' or request.method == 'POST':
             account_info = core.generate_account()
             new_address = account_info['address']
-            new_private_key = account_info['private_key']
-            new_mnemonic = account_info['mnemonic']
-
-            accounts_file_path = 'data/generated_accounts.txt'
 
             # The account information of the newly generated account will be saved in the 'generated_accounts.txt' file.
-            with open(accounts_file_path, 'a') as file:
-                file.write(f"Address: {new_address}\n")
-                file.write(f"Private Key: {new_private_key}\n")
-                file.write(f"Mnemonic: {new_mnemonic}\n")
-                file.write("----------\n")
+            account_store.append_accounts([account_info])
             
             return jsonify({'new_account_address': new_address}), 200
         
@@ -77,6 +101,45 @@ def generate_account():
 
 
 
+# Maximum number of accounts generated in one bulk request, and accounts written to the store per write
+MAX_BULK_ACCOUNTS = 100000
+BULK_WRITE_SIZE = 1000
+
+'''
+    Generate many accounts at once, across a pool of processes.
+    Request format: "count" (and optionally "processes", at most the number of CPUs) as JSON or form fields.
+    The new addresses are streamed back as plain text, one per line, while the accounts are
+    written to the account store in large buffered writes.
+'''
+@flask_app.route('/generate_accounts', methods=['POST'])
+def generate_accounts():
+    data = request.get_json(silent=True) or request.form
+    try:
+        count = int(data.get('count', 0))
+        processes = int(data['processes']) if data.get('processes') not in (None, '') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid count or processes', 'success': False}), 400
+    if count <= 0 or count > MAX_BULK_ACCOUNTS:
+        return jsonify({'error': f'Count must be between 1 and {MAX_BULK_ACCOUNTS}', 'success': False}), 400
+    max_processes = os.cpu_count() or 1
+    if processes is not None and not 1 <= processes <= max_processes:
+        return jsonify({'error': f'Processes must be between 1 and {max_processes}', 'success': False}), 400
+
+    def stream_addresses():
+        buffer = []
+        for account_info in core.generate_accounts(count, processes=processes):
+            buffer.append(account_info)
+            if len(buffer) >= BULK_WRITE_SIZE:
+                account_store.append_accounts(buffer)
+                yield ''.join(f"{a['address']}\n" for a in buffer)
+                buffer = []
+        account_store.append_accounts(buffer)
+        yield ''.join(f"{a['address']}\n" for a in buffer)
+
+    return Response(stream_with_context(stream_addresses()), mimetype='text/plain')
+
+
+
 '''
     Given an Algorand account address, fetch its information.
 '''
@@ -123,14 +186,8 @@ def generate_logic_signature():
         if not lsig:
                 raise ValueError("Failed to generate Logic Signature due to invalid TEAL code.")
 
-        # convert lsig in a string such that it can be saved in session data.
-        # dictify the lsig object to have access to specific parts of it.
-        dictifiedLsig = lsig.dictify()
-        # extract the logic part of the lsig ('l'), representing the teal program in bytes.
-        teal_program_bytes = dictifiedLsig['lsig']['l']
-        # encode teal bytes into a base64 bytes object. Then, decode base64 bytes object into a UTF-8 string.
-        serialized_lsig = base64.b64encode(teal_program_bytes).decode('utf-8')
-        session['lsig'] = serialized_lsig
+        # save the lsig object in session data, kept on the server
+        session['lsig'] = lsig
 
         return jsonify({'message': 'Logic Signature generated successfully!', 'success': True})
     
@@ -152,19 +209,15 @@ def sign_logic_signature():
     if 'lsig' not in session:
         return jsonify({'message': 'Logic Signature not found.', 'success': False}), 400
 
-    # get lsig string from session
-    serialized_lsig = session['lsig']
-    # decode in base64
-    lsig_logic = base64.b64decode(serialized_lsig)
-    # recreate the lsig object
-    lsig = core.LogicSigAccount(lsig_logic)
+    # get lsig object from session, and sign a new lsig of the same program: the one in session stays unsigned
+    lsig = core.LogicSigAccount(session['lsig'].lsig.logic)
     
     if private_key:
         try:
             # sign lsig
             lsig = core.sign_lsig(lsig, private_key)
             # encode it such that it can be sent via text message
-            final_lsig = core.lsig_to_sms_text(lsig)
+            final_lsig = core.lsig_to_sms_text(lsig, compact=True)
             
             return jsonify({'message': 'Logic signature signed successfully!', 'success': True, 'final_lsig': final_lsig,}), 200
         
@@ -221,13 +274,16 @@ def send_sms_endpoint():
         sender_number = "Vonage APIs"
         receiver_number = data.get('receiver_number')
 
-        # send first message with a predefined text
+        # send the message with a predefined text and the message with the text received from the client (the lsig).
+        # They are independent messages, sent concurrently: the carrier does not guarantee their order of arrival anyway
         automatic_text = "This message represents your Token. Forward it to redeem it."
-        success_predefined = core.send_SMS(sender_number, receiver_number, automatic_text)
-
-        # send second message with the text received from the client (the lsig)
         client_text = data.get('text')
-        success_client_text = core.send_SMS(sender_number, receiver_number, client_text)
+        # A long client text is split in single-segment parts, reassembled on reception whatever their order.
+        predefined_sent = sms_dispatcher.send(sender_number, receiver_number, automatic_text, ordered=False)
+        client_text_sent = [sms_dispatcher.send(sender_number, receiver_number, part, ordered=False)
+                            for part in sms_concat.split(client_text)]
+        success_predefined = predefined_sent.result()
+        success_client_text = all([sent.result() for sent in client_text_sent])
 
         # check whether both messages were successfully sent
         if success_predefined and success_client_text:
@@ -248,7 +304,7 @@ def send_sms_endpoint():
 
 '''
     Receive SMS text. It defines a route to receive SMS messages via a webhook.
-    When a message is received, it is saved in a json file.
+    When a message is received, it is saved in the message store (by default queued and saved in the background).
     
     Arguments format:
     "from": "Vonage APIs",
@@ -264,18 +320,40 @@ def receive_sms():
 
 
 '''
-    Fetch SMS info from the file where the info were saved. 
+    Status of the inbound SMS ingestion queue: queue depth, messages queued, saved, dropped and failed,
+    and number of long texts waiting for some of their parts.
+'''
+@app_sms.route('/webhooks/stats', methods=['GET'])
+def sms_ingest_stats():
+    return jsonify(dict(sms_ingest.status(), incomplete_texts=sms_utils.reassembly.pending_count())), 200
+
+
+
+'''
+    Fetch the most recent SMS of the expected sender from the message store.
+    Request format: "sender" (the phone number the token is sent from), or "receiver" (the number it is sent to),
+    as query parameters.
+    Its message ID is saved in session data, such that the following steps work on this message
+    even when other messages are received in the meantime.
 '''
 @flask_app.route('/fetch_sms_data', methods=['GET'])
 def fetch_sms_data():
+    # phone numbers are stored as digits only, e.g. 447566223444
+    sender = ''.join(c for c in request.args.get('sender', '') if c.isdigit())
+    receiver = ''.join(c for c in request.args.get('receiver', '') if c.isdigit())
+    if not sender and not receiver:
+        return jsonify({'message': "The sender's phone number must be provided.", 'success': False}), 400
+
     session.pop('lsig', None)
     session.pop('decoded_lsig', None)
-    message_text, sender_number, receiver_number, timestamp = core.get_data_from_file()
+    message_text, sender_number, receiver_number, timestamp, message_id = core.get_sms_data(sender=sender, receiver=receiver)
+    session['message_id'] = message_id
     return jsonify({
         'message_text': message_text,
         'sender_number': sender_number,
         'receiver_number': receiver_number,
-        'timestamp': timestamp
+        'timestamp': timestamp,
+        'message_id': message_id
     })
 
 
@@ -302,15 +380,16 @@ def parse_sms_data(text_message):
 
 '''
     Decode LogicSignature from a SMS text string back into a LogicSig object.
-    Fetch the encoded lsig from the file where the received SMS has been saved, 
+    Fetch the encoded lsig from the message store (the message fetched in this session),
     then decode it into an object.
 '''
 @flask_app.route('/decode_lsig', methods=['GET'])
 def decode_lsig():
-    # read the text message stored in the data.json file
-    with open('tmp/received_sms_data.json', 'r') as f:
-        data = json.load(f)
-        text_message = data.get('text', '')
+    # read the text message from the message store
+    text_message, sender_number, receiver_number, timestamp, message_id = core.get_sms_data(session.get('message_id'))
+    session['message_id'] = message_id
+    # the sender of the token is notified once the token is used
+    session['lsig_sender'] = sender_number
     
     # parse amount, address and token from received sms
     amount, address, token = parse_sms_data(text_message)
@@ -320,8 +399,8 @@ def decode_lsig():
         # decode from sms text back to lsig object
         lsig_obj = core.sms_text_to_lsig(token)
         if isinstance(lsig_obj, LogicSigAccount):
-            # convert it from obj to string to be saved in session
-            session['decoded_lsig'] = core.serialize_logic_sig(lsig_obj)
+            # save the lsig object in session data, kept on the server
+            session['decoded_lsig'] = lsig_obj
             return jsonify({'message': 'Successful decoding, ready to be used for transaction', 'success': True, 'amount': amount, 'address': address}), 200
         else:
             return jsonify({'message': 'Decoding failed or returned an unexpected object type', 'success': False}), 500
@@ -334,6 +413,8 @@ def decode_lsig():
     Create a transaction with the parameters specified by the user and the LogicSig saved in the session.
     The method will also check if the transaction parameters respect the conditions 
     specified in the .teal contract embedded in the lsig.
+    With "async": true in the request, the method returns a redemption ID right after the transaction is sent:
+    its confirmation is tracked in the background and can be polled at /redemption_status/<redemption_id>.
 '''
 @flask_app.route('/create_transaction', methods=['POST'])
 def create_transaction():
@@ -341,6 +422,8 @@ def create_transaction():
     senders_address = data.get('sender_address')
     receivers_address = data.get('receiver_address')
     amount = data.get('amount')
+    # only JSON true: a string such as "false" is not asynchronous mode
+    async_mode = data.get('async') is True
     token = session.get('token')
 
     if not senders_address or not receivers_address or not amount:
@@ -348,21 +431,27 @@ def create_transaction():
 
     if 'decoded_lsig' not in session:
         return jsonify({'message': 'Decoded LogicSig not found.', 'success': False}), 400
-    logic_sig = session.get('decoded_lsig')
-    logic_sig_obj = core.deserialize_logic_sig(logic_sig)
+    logic_sig_obj = session.get('decoded_lsig')
 
     try:
         if 'decoded_lsig' in session:
+            if async_mode:
+                txid = core.submit_lsig_transaction(senders_address, receivers_address, amount, logic_sig_obj, token)
+                # the token has been spent: remove it from the session now, the rest happens after confirmation
+                session.pop('decoded_lsig', None)
+                lsig_sender, message_id = session.get('lsig_sender'), session.get('message_id')
+                def on_confirmed(record):
+                    core.lsig_transaction_confirmed(record['confirmed_round'], senders_address, receivers_address)
+                    notify_token_used(lsig_sender, message_id)
+                redemption_id = redemptions.start(txid, core.track_lsig_transaction(txid), on_confirmed=on_confirmed)
+                return jsonify({'message': 'Transaction submitted, waiting for confirmation.', 'success': True,
+                                'redemption_id': redemption_id, 'txid': txid}), 202
+
             transaction_response = core.construct_lsig_transaction(senders_address, receivers_address, amount, logic_sig_obj, token)
-            # send confirmation sms for confirming the successful execution of transaction.
-            t, lsig_sender, r, timest = core.get_data_from_file()
-            notification_receiver = lsig_sender
-            notification_sender = "Vonage APIs"
-            text="Your Token has been used to successfully execute a transaction!"
-
-            sms_utils.send_sms_text(notification_sender, notification_receiver, text)
-            # after the transaction, remove the decoded_lsig data from the session and from the json file
-            erase_token_data('tmp/received_sms_data.json')
+            # after the transaction, remove the decoded_lsig data from the session, then erase the token from
+            # the message store and record the confirmation sms in the outbox: it is sent in the background
+            session.pop('decoded_lsig', None)
+            notify_token_used(session.get('lsig_sender'), session.get('message_id'))
             return jsonify({'message': 'Transaction successfully created.', 'success': True})
     
     except Exception as e:
@@ -375,58 +464,148 @@ def create_transaction():
         # check if user is trying to reuse the token
         if 'overlapping lease' in error_message:
             return jsonify({'message': 'Failed Attempt to Reuse Token', 'success': False}), 400
+
+        # the node monitor reports the node out of sync: the token is kept, to be used later
+        if 'out of sync' in error_message:
+            return jsonify({'message': 'The Algorand node is out of sync, try again later.', 'success': False}), 503
         
         return jsonify({'message': "An unexpected error occurred. ", 'success': False}), 500
-    
 
 
+
+# Maximum number of tokens redeemed in one batch request
+MAX_BATCH_SIZE = 1000
+
 '''
-    After a transaction has been executed, erease the token from session data and from JSON file. 
+    Redeem many tokens in one call (e.g. at a merchant's end of day).
+    Request format:
+    "redemptions": [{"sender_address": ..., "receiver_address": ..., "amount": ..., "token": ...}, ...]
+    "atomic": optional, true to submit the transactions in atomic groups
+    The response reports the outcome of each token, in the order of the request.
 '''
-def erase_token_data(file_path):
-    session.pop('decoded_lsig', None)
+@flask_app.route('/create_transactions_batch', methods=['POST'])
+def create_transactions_batch():
+    data = request.json or {}
+    batch = data.get('redemptions')
+    atomic = data.get('atomic') is True
+
+    if not isinstance(batch, list) or not batch:
+        return jsonify({'message': 'A non-empty list of redemptions must be provided.', 'success': False}), 400
+    if len(batch) > MAX_BATCH_SIZE:
+        return jsonify({'message': f'At most {MAX_BATCH_SIZE} redemptions per batch.', 'success': False}), 400
+    if not all(isinstance(item, dict) for item in batch):
+        return jsonify({'message': 'Each redemption must be an object.', 'success': False}), 400
+
     try:
-        with open(file_path, 'r') as file:
-            data = json.load(file)
-        if 'text' in data:
-            data['text'] = ""
-        else:
-            print("The 'text' key does not exist in the JSON file.")
-        # clear token data in json file
-        with open(file_path, 'w') as file:
-            json.dump(data, file, indent=4)
-    
-    except FileNotFoundError:
-        print(f"The file {file_path} does not exist.")
-    
-    except json.JSONDecodeError:
-        print("Error decoding JSON. The file may be corrupted or incorrectly formatted.")
-    
+        results = core.construct_lsig_batch(batch, atomic=atomic)
+    except core.NodeNotSyncedError as e:
+        return jsonify({'message': f'Batch redemption failed: {str(e)}', 'success': False}), 503
     except Exception as e:
-        print(f"An error occurred: {str(e)}")
+        return jsonify({'message': f'Batch redemption failed: {str(e)}', 'success': False}), 500
+
+    for result in results:
+        if result['error']:
+            result['message'] = redemption_error_message(result['error'])
+    confirmed = sum(result['success'] for result in results)
+    return jsonify({'message': f'{confirmed} of {len(results)} transactions confirmed.',
+                    'success': confirmed == len(results), 'results': results}), 200
+
+
+'''
+    User-facing message for the error of a failed redemption.
+'''
+def redemption_error_message(error_message):
+    if 'rejected by logic' in error_message:
+        return 'Transaction parameters different from lsig conditions.'
+    if 'overlapping lease' in error_message:
+        return 'Failed Attempt to Reuse Token'
+    return error_message
+
+
+
+# Longest wait of a status request, in seconds
+MAX_STATUS_WAIT = 2
+
+'''
+    Status of a redemption submitted in asynchronous mode: 'pending', 'confirmed' or 'failed'.
+    With ?wait=<seconds> (at most MAX_STATUS_WAIT), the request waits for the status to change before answering:
+    the wait holds a server thread, so it is kept short and clients poll at an interval.
+'''
+@flask_app.route('/redemption_status/<redemption_id>', methods=['GET'])
+def redemption_status(redemption_id):
+    wait = min(request.args.get('wait', 0, type=float), MAX_STATUS_WAIT)
+    if wait > 0:
+        record = redemptions.wait(redemption_id, wait)
+    else:
+        record = redemptions.get(redemption_id)
+
+    if record is None:
+        return jsonify({'message': 'Redemption not found.', 'success': False}), 404
+    return jsonify({'success': record['status'] != 'failed', **record}), 200
+
+
+
+'''
+    After the confirmation of a redemption: erase the token from the message store and, in the same transaction,
+    record the SMS notifying the token's sender in the outbox, delivered in the background (see notification_outbox).
+'''
+def notify_token_used(lsig_sender, message_id):
+    text = "Your Token has been used to successfully execute a transaction!"
+    if lsig_sender:
+        notification_outbox.add(lsig_sender, text, consume_message_id=message_id)
+    elif message_id:
+        message_store.consume_message(message_id)
 
 
 
 ''' 
     Methods to run processes in parallel on port 5000 and port 3000.
 '''
+def start_app_ui():
+    notification_outbox.start()
+    core.node_monitor.start()
+
 def run_app_ui():
+    start_app_ui()
     flask_app.run(port=5000)
 
 def run_app_sms():
     app_sms.run(port=3000)
 
 
+'''
+    Production mode (SERVER_MODE=production): each app is served by gunicorn (see serving.py).
+    On shutdown, the workers finish the requests in progress, then the SMS queued to be sent
+    and the redemptions being tracked (UI), or the received SMS waiting to be saved (SMS app).
+    Notifications of the outbox not delivered yet are delivered after the restart.
+'''
+def drain_app_ui():
+    sms_dispatcher.executor.shutdown(wait=True)
+    redemptions.executor.shutdown(wait=True)
+
+def drain_app_sms():
+    sms_ingest.flush(timeout=serving.GRACEFUL_TIMEOUT)
+
+def serve_app_ui():
+    serving.serve(flask_app, serving.options('UI', '127.0.0.1:5000', on_start=start_app_ui, on_exit=drain_app_ui))
+
+def serve_app_sms():
+    serving.serve(app_sms, serving.options('SMS', '127.0.0.1:3000', on_exit=drain_app_sms))
+
+
 # start Flask apps
 if __name__ == '__main__':
     if not flask_app.config["TESTING"]:
+            production = os.getenv('SERVER_MODE', 'development') == 'production'
             # create processes for each Flask app
-            process_ui = Process(target=run_app_ui)
-            process_sms = Process(target=run_app_sms)
+            process_ui = Process(target=serve_app_ui if production else run_app_ui)
+            process_sms = Process(target=serve_app_sms if production else run_app_sms)
 
             # start each process
             process_ui.start()
             process_sms.start()
+            # on SIGTERM, stop the apps: in production mode, gunicorn drains them gracefully
+            signal.signal(signal.SIGTERM, lambda signum, frame: (process_ui.terminate(), process_sms.terminate()))
 
             try:
                 # join processes to the main process
@@ -435,4 +614,4 @@ if __name__ == '__main__':
             except KeyboardInterrupt:
                 print("   Keyboard interruption. Stopping processes...")
                 process_ui.terminate()
-                process_sms.terminate()
\ No newline at end of file
+                process_sms.terminate()
@@ -0,0 +1,70 @@
+import os
+
+# gunicorn is only needed in production mode
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    BaseApplication = None
+
+
+# Production serving of the Flask apps with gunicorn: worker processes with a pool of threads each,
+# application state loaded once before forking the workers, keep-alive connections,
+# and graceful draining of the requests in progress on shutdown (SIGTERM).
+# Settings of each app come from environment variables named after its prefix, e.g. UI_WORKERS, SMS_THREADS.
+# Note: server-side sessions, redemption records and the buffers of received SMS live in the memory
+# of a worker process, so the apps run one worker process by default and scale with threads.
+GRACEFUL_TIMEOUT = int(os.getenv('SERVER_GRACEFUL_TIMEOUT', '30'))
+
+
+'''
+    gunicorn options of an app.
+    on_start and on_exit run in each worker process, when it starts and when it stops.
+'''
+def options(prefix, bind, on_start=None, on_exit=None):
+    settings = {
+        'bind': os.getenv(f'{prefix}_BIND', bind),
+        'workers': int(os.getenv(f'{prefix}_WORKERS', '1')),
+        'threads': int(os.getenv(f'{prefix}_THREADS', '8')),
+        'worker_class': 'gthread',
+        'preload_app': True,
+        'keepalive': int(os.getenv('SERVER_KEEPALIVE', '5')),
+        'graceful_timeout': GRACEFUL_TIMEOUT,
+        'timeout': int(os.getenv('SERVER_TIMEOUT', '60')),
+        'proc_name': prefix.lower(),
+    }
+    if on_start is not None:
+        # start the background work of each worker process, once forked
+        settings['post_worker_init'] = lambda worker: on_start()
+    if on_exit is not None:
+        # drain the background work of the worker once it stops accepting requests
+        settings['worker_exit'] = lambda server, worker: on_exit()
+    return settings
+
+
+if BaseApplication is not None:
+
+    class StandaloneApplication(BaseApplication):
+
+        def __init__(self, app, settings):
+            self.application = app
+            self.settings = settings
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.settings.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+
+'''
+    Serve a Flask app with gunicorn, until the process is stopped.
+'''
+def serve(app, settings):
+    if BaseApplication is None:
+        raise RuntimeError("Production mode requires gunicorn: pip install gunicorn")
+    if settings['workers'] > 1:
+        print(f"Warning: {settings['proc_name']} runs {settings['workers']} worker processes: "
+              "in-memory state (sessions, redemptions) is not shared between them.")
+    StandaloneApplication(app, settings).run()
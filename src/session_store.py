@@ -0,0 +1,79 @@
+import secrets
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+from cache_utils import LRUCache
+
+
+# Server-side sessions: the session data is kept in memory, in a bounded LRU with a time-to-live,
+# and the cookie only carries the signed session ID. Values are stored as they are, without serialization,
+# so the session can hold objects such as LogicSigAccount.
+# Sessions live in the memory of the process serving the UI: all its requests must reach the same process.
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+'''
+    Flask session interface storing the sessions in memory.
+    Sessions expire after ttl seconds without requests; above maxsize sessions, the least recently used are dropped.
+'''
+class ServerSideSessionInterface(SessionInterface):
+
+    def __init__(self, maxsize=10000, ttl=3600):
+        self.store = LRUCache(maxsize=maxsize, ttl=ttl)
+
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt='server-side-session')
+
+
+    def open_session(self, app, request):
+        if not app.secret_key:
+            return None
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+            data = self.store.get(sid) if sid else None
+            if data is not None:
+                # each request works on its own copy of the data
+                return ServerSideSession(dict(data), sid=sid)
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if not session.new:
+                self.store.pop(session.sid)
+                if session.modified:
+                    response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        # storing the data again also renews its time-to-live
+        self.store.put(session.sid, dict(session))
+        if session.new or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid).decode(),
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
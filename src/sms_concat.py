@@ -0,0 +1,168 @@
+import random
+import re
+import time
+import lsig_codec
+import message_store
+
+
+# Segmentation of long texts (e.g. tokens) into SMS of a single segment each, and their reassembly on reception.
+# Each part starts with a sequence header: '(' + reference + ' ' + part number + '/' + number of parts + ')' + newline,
+# e.g. '(K3x 1/3)\n'. The reference, 3 characters of the GSM-7 basic alphabet, identifies the parts of a same text.
+# Parts may arrive in any order, and a late part completes its text as long as the other parts are still buffered.
+# Parts are kept in the message store, so they survive a restart and are shared by the worker processes.
+# Parts of a concatenated SMS split by the carrier (the 'concat' fields of the Vonage webhook) are reassembled too.
+REF_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+HEADER = re.compile(r'\s*\(([0-9A-Za-z]{3}) (\d{1,2})/(\d{1,2})\)\n')
+MAX_PARTS = 99
+# single SMS: 160 septets of GSM-7 text, or 70 characters of UCS-2 text
+GSM7_CAPACITY = 160
+UCS2_CAPACITY = 70
+
+
+def _is_gsm7(text):
+    return all(char in lsig_codec.GSM7_BASIC or char in lsig_codec.GSM7_EXTENSION for char in text)
+
+
+def _size(char, gsm7):
+    return 2 if gsm7 and char in lsig_codec.GSM7_EXTENSION else 1
+
+
+def new_reference():
+    return ''.join(random.choice(REF_ALPHABET) for _ in range(3))
+
+
+'''
+    Split text into SMS of a single segment each, with sequence headers.
+    Text fitting a single SMS is returned unchanged, as the only part.
+'''
+def split(text, ref=None):
+    if lsig_codec.sms_segments(text) == 1:
+        return [text]
+
+    gsm7 = _is_gsm7(text)
+    capacity = GSM7_CAPACITY if gsm7 else UCS2_CAPACITY
+    ref = ref or new_reference()
+    # header of the largest size: '(' + ref + ' 99/99)\n'
+    body_capacity = capacity - len(f"({ref} {MAX_PARTS}/{MAX_PARTS})\n")
+
+    bodies = []
+    body, size = [], 0
+    for char in text:
+        char_size = _size(char, gsm7)
+        if size + char_size > body_capacity:
+            bodies.append(''.join(body))
+            body, size = [], 0
+        body.append(char)
+        size += char_size
+    bodies.append(''.join(body))
+    if len(bodies) > MAX_PARTS:
+        raise ValueError(f"Text too long: more than {MAX_PARTS} SMS.")
+
+    return [f"({ref} {number}/{len(bodies)})\n{body}" for number, body in enumerate(bodies, 1)]
+
+
+'''
+    Sequence information of a received message: (reference, part number, number of parts, text of the part),
+    or None if the message is not a part.
+'''
+def parse_part(data):
+    text = data.get('text', '')
+    if str(data.get('concat', '')).lower() == 'true':
+        try:
+            return 'concat:' + str(data['concat-ref']), int(data['concat-part']), int(data['concat-total']), text
+        except (KeyError, ValueError):
+            return None
+
+    match = HEADER.match(text)
+    if match is None:
+        return None
+    number, total = int(match.group(2)), int(match.group(3))
+    if not 1 <= number <= total:
+        return None
+    return match.group(1), number, total, text[match.end():]
+
+
+'''
+    Buffer of the parts received, by sender and reference, in the message store (table message_parts).
+    Incomplete texts are dropped after timeout seconds without new parts,
+    or when more than maxsize texts are incomplete (least recently updated first).
+    The parts of a complete text are kept until release() is called, once the text has been saved.
+    If saving fails in 'sync' ingestion mode, the webhook of the part is retried and completes the text again;
+    in 'async' mode the webhook has been acknowledged, and the parts are kept until timeout.
+'''
+class ReassemblyBuffer:
+
+    def __init__(self, maxsize=1024, timeout=600):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.stats = {'parts': 0, 'completed': 0}
+
+
+    def _key(self, data, part):
+        return (data.get('from') or data.get('msisdn', ''), part[0], part[2])
+
+
+    # Drop the incomplete texts without new parts for timeout seconds
+
+    def _expire(self, conn):
+        conn.execute('DELETE FROM message_parts WHERE (sender, ref, total) IN ('
+                     'SELECT sender, ref, total FROM message_parts GROUP BY sender, ref, total HAVING MAX(received_at) < ?)',
+                     (time.time() - self.timeout,))
+
+
+    # Drop the least recently updated texts above maxsize
+
+    def _evict(self, conn):
+        conn.execute('DELETE FROM message_parts WHERE (sender, ref, total) IN ('
+                     'SELECT sender, ref, total FROM message_parts GROUP BY sender, ref, total '
+                     'ORDER BY MAX(received_at) DESC LIMIT -1 OFFSET ?)', (self.maxsize,))
+
+
+    # Add a received message. Returns the message to save: the message itself if it is not a part,
+    # the complete text (with the data of its last part) once all parts are received, otherwise None.
+    # The complete text has the message ID of its first part, so it is saved once whichever part completes it.
+
+    def add(self, data):
+        part = parse_part(data)
+        if part is None:
+            return data
+
+        sender, ref, total = key = self._key(data, part)
+        conn = message_store.connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            self._expire(conn)
+            conn.execute('INSERT OR REPLACE INTO message_parts (sender, ref, total, number, message_id, text, received_at) '
+                         'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         (sender, ref, total, part[1], message_store.to_record(data)['message_id'], part[3], time.time()))
+            self._evict(conn)
+            rows = conn.execute('SELECT number, message_id, text FROM message_parts '
+                                'WHERE sender = ? AND ref = ? AND total = ? ORDER BY number', key).fetchall()
+        self.stats['parts'] += 1
+        if len(rows) < total:
+            return None
+        self.stats['completed'] += 1
+
+        complete = dict(data)
+        complete['text'] = ''.join(row['text'] for row in rows)
+        complete.pop('message_uuid', None)
+        complete['messageId'] = rows[0]['message_id']
+        for field in ('concat', 'concat-ref', 'concat-part', 'concat-total'):
+            complete.pop(field, None)
+        return complete
+
+
+    # Forget the parts of the text completed by the part data, once the text has been saved (or queued)
+
+    def release(self, data):
+        part = parse_part(data)
+        if part is None:
+            return
+        conn = message_store.connection()
+        with conn:
+            conn.execute('DELETE FROM message_parts WHERE sender = ? AND ref = ? AND total = ?', self._key(data, part))
+
+
+    def pending_count(self):
+        conn = message_store.connection()
+        return conn.execute('SELECT COUNT(*) FROM (SELECT 1 FROM message_parts GROUP BY sender, ref, total)').fetchone()[0]
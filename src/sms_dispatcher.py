@@ -0,0 +1,90 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import sms_utils
+
+
+# Dispatcher of the outgoing SMS: messages are sent by a pool of workers sharing the Vonage client
+# (and its pool of HTTP connections), at most sms_utils.max_concurrency at a time.
+# Messages to the same destination are sent one after the other, in the order they were queued,
+# unless queued with ordered=False. Each attempt is a call to sms_utils.send_sms_text,
+# and its transient errors are retried with exponential backoff.
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+executor = ThreadPoolExecutor(max_workers=sms_utils.max_concurrency, thread_name_prefix='sms')
+_lanes = {}
+_lock = threading.Lock()
+stats = {'sent': 0, 'failed': 0, 'retries': 0}
+
+
+def _backoff(attempt):
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _deliver(sender_number, receiver_number, text):
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return sms_utils.send_sms_text(sender_number, receiver_number, text)
+        except sms_utils.transient_errors() as e:
+            if attempt == MAX_RETRIES:
+                logging.error(f"SMS sending failed after {attempt + 1} attempts: {e}")
+                return False
+            with _lock:
+                stats['retries'] += 1
+            time.sleep(_backoff(attempt))
+        except Exception as e:
+            print(f"An error occurred while sending SMS: {str(e)}")
+            logging.exception(f"An error occurred while sending SMS: {str(e)}")
+            return False
+
+
+def _run(job):
+    future, sender_number, receiver_number, text = job
+    if not future.set_running_or_notify_cancel():
+        return
+    success = _deliver(sender_number, receiver_number, text)
+    with _lock:
+        stats['sent' if success else 'failed'] += 1
+    future.set_result(success)
+
+
+# Send the queued messages of a destination, one after the other
+
+def _run_lane(receiver_number, job):
+    while job is not None:
+        _run(job)
+        with _lock:
+            lane = _lanes[receiver_number]
+            if lane:
+                job = lane.popleft()
+            else:
+                del _lanes[receiver_number]
+                job = None
+
+
+'''
+    Queue a message to be sent. Returns a Future resolving to True if the message has been sent,
+    or False if it failed (after retrying transient errors).
+    With ordered=False, the message may be sent before messages queued earlier for the same destination.
+'''
+def send(sender_number, receiver_number, text, ordered=True):
+    future = Future()
+    job = (future, sender_number, receiver_number, text)
+    if not ordered:
+        executor.submit(_run, job)
+        return future
+
+    with _lock:
+        lane = _lanes.get(receiver_number)
+        if lane is not None:
+            # a worker is sending to this destination: it takes the message after the current ones
+            lane.append(job)
+            return future
+        _lanes[receiver_number] = deque()
+    executor.submit(_run_lane, receiver_number, job)
+    return future
@@ -0,0 +1,122 @@
+import threading
+import time
+import queue
+import message_store
+import metrics
+
+
+# Asynchronous ingestion of the inbound SMS webhooks.
+# The webhook handler only puts the message on a bounded in-process queue and acknowledges it;
+# a background worker saves the queued messages in batches, one transaction (group commit) per batch.
+# When the queue is full the message is dropped and the webhook answered with an error,
+# so that Vonage delivers it again later. A message can carry a callback, run once it has been saved.
+max_queue_size = 10000
+BATCH_SIZE = 100
+BATCH_WAIT = 0.05
+RETRIES = 3
+
+_queue = queue.Queue(maxsize=max_queue_size)
+_worker = None
+_lock = threading.Lock()
+_condition = threading.Condition()
+_unfinished = 0
+stats = {'enqueued': 0, 'dropped': 0, 'persisted': 0, 'failed': 0, 'batches': 0}
+
+
+def _start_worker():
+    global _worker
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name='sms-ingest', daemon=True)
+            _worker.start()
+
+
+'''
+    Queue an inbound message to be saved in the message store.
+    on_saved(), if given, is called by the worker once the message has been saved (not if saving fails).
+    Returns False, and counts the message as dropped, if the queue is full.
+'''
+def enqueue(data, on_saved=None):
+    global _unfinished
+    _start_worker()
+    with _condition:
+        try:
+            _queue.put_nowait((data, on_saved))
+        except queue.Full:
+            stats['dropped'] += 1
+            return False
+        stats['enqueued'] += 1
+        _unfinished += 1
+    return True
+
+
+# Take the next batch: wait for a first message, then for up to BATCH_WAIT seconds for more
+
+def _next_batch():
+    batch = [_queue.get()]
+    deadline = time.monotonic() + BATCH_WAIT
+    while len(batch) < BATCH_SIZE:
+        remaining = deadline - time.monotonic()
+        try:
+            batch.append(_queue.get(timeout=remaining) if remaining > 0 else _queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def _run():
+    global _unfinished
+    while True:
+        batch = _next_batch()
+        for attempt in range(RETRIES):
+            try:
+                with metrics.timed('message_store_save'):
+                    message_store.save_messages([data for data, on_saved in batch])
+                stats['persisted'] += len(batch)
+                _saved(batch)
+                break
+            except Exception as e:
+                print(f"Unable to save {len(batch)} inbound messages (attempt {attempt + 1}): {e}")
+                time.sleep(0.1 * 2 ** attempt)
+        else:
+            stats['failed'] += len(batch)
+        stats['batches'] += 1
+
+        with _condition:
+            _unfinished -= len(batch)
+            _condition.notify_all()
+
+
+# Run the callbacks of a saved batch
+
+def _saved(batch):
+    for data, on_saved in batch:
+        if on_saved is None:
+            continue
+        try:
+            on_saved()
+        except Exception as e:
+            print(f"An error occurred after saving an inbound message: {e}")
+
+
+'''
+    Number of messages waiting to be saved.
+'''
+def depth():
+    return _queue.qsize()
+
+
+'''
+    Wait up to timeout seconds for the queued messages to be saved.
+    Returns True if the queue has been drained.
+'''
+def flush(timeout=None):
+    with _condition:
+        return _condition.wait_for(lambda: _unfinished == 0, timeout)
+
+
+'''
+    Queue depth and counters, as a dictionary.
+'''
+def status():
+    return dict(stats, depth=depth(), max_queue_size=max_queue_size)
@@ -1,21 +1,62 @@
-import vonage
-import json
 import os
 import logging
 from flask import jsonify
+import backends
+import message_store
+import metrics
+import sms_ingest
+import sms_concat
 
 
-# API keys saved in environment variables
-api_key = os.getenv('VONAGE_API_KEY')
-api_secret = os.getenv('VONAGE_API_SECRET')
-if not api_key or not api_secret:
-    raise ValueError("API key or secret is not set in the environment variables.")
-client = vonage.Client(key=api_key, secret=api_secret)
+# Maximum number of SMS sent concurrently (see sms_dispatcher), also the size of the client's HTTP connection pool
+max_concurrency = int(os.getenv('SMS_MAX_CONCURRENCY', '8'))
 
 
 '''
-    Send SMS text.
+    Create the Vonage client, with the API keys saved in environment variables.
+    Called on first use, through the backend registry (see backends.py): importing this module needs no keys.
 '''
+def create_client():
+    # the Vonage SDK is long to import: only when the client is needed
+    import vonage
+    api_key = os.getenv('VONAGE_API_KEY')
+    api_secret = os.getenv('VONAGE_API_SECRET')
+    if not api_key or not api_secret:
+        raise ValueError("API key or secret is not set in the environment variables.")
+    return vonage.Client(key=api_key, secret=api_secret, timeout=15,
+                         pool_connections=max_concurrency, pool_maxsize=max_concurrency)
+
+backends.register('sms', create_client)
+client = backends.lazy('sms')
+
+# Ingestion of inbound messages: 'async' (queued, saved in batches) or 'sync'
+ingest_mode = os.getenv('SMS_INGEST_MODE', 'async')
+# Parts of long texts received, waiting for the other parts
+reassembly = sms_concat.ReassemblyBuffer()
+
+
+# Vonage SMS API statuses worth retrying: 1 = Throttled, 5 = Internal Error
+TRANSIENT_STATUSES = {'1', '5'}
+
+
+class TransientSMSError(Exception):
+    pass
+
+
+'''
+    Errors of send_sms_text worth retrying. The Vonage SDK and requests are imported when one is raised.
+'''
+def transient_errors():
+    import requests
+    import vonage
+    return (TransientSMSError, vonage.errors.ServerError, requests.ConnectionError)
+
+
+'''
+    Send SMS text, in one attempt (retries are left to sms_dispatcher).
+    Returns True if accepted, False if rejected; raises one of transient_errors() if it may succeed when retried.
+'''
+@metrics.timed('vonage_send')
 def send_sms_text(sender_number, receiver_number, text):
     try:
         response = client.sms.send_message({
@@ -23,46 +64,63 @@ def send_sms_text(sender_number, receiver_number, text):
         "to": receiver_number,
         "text": text,
         })
-
-        # success reponse
-        if response["messages"][0]["status"] == "0":
-            logging.info('SMS sent successfully!')
-            print('SMS sent successfully!')
-            return True
-
-        # error response
-        else:
-            error_text = response["messages"][0].get("error-text", "An error occurred.")
-            print(f"SMS sending failed.")
-            logging.error(f"SMS sending failed with status {response['messages'][0].get('status')}: {error_text}")
-            return False
-    
+    except transient_errors():
+        raise
     except Exception as e:
         print(f"An error occurred while sending SMS: {str(e)}")
         logging.exception(f"An error occurred while sending SMS: {str(e)}")
         return False
 
+    # a long text is split in several messages: all of them must be accepted
+    for message in response["messages"]:
+        status = message["status"]
+        if status == "0":
+            continue
+        error_text = message.get("error-text", "An error occurred.")
+        if status in TRANSIENT_STATUSES:
+            raise TransientSMSError(f"status {status}: {error_text}")
+        # error response
+        print(f"SMS sending failed.")
+        logging.error(f"SMS sending failed with status {status}: {error_text}")
+        return False
+
+    # success reponse
+    logging.info('SMS sent successfully!')
+    print('SMS sent successfully!')
+    return True
+
 
 ''' 
     Receive SMS text.
+    Parts of long texts (see sms_concat) are saved as one message, once all of them are received.
+    In 'async' ingestion mode (default) the message is queued and saved in the background,
+    so the webhook is acknowledged right away; in 'sync' mode it is saved before answering.
 '''
+@metrics.timed('sms_receive')
 def receive_sms_text(request):
     if request.is_json:
         data = request.get_json()
-        print(data)
     else:
         data = dict(request.form) or dict(request.args)
-        print(data)
+    logging.debug(f"Inbound SMS: {data}")
     try:
-        # writing sms data in a json file
-        with open('tmp/received_sms_data.json', 'w') as f:
-            json.dump(data, f)
+        # a part of a long text is kept until the whole text has been received
+        message = reassembly.add(data)
+        if message is None:
+            return jsonify({'status': 'success'}), 200
+
+        if ingest_mode == 'async':
+            # the parts of a long text are released once the worker has saved it
+            on_saved = (lambda: reassembly.release(data)) if message is not data else None
+            if not sms_ingest.enqueue(message, on_saved=on_saved):
+                # queue full: Vonage delivers the message again later, and the parts are kept until then
+                return jsonify({'status': 'error', 'message': 'Too many messages, retry later'}), 503
+        else:
+            # save sms data in the message store
+            message_store.save_message(message)
+            reassembly.release(data)
         return jsonify({'status': 'success'}), 200
 
     except Exception as e:
         print(f"Unexpected error: {e}")
         return jsonify({'status': 'error', 'message': 'An unexpected error occurred'}), 500
-
-
-
-    
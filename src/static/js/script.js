@@ -104,7 +104,8 @@ $(document).ready(function() {
         <h2>Receive SMS Text with Token</h2>
         <div>
             <label for="sms-data-output" class="label">1) Fetch Message Data</label><br>
-            <p>Please click on 'Fetch SMS Data' below to display the SMS text received.</p>
+            <p>Please enter the phone number the SMS was sent from, like: 447566223444, then click on 'Fetch SMS Data' below to display the SMS text received.</p>
+            <input type="tel" id="sms-sender-input" name="sms-sender-input" placeholder="Enter sender's phone number">
             <textarea id="sms-data-output" placeholder="This area is to display text and metadata of the incoming SMS." readonly></textarea>
                 <div>
                     <button onclick="fetchAndDisplaySMSData()">Fetch SMS Data</button>
@@ -277,6 +278,7 @@ function bindDynamicEvents() {
     });
 
     $('#clear-sms-data').click(function() {
+        $('#sms-sender-input').val('');
         $('#sms-data-output').val('');
     });
 }
@@ -405,9 +407,19 @@ function sendSMS() {
 
 // Fetch and display the SMS message received
 function fetchAndDisplaySMSData() {
-    fetch('/fetch_sms_data')
+    var senderNumber = $('#sms-sender-input').val();
+    if (!senderNumber) {
+        document.getElementById('sms-data-output').value = "Please enter the sender's phone number.";
+        return;
+    }
+    // only the messages of this sender: other messages may be the tokens of other users
+    fetch('/fetch_sms_data?sender=' + encodeURIComponent(senderNumber))
     .then(response => response.json())
     .then(data => {
+        if (data.success === false) {
+            document.getElementById('sms-data-output').value = data.message;
+            return;
+        }
         document.getElementById('sms-data-output').value = 
         `${data.message_text}
 
@@ -471,17 +483,25 @@ function createTransaction(senderAddress, receiverAddress, amount) {
         body: JSON.stringify({
             sender_address: senderAddress,
             receiver_address: receiverAddress,
-            amount: amount
+            amount: amount,
+            async: true
         }),
     })
     // expects a JSON response
     .then(response => response.json())
-    // operate with the data parsed
+    // the transaction has been submitted: wait for its confirmation
     .then(data => {
         if (!data.success) {
             throw new Error(data.message);
         }
-        $('#txn-notification').text(data.message);
+        return waitForRedemption(data.redemption_id);
+    })
+    // operate with the data parsed
+    .then(data => {
+        if (!data.success) {
+            throw new Error('Transaction failed: ' + data.error);
+        }
+        $('#txn-notification').text('Transaction successfully created.');
         $('#sms-data-output').val('');
         $('#sender-address-input').val('');
         $('#sender-output').val('');
@@ -491,4 +511,19 @@ function createTransaction(senderAddress, receiverAddress, amount) {
         console.error('Error creating transaction:', error);
         $('#txn-notification').text(error.message);
     });
-}
\ No newline at end of file
+}
+
+
+// Poll the status of an asynchronous redemption every second until it is confirmed or failed,
+// without holding a server thread between polls
+function waitForRedemption(redemptionId) {
+    return fetch('/redemption_status/' + redemptionId + '?wait=0')
+    .then(response => response.json())
+    .then(data => {
+        if (data.status === 'pending') {
+            return new Promise(resolve => setTimeout(resolve, 1000))
+            .then(() => waitForRedemption(redemptionId));
+        }
+        return data;
+    });
+}
@@ -0,0 +1,196 @@
+import compile_cache
+from cache_utils import LRUCache
+
+
+# Extraction of the simple transaction constraints of a TEAL program, to check transactions locally
+# before sending them. A constraint is a comparison between a transaction field and a constant,
+# in either order, whose failure rejects the transaction:
+#   txn Amount        addr XYZ...        txn TypeEnum
+#   int 100000        txn Receiver       int pay
+#   <=                ==                 ==
+#   bz fail           assert             bz fail
+# where 'fail' is a label rejecting the transaction ('int 0' + 'return', or 'err').
+# Only the straight-line code at the start of the program is read, up to its first branch or label:
+# every transaction goes through it, so its checks apply to all of them. A program with conditional
+# branches (other than to a rejecting label) has no constraints: its checks may only apply to some paths.
+# Constraints are returned as (field, operator, value) tuples, with the field on the left.
+
+ZERO_ADDRESS = 'AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAY5HFKQ'
+TYPE_ENUM = {'pay': 1, 'keyreg': 2, 'acfg': 3, 'axfer': 4, 'afrz': 5, 'appl': 6}
+FIELDS = ('Sender', 'Receiver', 'Amount', 'Fee', 'TypeEnum', 'FirstValid', 'LastValid', 'CloseRemainderTo', 'RekeyTo')
+COMPARISONS = {'==': '==', '!=': '!=', '<': '>', '<=': '>=', '>': '<', '>=': '<='}
+CONDITIONAL_BRANCHES = ('bz', 'bnz', 'switch', 'match', 'callsub')
+# Instructions ending the straight-line code
+BRANCHES = CONDITIONAL_BRANCHES + ('b', 'retsub', 'return', 'err')
+
+# Constraints of recently parsed sources, by source key (see compile_cache.source_key)
+parsed_sources = LRUCache(maxsize=256)
+
+
+def _instructions(teal_source):
+    instructions = []
+    for line in teal_source.splitlines():
+        line = line.split('//', 1)[0].strip()
+        if line and not line.startswith('#'):
+            instructions.append(line.split())
+    return instructions
+
+
+def _constant(instruction):
+    if len(instruction) == 2 and instruction[0] in ('int', 'pushint'):
+        if instruction[1] in TYPE_ENUM:
+            return TYPE_ENUM[instruction[1]]
+        try:
+            return int(instruction[1], 0)
+        except ValueError:
+            return None
+    if len(instruction) == 2 and instruction[0] == 'addr':
+        return instruction[1]
+    if instruction == ['global', 'ZeroAddress']:
+        return ZERO_ADDRESS
+    return None
+
+
+def _field(instruction):
+    if len(instruction) == 2 and instruction[0] == 'txn' and instruction[1] in FIELDS:
+        return instruction[1]
+    return None
+
+
+# Labels whose code rejects the transaction
+
+def _reject_labels(instructions):
+    labels = set()
+    for i, instruction in enumerate(instructions):
+        if len(instruction) == 1 and instruction[0].endswith(':'):
+            following = instructions[i + 1:i + 3]
+            if following[:1] == [['err']] or following == [['int', '0'], ['return']]:
+                labels.add(instruction[0][:-1])
+    return labels
+
+
+def _rejects(instruction, reject_labels):
+    return len(instruction) == 2 and instruction[0] == 'bz' and instruction[1] in reject_labels
+
+
+# Instructions run by every transaction: from the start of the program to its first branch or label,
+# the conditional jumps to a rejecting label included. None if the program has other conditional branches.
+
+def _straight_line(instructions, reject_labels):
+    for instruction in instructions:
+        if instruction[0] in CONDITIONAL_BRANCHES and not _rejects(instruction, reject_labels):
+            return None
+    straight_line = []
+    for instruction in instructions:
+        if instruction[0].endswith(':') or (instruction[0] in BRANCHES and not _rejects(instruction, reject_labels)):
+            break
+        straight_line.append(instruction)
+    return straight_line
+
+
+'''
+    Extract the simple constraints of a TEAL program.
+    Returns a list of (field, operator, value) tuples, e.g. ('Amount', '<=', 100000).
+'''
+def parse_constraints(teal_source):
+    key = compile_cache.source_key(teal_source)
+    constraints = parsed_sources.get(key)
+    if constraints is not None:
+        return constraints
+
+    instructions = _instructions(teal_source)
+    reject_labels = _reject_labels(instructions)
+    straight_line = _straight_line(instructions, reject_labels) or []
+    constraints = []
+    for i in range(len(straight_line) - 3):
+        first, second, comparison, check = straight_line[i:i + 4]
+        if len(comparison) != 1 or comparison[0] not in COMPARISONS:
+            continue
+        rejects = check == ['assert'] or _rejects(check, reject_labels)
+        if not rejects:
+            continue
+
+        operator = comparison[0]
+        if _field(first) and _constant(second) is not None:
+            constraints.append((_field(first), operator, _constant(second)))
+        elif _constant(first) is not None and _field(second):
+            # constant on the left: swap the operands
+            constraints.append((_field(second), COMPARISONS[operator], _constant(first)))
+
+    parsed_sources.put(key, constraints)
+    return constraints
+
+
+'''
+    Fields of a payment transaction, as seen by a TEAL program.
+'''
+def transaction_fields(txn):
+    return {
+        'Sender': txn.sender,
+        'Receiver': txn.receiver,
+        'Amount': txn.amt,
+        'Fee': txn.fee,
+        'TypeEnum': TYPE_ENUM.get(txn.type),
+        'FirstValid': txn.first_valid_round,
+        'LastValid': txn.last_valid_round,
+        'CloseRemainderTo': txn.close_remainder_to or ZERO_ADDRESS,
+        'RekeyTo': txn.rekey_to or ZERO_ADDRESS,
+    }
+
+
+def _holds(actual, operator, expected):
+    if operator == '==':
+        return actual == expected
+    if operator == '!=':
+        return actual != expected
+    if not isinstance(actual, int) or not isinstance(expected, int):
+        return False
+    if operator == '<':
+        return actual < expected
+    if operator == '<=':
+        return actual <= expected
+    if operator == '>':
+        return actual > expected
+    return actual >= expected
+
+
+'''
+    Check transaction fields against constraints.
+    Returns the list of the violated constraints, as readable strings (empty if all hold).
+'''
+def check(constraints, fields):
+    violations = []
+    for field, operator, expected in constraints:
+        actual = fields.get(field)
+        if not _holds(actual, operator, expected):
+            violations.append(f"{field} {actual} does not satisfy {field} {operator} {expected}")
+    return violations
+
+
+'''
+    Spending limit of a program: the lowest upper bound on the Amount, or None.
+'''
+def amount_limit(constraints):
+    limits = [value - 1 if operator == '<' else value
+              for field, operator, value in constraints
+              if field == 'Amount' and operator in ('<', '<=', '==')]
+    return min(limits) if limits else None
+
+
+'''
+    Spending limit shown for a program: its amount_limit, or else the constant of the first
+    comparison of the Amount with an integer ('txn Amount', 'int N', '<=', '<' or '=='), whatever follows it.
+    For display only: unlike the constraints, this bound may not apply to every transaction.
+'''
+def displayed_amount_limit(teal_source):
+    limit = amount_limit(parse_constraints(teal_source))
+    if limit is not None:
+        return limit
+    instructions = _instructions(teal_source)
+    for i in range(len(instructions) - 2):
+        first, second, comparison = instructions[i:i + 3]
+        if _field(first) == 'Amount' and second[0] in ('int', 'pushint') and comparison in (['<='], ['<'], ['==']):
+            value = _constant(second)
+            if isinstance(value, int):
+                return value - 1 if comparison == ['<'] else value
+    return None
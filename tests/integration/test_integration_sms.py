@@ -1,8 +1,12 @@
-
-import unittest
+import os
+import tempfile
 import pytest
 from unittest.mock import patch
 from server import app_sms
+import message_store
+import sms_ingest
+import sms_concat
+import sms_utils
 
 
 @pytest.fixture
@@ -12,21 +16,54 @@ def sms_client():
 
 # NOTE: send_sms() tested in unit testing.
 
-#============ Test request handling in SMS receiving. Testing integration with Flask app, while mocking writing in file. ==========
+#============ Test request handling in SMS receiving. Testing integration with Flask app, using a temporary message store. ==========
 
 def test_receive_sms_with_json(sms_client):
     sms_data = {'text': 'Hi!', 'from': '7711111222'}
-    # mock opening of the file, such that we're not actually writing in the file
-    with patch("builtins.open", new_callable=unittest.mock.mock_open) as mock_file:
-        # write in a mock file, and specify what the mocked file return value should be
-        file = mock_file.return_value.__enter__.return_value
-
-        # mock writing in the file
-        with patch("json.dump") as mock_json_dump:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # save messages in a temporary database, such that we're not actually writing in the store
+        with patch('message_store.db_path', os.path.join(tmp_dir, 'messages.db')):
             response = sms_client.post('/webhooks/inbound', json=sms_data)
-            # check the call to open file
-            mock_file.assert_called_once_with('tmp/received_sms_data.json', 'w')
-            # check the call to json dump with the correct arguments to the correct file            
-            mock_json_dump.assert_called_once_with(sms_data, file)
             assert response.status_code == 200
-            assert response.json['status'] == 'success'
\ No newline at end of file
+            assert response.json['status'] == 'success'
+            # check the message saved, once the ingestion queue is drained
+            assert sms_ingest.flush(timeout=5)
+            message = message_store.latest_message()
+            assert message['text'] == 'Hi!'
+            assert message['sender'] == '7711111222'
+            message_store.close()
+
+
+def test_ingest_stats(sms_client):
+    response = sms_client.get('/webhooks/stats')
+    assert response.status_code == 200
+    assert 'depth' in response.json and 'dropped' in response.json
+
+
+def test_receive_sms_parts(sms_client):
+    text = "Your Token: " + "x" * 400
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with patch('message_store.db_path', os.path.join(tmp_dir, 'messages.db')), patch('sms_utils.ingest_mode', 'sync'):
+            # the parts of a long text arrive in any order, and are saved as one message
+            for part in reversed(sms_concat.split(text)):
+                response = sms_client.post('/webhooks/inbound', json={'text': part, 'from': '7711111222'})
+                assert response.status_code == 200
+            assert message_store.latest_message()['text'] == text
+            message_store.close()
+
+
+def test_receive_sms_parts_retried(sms_client):
+    text = "Your Token: " + "y" * 400
+    parts = sms_concat.split(text)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with patch('message_store.db_path', os.path.join(tmp_dir, 'messages.db')), patch('sms_utils.ingest_mode', 'sync'):
+            for part in parts[:-1]:
+                assert sms_client.post('/webhooks/inbound', json={'text': part, 'from': '7711111333'}).status_code == 200
+            # the webhook of the last part fails: Vonage sends it again, and the text is completed again
+            last = {'text': parts[-1], 'from': '7711111333', 'messageId': 'last'}
+            with patch('message_store.save_message', side_effect=Exception('database locked')):
+                assert sms_client.post('/webhooks/inbound', json=last).status_code == 500
+            assert sms_client.post('/webhooks/inbound', json=last).status_code == 200
+            assert message_store.latest_message(sender='7711111333')['text'] == text
+            assert sms_utils.reassembly.pending_count() == 0
+            message_store.close()
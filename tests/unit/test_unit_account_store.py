@@ -0,0 +1,55 @@
+import unittest
+import tempfile
+from unittest.mock import patch
+import sys
+import os
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+import account_store
+import core
+
+
+class testUnitAccountStore(unittest.TestCase):
+
+    def setUp(self):
+        # write the store in a temporary folder
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.accounts_path = os.path.join(self.tmp_dir.name, 'generated_accounts.txt')
+        self.patch = patch('account_store.accounts_file_path', self.accounts_path)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        self.tmp_dir.cleanup()
+
+
+    # accounts generated in parallel are all distinct and complete
+    def test_generate_accounts(self):
+        accounts = list(core.generate_accounts(20, processes=2, chunksize=4))
+        self.assertEqual(len(accounts), 20)
+        self.assertEqual(len({a['address'] for a in accounts}), 20)
+        for account_info in accounts:
+            self.assertTrue(core.check_private_key_against_address(account_info['address'], account_info['private_key']))
+
+
+    # records keep the original file format
+    def test_append(self):
+        accounts = [core._new_account() for _ in range(5)]
+        account_store.append_accounts(accounts[:2])
+        account_store.append_accounts(accounts[2:])
+
+        with open(self.accounts_path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 20)
+        self.assertEqual(lines[0], f"Address: {accounts[0]['address']}")
+        self.assertEqual(lines[1], f"Private Key: {accounts[0]['private_key']}")
+        self.assertEqual(lines[2], f"Mnemonic: {accounts[0]['mnemonic']}")
+        self.assertEqual(lines[3], "----------")
+        self.assertEqual(lines[16], f"Address: {accounts[4]['address']}")
+
+
+
+if __name__ == '__main__':
+    unittest.main()
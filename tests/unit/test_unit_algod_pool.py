@@ -0,0 +1,147 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+from urllib3.exceptions import ReadTimeoutError
+from algosdk import error
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+from algod_pool import AlgodPool
+import core
+
+
+# algod node stand-in, at a given round, that can be taken down
+class FakeNode:
+
+    def __init__(self, address, last_round, catchup_time=0):
+        self.algod_address = address
+        self.last_round = last_round
+        self.catchup_time = catchup_time
+        self.down = False
+        self.calls = []
+
+    def _request(self, name):
+        self.calls.append(name)
+        if self.down:
+            raise ConnectionRefusedError(f"{self.algod_address} is down")
+
+    def status(self):
+        self._request('status')
+        return {'last-round': self.last_round, 'catchup-time': self.catchup_time}
+
+    def account_info(self, address):
+        self._request('account_info')
+        return {'address': address, 'node': self.algod_address}
+
+    def send_transaction(self, txn):
+        self._request('send_transaction')
+        return self.algod_address
+
+    def pending_transaction_info(self, txid):
+        self._request('pending_transaction_info')
+        raise error.AlgodHTTPError('txn does not exist', 404)
+
+
+class testUnitAlgodPool(unittest.TestCase):
+
+    def setUp(self):
+        self.a = FakeNode('A', 1000)
+        self.b = FakeNode('B', 1001)
+        self.c = FakeNode('C', 1001)
+        self.pool = AlgodPool([self.a, self.b, self.c], max_lag=2)
+
+    # reads are spread over the healthy nodes
+    def test_reads_spread(self):
+        nodes = [self.pool.account_info('X')['node'] for _ in range(6)]
+        self.assertEqual(sorted(set(nodes)), ['A', 'B', 'C'])
+        self.assertEqual(nodes.count('A'), 2)
+
+    # lagging or catching up nodes receive no requests
+    def test_lagging_node_left_out(self):
+        self.a.last_round = 990
+        self.c.catchup_time = 5000
+        nodes = {self.pool.account_info('X')['node'] for _ in range(6)}
+        self.assertEqual(nodes, {'B'})
+        self.assertEqual([node['healthy'] for node in self.pool.nodes_status()], [False, True, False])
+
+    # transactions go to the most advanced node
+    def test_submission_to_best_node(self):
+        self.a.last_round = 1005
+        self.assertEqual(self.pool.send_transaction('txn'), 'A')
+
+    # a request failing on a node that went down is sent to the next one, and the node is left out
+    def test_failover(self):
+        self.pool.check()
+        self.b.down = True
+        self.assertIn(self.pool.send_transaction('txn'), ('A', 'C'))
+        self.assertEqual(self.pool.stats['failovers'], 1)
+        nodes = {self.pool.account_info('X')['node'] for _ in range(6)}
+        self.assertNotIn('B', nodes)
+        self.assertFalse(self.pool.nodes_status()[1]['up'])
+
+    # a transaction timing out may have been accepted by its node: it is not sent to another node
+    def test_submission_timeout_not_failed_over(self):
+        self.pool.check()
+        def timeout(txn):
+            raise ReadTimeoutError(None, '/v2/transactions', 'Read timed out.')
+        self.b.send_transaction = timeout
+        with self.assertRaises(ReadTimeoutError):
+            self.pool.send_transaction('txn')
+        self.assertEqual(self.pool.stats['failovers'], 0)
+        self.assertNotIn('send_transaction', self.a.calls + self.c.calls)
+
+    # the health of the nodes is only checked by check() (node monitor), and once before the first request
+    def test_health_checked_by_check(self):
+        self.pool.account_info('X')
+        self.pool.account_info('X')
+        self.assertEqual(self.a.calls.count('status'), 1)
+        self.a.last_round = 990
+        nodes = {self.pool.account_info('X')['node'] for _ in range(6)}
+        self.assertIn('A', nodes)
+        self.pool.check()
+        nodes = {self.pool.account_info('X')['node'] for _ in range(6)}
+        self.assertNotIn('A', nodes)
+
+    # rejections of the request itself are not sent to another node
+    def test_client_error_raised(self):
+        def rejected(txn):
+            raise error.AlgodHTTPError('transaction rejected by logic', 400)
+        for node in (self.a, self.b, self.c):
+            node.send_transaction = rejected
+        with self.assertRaises(error.AlgodHTTPError):
+            self.pool.send_transaction('txn')
+        self.assertEqual(self.pool.stats['failovers'], 0)
+
+    # an unknown transaction is looked up on every node before raising
+    def test_not_found_tried_everywhere(self):
+        with self.assertRaises(error.AlgodHTTPError):
+            self.pool.pending_transaction_info('TXID')
+        for node in (self.a, self.b, self.c):
+            self.assertIn('pending_transaction_info', node.calls)
+        self.assertTrue(all(node['up'] for node in self.pool.nodes_status()))
+
+    # all nodes down: the last error is raised
+    def test_all_down(self):
+        for node in (self.a, self.b, self.c):
+            node.down = True
+        with self.assertRaises(ConnectionRefusedError):
+            self.pool.account_info('X')
+
+    def test_unknown_method(self):
+        with self.assertRaises(AttributeError):
+            self.pool.not_an_algod_method()
+
+    # several addresses configured: core's client is a pool of pooled clients
+    def test_core_client(self):
+        with patch.object(core, 'algod_addresses', ['http://a:4001', 'http://b:4001']):
+            client = core.create_algod_client()
+        self.assertIsInstance(client, AlgodPool)
+        self.assertEqual(client.algod_address, 'http://a:4001,http://b:4001')
+        with patch.object(core, 'algod_addresses', ['http://a:4001']):
+            self.assertNotIsInstance(core.create_algod_client(), AlgodPool)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import json
+import threading
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from algosdk import error
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+from algod_transport import PooledAlgodClient
+
+TOKEN = 'a' * 64
+
+
+# Minimal algod answering with keep-alive connections
+class AlgodHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # answer in one segment, as algod does, without waiting for delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def answer(self, code, body):
+        payload = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.headers.get('X-Algo-API-Token') != TOKEN:
+            self.answer(401, {'message': 'Invalid API Token'})
+        elif self.path == '/v2/status':
+            self.answer(200, {'last-round': 1000, 'catchup-time': 0})
+        else:
+            self.answer(404, {'message': 'not found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        self.answer(400, {'message': 'TransactionPool.Remember: transaction rejected by logic'})
+
+
+class testUnitAlgodTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), AlgodHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.client = PooledAlgodClient(TOKEN, f'http://127.0.0.1:{self.server.server_address[1]}')
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    # successive requests share one connection: a single handshake
+    def test_connection_reused(self):
+        for _ in range(5):
+            self.assertEqual(self.client.status()['last-round'], 1000)
+        self.assertEqual(self.client.connection_stats(), {'requests': 5, 'connections': 1, 'reused': 4})
+
+    # threads share the pool, with at most one connection per thread
+    def test_threads(self):
+        results = []
+        def redeem():
+            for _ in range(10):
+                results.append(self.client.status()['last-round'])
+        threads = [threading.Thread(target=redeem) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = self.client.connection_stats()
+        self.assertEqual(results, [1000] * 40)
+        self.assertEqual(stats['requests'], 40)
+        self.assertLessEqual(stats['connections'], 4)
+
+    # errors of the node are raised as by AlgodClient
+    def test_http_error(self):
+        with self.assertRaises(error.AlgodHTTPError) as context:
+            self.client.algod_request('POST', '/transactions', data=b'txn')
+        self.assertEqual(context.exception.code, 400)
+        self.assertIn('rejected by logic', str(context.exception))
+        with self.assertRaises(error.AlgodHTTPError) as context:
+            PooledAlgodClient('wrong', self.client.algod_address).status()
+        self.assertEqual(context.exception.code, 401)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import subprocess
+import sys
+import os
+from unittest.mock import patch, MagicMock
+
+
+# adjust path at runtime since src and test are in separate folders
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src'))
+sys.path.insert(0, SRC)
+import backends
+
+# factory used by the <NAME>_BACKEND environment variable test
+stand_in = MagicMock(name='stand_in')
+
+def create_stand_in():
+    return stand_in
+
+
+class testUnitBackends(unittest.TestCase):
+
+    def tearDown(self):
+        backends.reset('test')
+
+    # the client is created on first use only, once
+    def test_lazy_creation(self):
+        factory = MagicMock(return_value=MagicMock(value=7))
+        backends.register('test', factory)
+        client = backends.lazy('test')
+        factory.assert_not_called()
+        self.assertEqual(client.value, 7)
+        self.assertEqual(client.value, 7)
+        factory.assert_called_once()
+
+    # use() replaces the client, reset() creates it again on next use
+    def test_use_and_reset(self):
+        backends.register('test', lambda: 'created')
+        client = backends.lazy('test')
+        backends.use('test', MagicMock(value='stand-in'))
+        self.assertEqual(client.value, 'stand-in')
+        backends.reset('test')
+        self.assertEqual(backends.get('test'), 'created')
+
+    # attributes set on the proxy are set on the client
+    def test_lazy_client_setattr(self):
+        target = MagicMock()
+        backends.use('test', target)
+        backends.lazy('test').sms = 'fake'
+        self.assertEqual(target.sms, 'fake')
+
+    def test_environment_factory(self):
+        backends.register('test', lambda: 'created')
+        with patch.dict(os.environ, {'TEST_BACKEND': 'test_unit_backends:create_stand_in'}):
+            self.assertIs(backends.get('test'), stand_in)
+
+    def test_unregistered(self):
+        with self.assertRaises(KeyError):
+            backends.get('unregistered')
+
+    # importing the system builds no client and needs no Vonage credentials
+    def test_import_without_credentials(self):
+        env = {k: v for k, v in os.environ.items() if not k.startswith('VONAGE_')}
+        env['PYTHONPATH'] = SRC
+        code = ("import sys, server, backends\n"
+                "assert 'vonage' not in sys.modules\n"
+                "assert not backends._clients\n")
+        result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import base64
+import tempfile
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+import compile_cache
+import program_registry
+import core
+
+
+TEAL_SOURCE = "#pragma version 2\nint 1\nreturn\n"
+COMPILED = {'hash': 'MOCKPROGRAMADDRESS', 'result': base64.b64encode(b'\x02\x20\x01\x01\x22').decode()}
+
+
+class testUnitCompileCache(unittest.TestCase):
+
+    def setUp(self):
+        # use a fresh on-disk tier for every test
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir_patches = [patch('compile_cache.cache_dir', self.tmp_dir.name),
+                            patch('program_registry.registry_dir', os.path.join(self.tmp_dir.name, 'programs'))]
+        for p in self.dir_patches:
+            p.start()
+        compile_cache.clear()
+        program_registry.reset()
+
+    def tearDown(self):
+        for p in self.dir_patches:
+            p.stop()
+        self.tmp_dir.cleanup()
+        compile_cache.clear()
+        program_registry.reset()
+
+
+    # same program with different line endings and trailing spaces share the key
+    def test_normalized_key(self):
+        variant = "#pragma version 2  \r\nint 1\r\nreturn\r\n\r\n"
+        self.assertEqual(compile_cache.source_key(TEAL_SOURCE), compile_cache.source_key(variant))
+        self.assertNotEqual(compile_cache.source_key(TEAL_SOURCE), compile_cache.source_key("int 0"))
+
+
+    # second compilation is served from memory without calling algod
+    def test_memory_hit(self):
+        mock_client = MagicMock()
+        mock_client.compile.return_value = COMPILED
+        first = compile_cache.compile_teal(mock_client, TEAL_SOURCE)
+        second = compile_cache.compile_teal(mock_client, TEAL_SOURCE)
+        self.assertEqual(first, second)
+        mock_client.compile.assert_called_once_with(TEAL_SOURCE)
+        self.assertEqual(compile_cache.stats['misses'], 1)
+        self.assertEqual(compile_cache.stats['hits'], 1)
+
+
+    # after a restart (empty memory tier), the program is read back from disk
+    def test_disk_hit(self):
+        mock_client = MagicMock()
+        mock_client.compile.return_value = COMPILED
+        compile_cache.compile_teal(mock_client, TEAL_SOURCE)
+        compile_cache.memory_cache.clear()
+        result = compile_cache.compile_teal(mock_client, TEAL_SOURCE)
+        self.assertEqual(result, COMPILED)
+        mock_client.compile.assert_called_once()
+        self.assertEqual(compile_cache.stats['disk_hits'], 1)
+
+
+    # create_lsig goes through the cache
+    @patch('core.algod_client')
+    def test_create_lsig_uses_cache(self, mock_client):
+        mock_client.compile.return_value = COMPILED
+        lsig_1 = core.create_lsig(TEAL_SOURCE)
+        lsig_2 = core.create_lsig(TEAL_SOURCE)
+        self.assertEqual(lsig_1.lsig.logic, lsig_2.lsig.logic)
+        mock_client.compile.assert_called_once()
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import base64
+import threading
+import msgpack
+from unittest.mock import MagicMock
+import sys
+import os
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+from confirmation_tracker import ConfirmationTracker, block_txids
+from algosdk import account, error
+from algosdk.transaction import PaymentTxn, SuggestedParams
+
+
+GENESIS_HASH = 'SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI='
+GENESIS_ID = 'sandnet-v1'
+
+
+def make_txn(amount):
+    sender = account.generate_account()[1]
+    params = SuggestedParams(1000, 10, 1010, GENESIS_HASH, GENESIS_ID, flat_fee=True)
+    return PaymentTxn(sender, params, sender, amount)
+
+
+# encode transactions in a block the way algod does: genesis hash and ID stripped from each transaction
+def make_block(txns):
+    block_txns = []
+    for txn in txns:
+        txn_dict = dict(txn.dictify())
+        txn_dict.pop('gh')
+        txn_dict.pop('gen')
+        block_txns.append({'txn': txn_dict, 'hgi': True})
+    block = {'block': {'gen': GENESIS_ID, 'gh': base64.b64decode(GENESIS_HASH), 'txns': block_txns}}
+    return msgpack.packb(block, use_bin_type=True)
+
+
+'''
+    Fake algod node: produces one block per status_after_block call, each containing the given transactions.
+'''
+class FakeNode:
+    def __init__(self, blocks):
+        self.round = 10
+        self.blocks = blocks
+        self.lock = threading.Lock()
+        # rounds advance only once the test has sent its transactions
+        self.started = threading.Event()
+        self.status_after_block = MagicMock(side_effect=self._status_after_block)
+        self.block_info = MagicMock(side_effect=self._block_info)
+        self.pending_transaction_info = MagicMock(return_value={'confirmed-round': 0, 'pool-error': ''})
+
+    def status(self):
+        return {'last-round': self.round}
+
+    def _status_after_block(self, round_number):
+        self.started.wait(5)
+        with self.lock:
+            self.round = round_number + 1
+            return {'last-round': self.round}
+
+    def _block_info(self, round_number, response_format='json'):
+        return make_block(self.blocks.get(round_number, []))
+
+
+class testUnitConfirmationTracker(unittest.TestCase):
+
+    # txids computed from a block match the ones computed by the SDK
+    def test_block_txids(self):
+        txns = [make_txn(1), make_txn(2)]
+        self.assertEqual(block_txids(make_block(txns)), [txn.get_txid() for txn in txns])
+
+
+    # many pending transactions resolved with one block request per round
+    def test_resolves_many_txids(self):
+        txns = [make_txn(amount) for amount in range(1, 21)]
+        node = FakeNode({11: txns[:10], 12: txns[10:]})
+        on_round = MagicMock()
+        tracker = ConfirmationTracker(lambda: node, on_round=on_round)
+
+        futures = [tracker.track(txn.get_txid()) for txn in txns]
+        node.started.set()
+        results = [future.result(5) for future in futures]
+
+        self.assertEqual([r['confirmed-round'] for r in results], [11] * 10 + [12] * 10)
+        self.assertLessEqual(node.block_info.call_count, 3)
+        self.assertEqual(tracker.pending_count(), 0)
+        on_round.assert_any_call(11)
+
+
+    # transactions not confirmed within wait_rounds time out
+    def test_timeout(self):
+        node = FakeNode({})
+        node.started.set()
+        tracker = ConfirmationTracker(lambda: node)
+        future = tracker.track(make_txn(1).get_txid(), wait_rounds=2)
+        with self.assertRaises(error.ConfirmationTimeoutError):
+            future.result(5)
+
+
+    # transactions rejected by the pool fail immediately
+    def test_pool_error(self):
+        node = FakeNode({})
+        node.pending_transaction_info.return_value = {'pool-error': 'overlapping lease'}
+        tracker = ConfirmationTracker(lambda: node)
+        with self.assertRaises(error.TransactionRejectedError):
+            tracker.wait(make_txn(1).get_txid(), timeout=5)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
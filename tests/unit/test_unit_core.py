@@ -4,11 +4,15 @@ import json
 from unittest.mock import patch, MagicMock
 import sys
 import os
+from concurrent.futures import Future
+from algosdk import account, error
+from algosdk.transaction import SuggestedParams
 
 
 # adjust path at runtime since src and test are in separate folders 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
 import core
+from lease_index import LeaseInUseError
 
 
 class test_unit_core(unittest.TestCase):
@@ -56,6 +60,36 @@ class test_unit_core(unittest.TestCase):
         self.assertEqual(account_info, expected_account_info)
 
 
+    # repeated lookups in the same round are served from the account cache
+    @patch('core.node_state')
+    @patch('core.algod_client')
+    def test_fetch_info_cached(self, mock_client, mock_node_state):
+        core.account_cache.clear()
+        mock_node_state.known_round.return_value = 10
+        mock_client.account_info.return_value = {'amount': 1000000, 'round': 10}
+        core.fetch_info('cached_address')
+        core.fetch_info('cached_address')
+        mock_client.account_info.assert_called_once_with('cached_address')
+
+
+    # a newer round, or a transaction touching the account, invalidates the entry
+    @patch('core.node_state')
+    @patch('core.algod_client')
+    def test_fetch_info_invalidated(self, mock_client, mock_node_state):
+        core.account_cache.clear()
+        mock_node_state.known_round.return_value = 10
+        mock_client.account_info.return_value = {'amount': 1000000, 'round': 10}
+        core.fetch_info('cached_address')
+        mock_node_state.known_round.return_value = 11
+        core.fetch_info('cached_address')
+        self.assertEqual(mock_client.account_info.call_count, 2)
+
+        mock_node_state.known_round.return_value = 10
+        core.invalidate_accounts('cached_address')
+        core.fetch_info('cached_address')
+        self.assertEqual(mock_client.account_info.call_count, 3)
+
+
 #============== Test encoding of lsig to sms and back ===========
 
     
@@ -109,6 +143,160 @@ class test_unit_core(unittest.TestCase):
         self.assertEqual(result, mock_lsig_account)
 
 
+#============== Test batch redemption ===========
+
+    # create a token signed by a new account, as sent via SMS
+    def make_token(self):
+        private_key, address = account.generate_account()
+        lsig = core.LogicSigAccount(b'\x02\x20\x01\x01\x22')
+        lsig.sign(private_key)
+        return address, core.lsig_to_sms_text(lsig)
+
+
+    def mock_batch_dependencies(self, mock_node_state, mock_tracker):
+        mock_node_state.suggested_params.return_value = SuggestedParams(
+            1000, 10, 1010, 'SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=', 'sandnet-v1', flat_fee=True)
+        def track(txid, wait_rounds=None):
+            future = Future()
+            future.set_result({'confirmed-round': 11})
+            return future
+        mock_tracker.track.side_effect = track
+
+
+    # invalid items are reported, valid items are submitted with one shared params fetch
+    @patch('core.confirmation_tracker')
+    @patch('core.node_state')
+    @patch('core.algod_client')
+    def test_construct_lsig_batch_report(self, mock_client, mock_node_state, mock_tracker):
+        self.mock_batch_dependencies(mock_node_state, mock_tracker)
+        mock_client.send_transaction.side_effect = lambda signed_txn: signed_txn.get_txid()
+        address, token = self.make_token()
+        other_address, other_token = self.make_token()
+        receiver = account.generate_account()[1]
+
+        results = core.construct_lsig_batch([
+            {'sender_address': address, 'receiver_address': receiver, 'amount': 1000, 'token': token},
+            {'sender_address': address, 'receiver_address': 'invalid', 'amount': 1000, 'token': token},
+            {'sender_address': address, 'receiver_address': receiver, 'amount': 1000, 'token': other_token},
+            {'sender_address': address, 'receiver_address': receiver, 'amount': 1000, 'token': token},
+        ])
+
+        self.assertTrue(results[0]['success'])
+        self.assertEqual(results[0]['confirmed_round'], 11)
+        self.assertIn('Invalid account address', results[1]['error'])
+        self.assertIn('not signed by the sender', results[2]['error'])
+        self.assertIn('repeated', results[3]['error'])
+        mock_node_state.suggested_params.assert_called_once()
+        mock_client.send_transaction.assert_called_once()
+
+
+    # atomic batches are sent in groups of at most 16 transactions
+    @patch('core.confirmation_tracker')
+    @patch('core.node_state')
+    @patch('core.algod_client')
+    def test_construct_lsig_batch_atomic_groups(self, mock_client, mock_node_state, mock_tracker):
+        self.mock_batch_dependencies(mock_node_state, mock_tracker)
+        receiver = account.generate_account()[1]
+        batch = []
+        for _ in range(20):
+            address, token = self.make_token()
+            batch.append({'sender_address': address, 'receiver_address': receiver, 'amount': 1000, 'token': token})
+
+        results = core.construct_lsig_batch(batch, atomic=True)
+
+        self.assertTrue(all(result['success'] for result in results))
+        group_sizes = [len(call.args[0]) for call in mock_client.send_transactions.call_args_list]
+        self.assertEqual(group_sizes, [16, 4])
+        first_group = mock_client.send_transactions.call_args_list[0].args[0]
+        self.assertEqual(len({signed_txn.transaction.group for signed_txn in first_group}), 1)
+
+
+
+    # a group rejected because of one reused token: the leases of the other tokens are released
+    @patch('core.lease_index', core.LeaseIndex())
+    @patch('core.confirmation_tracker')
+    @patch('core.node_state')
+    @patch('core.algod_client')
+    def test_construct_lsig_batch_atomic_rejection(self, mock_client, mock_node_state, mock_tracker):
+        self.mock_batch_dependencies(mock_node_state, mock_tracker)
+        receiver = account.generate_account()[1]
+        batch = []
+        for _ in range(3):
+            address, token = self.make_token()
+            batch.append({'sender_address': address, 'receiver_address': receiver, 'amount': 1000, 'token': token})
+        def reject_second(signed_txns):
+            raise Exception(f"TransactionPool.Remember: transaction {signed_txns[1].get_txid()} using an overlapping lease")
+        mock_client.send_transactions.side_effect = reject_second
+
+        results = core.construct_lsig_batch(batch, atomic=True)
+        self.assertIn('overlapping lease', results[1]['error'])
+        self.assertIn('another transaction of its atomic group', results[0]['error'])
+        self.assertEqual(len(core.lease_index), 1)
+
+        # the other tokens can be redeemed again
+        mock_client.send_transactions.side_effect = None
+        results = core.construct_lsig_batch([batch[0], batch[2]], atomic=True)
+        self.assertTrue(all(result['success'] for result in results))
+
+
+#============== Test local lease index ===========
+
+    # a reused token is rejected before reaching algod, and a token whose transaction failed can be used again
+    @patch('core.lease_index', core.LeaseIndex())
+    @patch('core.node_state')
+    @patch('core.algod_client')
+    def test_submit_rejects_reused_token(self, mock_client, mock_node_state):
+        mock_node_state.suggested_params.return_value = SuggestedParams(
+            1000, 10, 1010, 'SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=', 'sandnet-v1', flat_fee=True)
+        address, token = self.make_token()
+        receiver = account.generate_account()[1]
+        lsig = core.sms_text_to_lsig(token)
+
+        mock_client.send_transaction.side_effect = Exception("network error")
+        with self.assertRaises(Exception):
+            core.submit_lsig_transaction(address, receiver, 1000, lsig, token)
+
+        mock_client.send_transaction.side_effect = lambda signed_txn: signed_txn.get_txid()
+        core.submit_lsig_transaction(address, receiver, 1000, lsig, token)
+        with self.assertRaises(LeaseInUseError) as context:
+            core.submit_lsig_transaction(address, receiver, 1000, lsig, token)
+        self.assertIn('overlapping lease', str(context.exception))
+        self.assertEqual(mock_client.send_transaction.call_count, 2)
+
+    # the lease of a transaction whose confirmation fails is released
+    @patch('core.lease_index', core.LeaseIndex())
+    @patch('core.confirmation_tracker')
+    @patch('core.node_state')
+    @patch('core.algod_client')
+    def test_failed_confirmation_releases_lease(self, mock_client, mock_node_state, mock_tracker):
+        mock_node_state.suggested_params.return_value = SuggestedParams(
+            1000, 10, 1010, 'SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=', 'sandnet-v1', flat_fee=True)
+        mock_tracker.track.side_effect = lambda txid, wait_rounds=None: Future()
+        mock_client.send_transaction.side_effect = lambda signed_txn: signed_txn.get_txid()
+        address, token = self.make_token()
+        receiver = account.generate_account()[1]
+        lsig = core.sms_text_to_lsig(token)
+
+        txid = core.submit_lsig_transaction(address, receiver, 1000, lsig, token)
+        confirmation = core.track_lsig_transaction(txid)
+        with self.assertRaises(LeaseInUseError):
+            core.submit_lsig_transaction(address, receiver, 1000, lsig, token)
+        confirmation.set_exception(error.ConfirmationTimeoutError("Wait for transaction id timed out"))
+        core.submit_lsig_transaction(address, receiver, 1000, lsig, token)
+
+        # with the node monitor reporting the node out of sync, the transaction is refused without querying the node
+    @patch('core.node_state')
+    @patch('core.algod_client')
+    def test_submit_refused_out_of_sync(self, mock_client, mock_node_state):
+        address, token = self.make_token()
+        lsig = core.sms_text_to_lsig(token)
+        health = {'synced': False, 'reason': 'node catching up'}
+        with patch.object(core.node_monitor, 'health', return_value=health):
+            with self.assertRaises(core.NodeNotSyncedError):
+                core.submit_lsig_transaction(address, account.generate_account()[1], 1000, lsig, token)
+        mock_node_state.status.assert_not_called()
+        mock_client.send_transaction.assert_not_called()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import threading
+import sys
+import os
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+from lease_index import LeaseIndex, LeaseInUseError
+
+LEASE = b'\x01' * 32
+
+
+class testUnitLeaseIndex(unittest.TestCase):
+
+    # a lease is in use until the rounds go past the last valid round of its transaction
+    def test_reserve_and_expire(self):
+        index = LeaseIndex()
+        index.reserve('SENDER', LEASE, 10, 1010)
+        with self.assertRaises(LeaseInUseError):
+            index.reserve('SENDER', LEASE, 500, 1500)
+        with self.assertRaises(LeaseInUseError):
+            index.reserve('SENDER', LEASE, 1010, 2010)
+        # same lease, other sender
+        index.reserve('OTHER', LEASE, 500, 1500)
+        # expired
+        index.reserve('SENDER', LEASE, 1011, 2011)
+        self.assertEqual(len(index), 2)
+
+
+    # a released lease can be reserved again
+    def test_release(self):
+        index = LeaseIndex()
+        index.reserve('SENDER', LEASE, 10, 1010)
+        index.release('SENDER', LEASE)
+        index.reserve('SENDER', LEASE, 10, 1010)
+
+
+    # a lease reserved with a transaction ID is released by that ID, and only while that transaction holds it
+    def test_release_transaction(self):
+        index = LeaseIndex()
+        index.reserve('SENDER', LEASE, 10, 1010, 'TXID1')
+        index.release_transaction('TXID1')
+        index.reserve('SENDER', LEASE, 10, 1010, 'TXID2')
+        index.release_transaction('TXID1')
+        with self.assertRaises(LeaseInUseError):
+            index.reserve('SENDER', LEASE, 10, 1010)
+        self.assertEqual(len(index), 1)
+
+
+    # of concurrent attempts with the same lease, only one succeeds
+    def test_concurrent_attempts(self):
+        index = LeaseIndex()
+        barrier = threading.Barrier(8)
+        outcomes = []
+        def attempt():
+            barrier.wait()
+            try:
+                index.reserve('SENDER', LEASE, 10, 1010)
+                outcomes.append(True)
+            except LeaseInUseError:
+                outcomes.append(False)
+        threads = [threading.Thread(target=attempt) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(outcomes.count(True), 1)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
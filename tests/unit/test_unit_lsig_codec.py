@@ -0,0 +1,145 @@
+import unittest
+import base64
+import tempfile
+from unittest.mock import patch
+import sys
+import os
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+import lsig_codec
+import program_registry
+import core
+from algosdk import account
+
+
+PROGRAM = b'\x02\x20\x01\x01\x22'
+
+
+class testUnitLsigCodec(unittest.TestCase):
+
+    def setUp(self):
+        # use an empty program registry for every test
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.registry_patch = patch('program_registry.registry_dir', self.tmp_dir.name)
+        self.registry_patch.start()
+        program_registry.reset()
+
+    def tearDown(self):
+        self.registry_patch.stop()
+        self.tmp_dir.cleanup()
+        program_registry.reset()
+
+
+    def make_lsig(self):
+        private_key, address = account.generate_account()
+        lsig = core.LogicSigAccount(PROGRAM)
+        lsig.sign(private_key)
+        return lsig
+
+
+    # compact tokens decode back to the same lsig
+    def test_compact_round_trip(self):
+        lsig = self.make_lsig()
+        token = lsig_codec.encode_compact(lsig)
+        self.assertTrue(token.startswith(lsig_codec.COMPACT_PREFIX))
+        self.assertTrue(all(char in lsig_codec.GSM7_BASIC for char in token))
+        decoded = lsig_codec.decode_compact(token)
+        self.assertEqual(decoded.dictify(), lsig.dictify())
+        self.assertTrue(decoded.verify())
+
+
+    # corrupted or truncated tokens are detected by the checksum
+    def test_compact_corrupted(self):
+        token = lsig_codec.encode_compact(self.make_lsig())
+        corrupted = token[:20] + ('A' if token[20] != 'A' else 'B') + token[21:]
+        with self.assertRaises(ValueError):
+            lsig_codec.decode_compact(corrupted)
+        with self.assertRaises(ValueError):
+            lsig_codec.decode_compact(token[:-5])
+
+
+    # the decoder in core accepts both formats, compact tokens are shorter
+    def test_core_accepts_both_formats(self):
+        lsig = self.make_lsig()
+        legacy_token = core.lsig_to_sms_text(lsig)
+        compact_token = core.lsig_to_sms_text(lsig, compact=True)
+        self.assertLess(len(compact_token), len(legacy_token))
+        self.assertEqual(core.sms_text_to_lsig(legacy_token).dictify(), lsig.dictify())
+        self.assertEqual(core.sms_text_to_lsig(compact_token).dictify(), lsig.dictify())
+
+
+    # previous format tokens decode back to the same lsig
+    def test_legacy_round_trip(self):
+        lsig = self.make_lsig()
+        token = lsig_codec.encode_legacy(lsig)
+        self.assertEqual(lsig_codec.decode_legacy(token).dictify(), lsig.dictify())
+        # session data uses the same format
+        self.assertEqual(core.deserialize_logic_sig(core.serialize_logic_sig(lsig)).dictify(), lsig.dictify())
+
+
+    # untrusted input is parsed strictly, never evaluated
+    def test_malformed_tokens(self):
+        for text in ['not a token', base64.urlsafe_b64encode(b"{'lsig': __import__('os')}").decode(),
+                     base64.urlsafe_b64encode(b'{"lsig": {"l": 5}}').decode(),
+                     base64.urlsafe_b64encode(b'[1, 2]').decode(), '!1???']:
+            with self.assertRaises(ValueError):
+                lsig_codec.decode(text)
+
+
+    # recently decoded tokens are served from the memo
+    def test_decode_memo(self):
+        token = lsig_codec.encode_compact(self.make_lsig())
+        self.assertIs(lsig_codec.decode(token), lsig_codec.decode(token))
+
+
+    # tokens of registered programs carry a reference instead of the bytecode
+    def test_program_reference(self):
+        lsig = self.make_lsig()
+        embedded_token = lsig_codec.encode_compact(lsig)
+        program_registry.register(PROGRAM)
+        reference_token = lsig_codec.encode_compact(lsig)
+        self.assertTrue(reference_token.startswith(lsig_codec.REFERENCE_PREFIX))
+        self.assertLessEqual(len(reference_token), len(embedded_token))
+
+        decoded = lsig_codec.decode_compact(reference_token)
+        self.assertEqual(decoded.dictify(), lsig.dictify())
+        self.assertTrue(decoded.verify())
+
+        # after a restart, the program is loaded back from disk
+        program_registry.reset()
+        self.assertEqual(lsig_codec.decode_compact(reference_token).dictify(), lsig.dictify())
+
+
+    # a program registered by another process after the registry was loaded is read from disk
+    def test_program_registered_elsewhere(self):
+        ref = program_registry.program_hash(PROGRAM)[:program_registry.REF_SIZE]
+        self.assertIsNone(program_registry.lookup(ref))
+        with open(os.path.join(self.tmp_dir.name, program_registry.program_hash(PROGRAM).hex() + '.bin'), 'wb') as f:
+            f.write(PROGRAM)
+        self.assertEqual(program_registry.lookup(ref), PROGRAM)
+        self.assertEqual(program_registry.reference_of(PROGRAM), ref)
+
+
+    # tokens referencing an unknown program are rejected
+    def test_unknown_program_reference(self):
+        program_registry.register(PROGRAM)
+        token = lsig_codec.encode_compact(self.make_lsig())
+        program_registry.reset()
+        self.tmp_dir.cleanup()
+        with self.assertRaises(ValueError):
+            lsig_codec.decode_compact(token)
+
+
+    def test_sms_segments(self):
+        self.assertEqual(lsig_codec.sms_segments('a' * 160), 1)
+        self.assertEqual(lsig_codec.sms_segments('a' * 161), 2)
+        self.assertEqual(lsig_codec.sms_segments('[' * 80), 1)
+        self.assertEqual(lsig_codec.sms_segments('[' * 81), 2)
+        self.assertEqual(lsig_codec.sms_segments('字' * 71), 2)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
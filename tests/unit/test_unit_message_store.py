@@ -0,0 +1,88 @@
+import unittest
+import tempfile
+import threading
+from unittest.mock import patch
+import sys
+import os
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+import message_store
+import core
+
+
+class testUnitMessageStore(unittest.TestCase):
+
+    def setUp(self):
+        # use a fresh database for every test
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_patch = patch('message_store.db_path', os.path.join(self.tmp_dir.name, 'messages.db'))
+        self.db_patch.start()
+
+    def tearDown(self):
+        message_store.close()
+        self.db_patch.stop()
+        self.tmp_dir.cleanup()
+
+
+    # messages are looked up by ID, and the latest by sender or receiver
+    def test_save_and_lookup(self):
+        first = message_store.save_message({'text': 'first', 'from': '111', 'to': '999', 'message_uuid': 'a'})
+        message_store.save_message({'text': 'second', 'msisdn': '222', 'to': '999', 'messageId': 'b'})
+        self.assertEqual(first, 'a')
+        self.assertEqual(message_store.get_message('a')['text'], 'first')
+        self.assertEqual(message_store.latest_message()['message_id'], 'b')
+        self.assertEqual(message_store.latest_message(sender='111')['message_id'], 'a')
+        self.assertEqual(message_store.latest_message(receiver='999')['sender'], '222')
+        self.assertIsNone(message_store.get_message('missing'))
+
+
+    # a webhook retried with the same message ID is saved once
+    def test_duplicate_ignored(self):
+        data = {'text': 'Hi!', 'from': '111', 'message_uuid': 'dup'}
+        message_store.save_messages([data, data])
+        message_store.save_message(data)
+        count = message_store.connection().execute('SELECT COUNT(*) FROM messages').fetchone()[0]
+        self.assertEqual(count, 1)
+
+
+    # a consumed message keeps its metadata, but not its token
+    def test_consume_message(self):
+        message_store.save_message({'text': 'Your Token: abc', 'from': '111', 'message_uuid': 'a'})
+        message_store.consume_message('a')
+        message = message_store.get_message('a')
+        self.assertEqual(message['text'], '')
+        self.assertEqual(message['consumed'], 1)
+        self.assertEqual(message['sender'], '111')
+
+
+    # messages saved concurrently from several threads are all stored
+    def test_concurrent_writers(self):
+        def save(n):
+            for i in range(20):
+                message_store.save_message({'text': 'Hi!', 'from': str(n), 'message_uuid': f'{n}-{i}'})
+            message_store.close()
+        threads = [threading.Thread(target=save, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        count = message_store.connection().execute('SELECT COUNT(*) FROM messages').fetchone()[0]
+        self.assertEqual(count, 80)
+
+
+    # core reads the latest message of a sender or receiver, or a given one, never the latest of all senders
+    def test_get_sms_data(self):
+        self.assertEqual(core.get_sms_data(sender='111'), ('', '', '', '', None))
+        message_store.save_message({'text': 'first', 'from': '111', 'to': '999', 'timestamp': 't1', 'message_uuid': 'a'})
+        message_store.save_message({'text': 'second', 'from': '222', 'to': '999', 'timestamp': 't2', 'message_uuid': 'b'})
+        self.assertEqual(core.get_sms_data(sender='111'), ('first', '111', '999', 't1', 'a'))
+        self.assertEqual(core.get_sms_data(receiver='999'), ('second', '222', '999', 't2', 'b'))
+        self.assertEqual(core.get_sms_data('a'), ('first', '111', '999', 't1', 'a'))
+        self.assertEqual(core.get_sms_data(), ('', '', '', '', None))
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+from flask import Flask
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+import metrics
+
+
+def sample(text, line_start):
+    for line in text.splitlines():
+        if line.startswith(line_start + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+class testUnitMetrics(unittest.TestCase):
+
+    # histogram buckets are cumulative, with count and sum
+    def test_histogram(self):
+        for seconds in (0.0001, 0.003, 0.003, 100):
+            metrics.observe('test_histogram_seconds', seconds, stage='a')
+        text = metrics.render()
+        self.assertIn('# TYPE test_histogram_seconds histogram', text)
+        self.assertEqual(sample(text, 'test_histogram_seconds_bucket{stage="a",le="0.0005"}'), 1)
+        self.assertEqual(sample(text, 'test_histogram_seconds_bucket{stage="a",le="0.005"}'), 3)
+        self.assertEqual(sample(text, 'test_histogram_seconds_bucket{stage="a",le="60.0"}'), 3)
+        self.assertEqual(sample(text, 'test_histogram_seconds_bucket{stage="a",le="+Inf"}'), 4)
+        self.assertEqual(sample(text, 'test_histogram_seconds_count{stage="a"}'), 4)
+        self.assertAlmostEqual(sample(text, 'test_histogram_seconds_sum{stage="a"}'), 100.0061)
+
+
+    # timed stages record their duration, and their exceptions
+    def test_timed(self):
+        @metrics.timed('test_stage')
+        def fail():
+            raise ValueError()
+
+        with metrics.timed('test_stage'):
+            pass
+        with self.assertRaises(ValueError):
+            fail()
+        text = metrics.render()
+        self.assertEqual(sample(text, 'stage_duration_seconds_count{stage="test_stage"}'), 2)
+        self.assertEqual(sample(text, 'stage_errors_total{stage="test_stage"}'), 1)
+
+
+    # gauges are read when rendering, label values are escaped
+    def test_gauge(self):
+        metrics.gauge('test_gauge', lambda: {'a"b': 2}, 'Test gauge.', 'kind')
+        self.assertEqual(sample(metrics.render(), 'test_gauge{kind="a\\"b"}'), 2)
+
+
+    # requests of an instrumented app are recorded by route and status, and /metrics is served
+    def test_instrument(self):
+        app = Flask('test_metrics')
+        metrics.instrument(app, 'test')
+
+        @app.route('/item/<item_id>')
+        def item(item_id):
+            return 'ok'
+
+        client = app.test_client()
+        client.get('/item/1')
+        client.get('/item/2')
+        response = client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        text = response.data.decode()
+        self.assertEqual(sample(text, 'http_request_duration_seconds_count{app="test",method="GET",route="/item/<item_id>",status="200"}'), 2)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
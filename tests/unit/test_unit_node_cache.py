@@ -0,0 +1,82 @@
+import unittest
+import threading
+import time
+from unittest.mock import MagicMock
+import sys
+import os
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+from node_cache import NodeStateCache
+from algosdk.transaction import SuggestedParams
+
+
+def mock_params(last_round):
+    return SuggestedParams(1000, last_round, last_round + 1000, 'mock-genesis-hash', 'sandnet-v1', flat_fee=False)
+
+
+class testUnitNodeCache(unittest.TestCase):
+
+    # repeated calls within the same round hit the node once
+    def test_params_fetched_once_per_round(self):
+        mock_client = MagicMock()
+        mock_client.suggested_params.return_value = mock_params(10)
+        node_state = NodeStateCache(lambda: mock_client, ttl=60)
+        for _ in range(5):
+            params = node_state.suggested_params()
+        self.assertEqual(params.first, 10)
+        mock_client.suggested_params.assert_called_once()
+
+
+    # each caller receives its own copy of the parameters
+    def test_params_are_copied(self):
+        mock_client = MagicMock()
+        mock_client.suggested_params.return_value = mock_params(10)
+        node_state = NodeStateCache(lambda: mock_client, ttl=60)
+        node_state.suggested_params().fee = 5000
+        self.assertEqual(node_state.suggested_params().fee, 1000)
+
+
+    # a newer round observed elsewhere forces a refresh
+    def test_observe_round_refreshes(self):
+        mock_client = MagicMock()
+        mock_client.status.side_effect = [{'last-round': 10, 'catchup-time': 0}, {'last-round': 11, 'catchup-time': 0}]
+        node_state = NodeStateCache(lambda: mock_client, ttl=60)
+        self.assertEqual(node_state.status()['last-round'], 10)
+        self.assertEqual(node_state.status()['last-round'], 10)
+        node_state.observe_round(11)
+        self.assertEqual(node_state.status()['last-round'], 11)
+        self.assertEqual(mock_client.status.call_count, 2)
+
+
+    # expired time-to-live forces a refresh
+    def test_ttl_expiry(self):
+        mock_client = MagicMock()
+        mock_client.status.return_value = {'last-round': 10, 'catchup-time': 0}
+        node_state = NodeStateCache(lambda: mock_client, ttl=0.01)
+        node_state.status()
+        time.sleep(0.02)
+        node_state.status()
+        self.assertEqual(mock_client.status.call_count, 2)
+
+
+    # concurrent requests share a single fetch
+    def test_concurrent_single_fetch(self):
+        mock_client = MagicMock()
+        def slow_params():
+            time.sleep(0.05)
+            return mock_params(10)
+        mock_client.suggested_params.side_effect = slow_params
+        node_state = NodeStateCache(lambda: mock_client, ttl=60)
+        threads = [threading.Thread(target=node_state.suggested_params) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        mock_client.suggested_params.assert_called_once()
+
+
+
+if __name__ == '__main__':
+    unittest.main()
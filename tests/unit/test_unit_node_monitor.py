@@ -0,0 +1,88 @@
+import unittest
+import time
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+from node_monitor import NodeMonitor, NodeNotSyncedError
+
+
+class testUnitNodeMonitor(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.status.return_value = {'last-round': 1000, 'catchup-time': 0, 'time-since-last-round': 1_000_000_000}
+        self.rounds = []
+        self.monitor = NodeMonitor(lambda: self.client, interval=0.01, on_round=self.rounds.append)
+
+    def tearDown(self):
+        self.monitor.stop(timeout=1)
+
+    def test_synced(self):
+        health = self.monitor.check()
+        self.assertTrue(health['synced'])
+        self.assertEqual(health['last_round'], 1000)
+        self.assertAlmostEqual(health['last_round_at'], time.time() - 1, delta=0.5)
+        self.assertEqual(self.rounds, [1000])
+
+    # with a pool of nodes, the monitor checks the health of each node
+    def test_checks_pool(self):
+        self.monitor.check()
+        self.client.check.assert_called_once()
+
+    # average duration of a round, from the start times of the rounds observed
+    def test_round_time(self):
+        with patch('node_monitor.time.time', return_value=100.0):
+            self.monitor.check()
+        self.client.status.return_value = {'last-round': 1002, 'catchup-time': 0, 'time-since-last-round': 0}
+        with patch('node_monitor.time.time', return_value=107.0):
+            health = self.monitor.check()
+        self.assertAlmostEqual(health['round_time'], 4.0)
+        self.assertEqual(self.rounds, [1000, 1002])
+
+    def test_not_synced(self):
+        self.client.status.return_value = {'last-round': 1000, 'catchup-time': 5000}
+        self.assertEqual(self.monitor.check()['reason'], 'node catching up')
+        # no new round for a minute: synced (e.g. an idle dev mode node), unless stall detection is set
+        self.client.status.return_value = {'last-round': 1000, 'catchup-time': 0, 'time-since-last-round': 60 * 10 ** 9}
+        self.monitor._health = None
+        self.assertTrue(self.monitor.check()['synced'])
+        self.monitor.stall_after = 30
+        self.monitor._health = None
+        self.assertIn('no new round', self.monitor.check()['reason'])
+        self.client.status.side_effect = ConnectionRefusedError()
+        health = self.monitor.check()
+        self.assertFalse(health['synced'])
+        self.assertEqual(health['reason'], 'node not answering')
+        self.assertEqual(health['last_round'], 1000)
+
+    # health is only published while the monitor runs: handlers then refuse transactions without querying the node
+    def test_require_synced(self):
+        self.assertIsNone(self.monitor.require_synced())
+        self.monitor.start()
+        for _ in range(100):
+            if self.monitor.health():
+                break
+            time.sleep(0.01)
+        self.assertTrue(self.monitor.require_synced()['synced'])
+        self.client.status.side_effect = ConnectionRefusedError()
+        time.sleep(0.05)
+        with self.assertRaises(NodeNotSyncedError):
+            self.monitor.require_synced()
+
+    # a monitor stuck on the node reports it out of sync
+    def test_stale_health(self):
+        self.monitor.start()
+        self.monitor.stop(timeout=1)
+        self.monitor.check()
+        with patch.object(self.monitor, 'running', return_value=True):
+            self.assertTrue(self.monitor.health()['synced'])
+            self.monitor._health['checked_at'] -= 60
+            self.assertFalse(self.monitor.health()['synced'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import tempfile
+from concurrent.futures import Future
+from unittest.mock import patch
+import sys
+import os
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+import message_store
+import notification_outbox
+
+
+def sms_result(success):
+    future = Future()
+    future.set_result(success)
+    return future
+
+
+# notifications are delivered by calling deliver_due, without the background dispatcher
+@patch('notification_outbox.start')
+class testUnitNotificationOutbox(unittest.TestCase):
+
+    def setUp(self):
+        # use a fresh database for every test
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_patch = patch('message_store.db_path', os.path.join(self.tmp_dir.name, 'messages.db'))
+        self.db_patch.start()
+
+    def tearDown(self):
+        message_store.close()
+        self.db_patch.stop()
+        self.tmp_dir.cleanup()
+
+
+    def outbox(self):
+        return message_store.connection().execute('SELECT * FROM outbox ORDER BY id').fetchall()
+
+
+    # the token is consumed and the notification recorded together, then delivered
+    @patch('sms_dispatcher.send', return_value=sms_result(True))
+    def test_add_and_deliver(self, mock_send, mock_start):
+        message_store.save_message({'text': 'Your Token: abc', 'from': '111', 'message_uuid': 'a'})
+        notification_outbox.add('111', 'Your Token has been used', consume_message_id='a')
+        self.assertEqual(message_store.get_message('a')['consumed'], 1)
+        self.assertEqual(self.outbox()[0]['status'], 'pending')
+
+        self.assertEqual(notification_outbox.deliver_due(), 1)
+        mock_send.assert_called_once_with(notification_outbox.SENDER, '111', 'Your Token has been used')
+        self.assertEqual(self.outbox()[0]['status'], 'sent')
+        self.assertEqual(notification_outbox.deliver_due(), 0)
+
+
+    # if the notification cannot be recorded, the token is not consumed either
+    def test_atomic_with_consume(self, mock_start):
+        message_store.save_message({'text': 'Your Token: abc', 'from': '111', 'message_uuid': 'a'})
+        with self.assertRaises(Exception):
+            notification_outbox.add(None, 'Your Token has been used', consume_message_id='a')
+        self.assertEqual(message_store.get_message('a')['consumed'], 0)
+        self.assertEqual(self.outbox(), [])
+
+
+    # failed deliveries are retried later, until MAX_ATTEMPTS
+    @patch('sms_dispatcher.send', return_value=sms_result(False))
+    def test_retry_then_fail(self, mock_send, mock_start):
+        notification_outbox.add('111', 'Your Token has been used')
+        notification_outbox.deliver_due()
+        row = self.outbox()[0]
+        self.assertEqual((row['status'], row['attempts']), ('pending', 1))
+        # not due before its retry delay
+        self.assertEqual(notification_outbox.deliver_due(), 0)
+
+        conn = message_store.connection()
+        for attempt in range(notification_outbox.MAX_ATTEMPTS - 1):
+            with conn:
+                conn.execute('UPDATE outbox SET next_attempt_at = 0')
+            notification_outbox.deliver_due()
+        row = self.outbox()[0]
+        self.assertEqual((row['status'], row['attempts']), ('failed', notification_outbox.MAX_ATTEMPTS))
+
+
+    # notifications left by a previous run are delivered once their claim expires
+    @patch('sms_dispatcher.send', return_value=sms_result(True))
+    def test_claim_expires(self, mock_send, mock_start):
+        notification_outbox.add('111', 'Your Token has been used')
+        self.assertEqual(len(notification_outbox._claim()), 1)
+        self.assertEqual(notification_outbox.deliver_due(), 0)
+        with patch('time.time', return_value=notification_outbox.time.time() + notification_outbox.CLAIM_TIMEOUT + 1):
+            self.assertEqual(notification_outbox.deliver_due(), 1)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
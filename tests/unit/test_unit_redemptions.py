@@ -0,0 +1,63 @@
+import unittest
+import threading
+from unittest.mock import MagicMock
+from concurrent.futures import Future
+import sys
+import os
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+import redemptions
+
+
+class testUnitRedemptions(unittest.TestCase):
+
+    # the redemption ID is returned before the confirmation, which is then reported
+    def test_confirmed_redemption(self):
+        confirmation = Future()
+        notified = threading.Event()
+        on_confirmed = MagicMock(side_effect=lambda record: notified.set())
+
+        redemption_id = redemptions.start('TXID1', confirmation, on_confirmed)
+        self.assertEqual(redemptions.get(redemption_id)['status'], 'pending')
+
+        confirmation.set_result({'confirmed-round': 42})
+        record = redemptions.wait(redemption_id, 5)
+        self.assertEqual(record['status'], 'confirmed')
+        self.assertEqual(record['confirmed_round'], 42)
+        self.assertEqual(record['txid'], 'TXID1')
+        self.assertTrue(notified.wait(5))
+        on_confirmed.assert_called_once()
+
+
+    # rejections and timeouts reported by the tracker are failed redemptions
+    def test_failed_redemption(self):
+        confirmation = Future()
+        on_confirmed = MagicMock()
+
+        redemption_id = redemptions.start('TXID2', confirmation, on_confirmed)
+        confirmation.set_exception(Exception("Transaction rejected: overlapping lease"))
+        record = redemptions.wait(redemption_id, 5)
+        self.assertEqual(record['status'], 'failed')
+        self.assertIn('overlapping lease', record['error'])
+        on_confirmed.assert_not_called()
+
+
+    # pending redemptions hold no thread: more of them than workers in the pool are all followed
+    def test_many_pending(self):
+        confirmations = [Future() for _ in range(redemptions.executor._max_workers * 4)]
+        ids = [redemptions.start(f'TXID{i}', confirmation) for i, confirmation in enumerate(confirmations)]
+        for confirmation in reversed(confirmations):
+            confirmation.set_result({'confirmed-round': 7})
+        self.assertTrue(all(redemptions.get(redemption_id)['status'] == 'confirmed' for redemption_id in ids))
+
+
+    def test_unknown_redemption(self):
+        self.assertIsNone(redemptions.get('unknown'))
+        self.assertIsNone(redemptions.wait('unknown', 0.01))
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1 +1,45 @@
-# no unit test for server.py: this module orchestrates the various components.
\ No newline at end of file
+import unittest
+import tempfile
+from unittest.mock import patch
+import sys
+import os
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+import server
+import message_store
+
+
+# server.py orchestrates the various components: only the parsing of the requests is unit tested here.
+class testUnitServer(unittest.TestCase):
+
+    # only a JSON true selects the atomic mode of batch redemptions
+    def test_batch_atomic_flag(self):
+        client = server.flask_app.test_client()
+        redemptions = [{'sender_address': 'A', 'receiver_address': 'B', 'amount': 1, 'token': 'T'}]
+        with patch('core.construct_lsig_batch', return_value=[]) as construct:
+            for flag, atomic in (('false', False), ('true', False), (1, False), (False, False), (True, True)):
+                response = client.post('/create_transactions_batch', json={'redemptions': redemptions, 'atomic': flag})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(construct.call_args.kwargs['atomic'], atomic, flag)
+            client.post('/create_transactions_batch', json={'redemptions': redemptions})
+            self.assertFalse(construct.call_args.kwargs['atomic'])
+
+
+    # the token is fetched from the expected sender only, never the latest message of all senders
+    def test_fetch_sms_data_by_sender(self):
+        client = server.flask_app.test_client()
+        with tempfile.TemporaryDirectory() as tmp_dir, patch('message_store.db_path', os.path.join(tmp_dir, 'messages.db')):
+            message_store.save_message({'text': 'token A', 'from': '447700000001', 'message_uuid': 'a'})
+            message_store.save_message({'text': 'token B', 'from': '447700000002', 'message_uuid': 'b'})
+
+            self.assertEqual(client.get('/fetch_sms_data').status_code, 400)
+            response = client.get('/fetch_sms_data', query_string={'sender': '+44 7700 000001'})
+            self.assertEqual(response.json['message_text'], 'token A')
+            self.assertEqual(response.json['message_id'], 'a')
+            message_store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
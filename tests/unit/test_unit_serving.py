@@ -0,0 +1,42 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+import serving
+
+
+class testUnitServing(unittest.TestCase):
+
+    # settings of each app come from its own environment variables
+    @patch.dict(os.environ, {'UI_WORKERS': '2', 'UI_THREADS': '16', 'SMS_BIND': '0.0.0.0:3000'})
+    def test_options_from_environment(self):
+        ui = serving.options('UI', '127.0.0.1:5000')
+        sms = serving.options('SMS', '127.0.0.1:3000')
+        self.assertEqual((ui['bind'], ui['workers'], ui['threads']), ('127.0.0.1:5000', 2, 16))
+        self.assertEqual((sms['bind'], sms['workers'], sms['threads']), ('0.0.0.0:3000', 1, 8))
+        self.assertTrue(ui['preload_app'])
+        self.assertEqual(ui['worker_class'], 'gthread')
+
+
+    # the drain function runs when a worker exits
+    def test_worker_exit_drains(self):
+        on_exit = MagicMock()
+        settings = serving.options('UI', '127.0.0.1:5000', on_exit=on_exit)
+        settings['worker_exit'](None, None)
+        on_exit.assert_called_once_with()
+
+
+    # without gunicorn, production mode fails with an explicit error
+    @patch('serving.BaseApplication', None)
+    def test_missing_gunicorn(self):
+        with self.assertRaises(RuntimeError):
+            serving.serve(MagicMock(), serving.options('UI', '127.0.0.1:5000'))
+
+
+
+if __name__ == '__main__':
+    unittest.main()
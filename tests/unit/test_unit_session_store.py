@@ -0,0 +1,86 @@
+import unittest
+import time
+import sys
+import os
+from flask import Flask, session
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+import session_store
+
+
+class Token:
+    pass
+
+
+def make_app(**kwargs):
+    app = Flask('test_session_store')
+    app.secret_key = b'test secret'
+    app.session_interface = session_store.ServerSideSessionInterface(**kwargs)
+
+    @app.route('/set')
+    def set_value():
+        session['token'] = Token()
+        return 'ok'
+
+    @app.route('/get')
+    def get_value():
+        token = session.get('token')
+        return type(token).__name__ if token is not None else 'missing'
+
+    @app.route('/clear')
+    def clear_value():
+        session.pop('token', None)
+        return 'ok'
+
+    return app
+
+
+class testUnitSessionStore(unittest.TestCase):
+
+    # objects are kept on the server, the cookie only carries the signed session ID
+    def test_objects_kept_on_server(self):
+        app = make_app()
+        client = app.test_client()
+        response = client.get('/set')
+        cookie = response.headers['Set-Cookie']
+        self.assertLess(len(cookie), 200)
+        self.assertEqual(client.get('/get').data, b'Token')
+        self.assertEqual(len(app.session_interface.store), 1)
+
+        # an emptied session is removed from the store
+        client.get('/clear')
+        self.assertEqual(client.get('/get').data, b'missing')
+        self.assertEqual(len(app.session_interface.store), 0)
+
+
+    # a tampered session ID is not accepted
+    def test_bad_signature(self):
+        app = make_app()
+        client = app.test_client()
+        client.get('/set')
+        sid = next(iter(app.session_interface.store._data))
+        client.set_cookie('session', sid + '.forged')
+        self.assertEqual(client.get('/get').data, b'missing')
+
+
+    # sessions expire after the ttl, and the least recently used are dropped above maxsize
+    def test_ttl_and_maxsize(self):
+        app = make_app(ttl=0.05)
+        client = app.test_client()
+        client.get('/set')
+        time.sleep(0.1)
+        self.assertEqual(client.get('/get').data, b'missing')
+
+        app = make_app(maxsize=1)
+        first, second = app.test_client(), app.test_client()
+        first.get('/set')
+        second.get('/set')
+        self.assertEqual(first.get('/get').data, b'missing')
+        self.assertEqual(second.get('/get').data, b'Token')
+
+
+
+if __name__ == '__main__':
+    unittest.main()
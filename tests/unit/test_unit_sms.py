@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 import sys
 import os
 
@@ -7,9 +7,18 @@ import os
 # adjust path at runtime since src and test are in separate folders 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
 import sms_utils
+import backends
 
 
 class testUnitSms(unittest.TestCase):
+
+    # stand-in of the Vonage client: no client is built, no API keys needed
+    def setUp(self):
+        backends.use('sms', MagicMock())
+
+    def tearDown(self):
+        backends.reset('sms')
+
     # check how the method interprets (mocked) api calls.
     # patching dependencies
     @patch('sms_utils.client.sms.send_message')
@@ -28,12 +37,21 @@ class testUnitSms(unittest.TestCase):
     @patch('sms_utils.client.sms.send_message')
     @patch('sms_utils.logging')
     def test_send_sms_failure(self, mock_logging, mock_send_message):
-        # assume mock status response :1 = failure
-        mock_response = {"messages": [{"status": "1", "error-text": "Network Error"}]}
+        # assume mock status response :3 = failure (invalid parameters)
+        mock_response = {"messages": [{"status": "3", "error-text": "Invalid to parameter"}]}
         mock_send_message.return_value = mock_response
         result = sms_utils.send_sms_text('123456', '111111', 'Lorem ipsum')
         self.assertFalse(result)
-        mock_logging.info('An error occurred while sending SMS')
+        mock_logging.error.assert_called_once()
+
+
+    # errors worth retrying are raised, for the dispatcher to retry
+    @patch('sms_utils.client.sms.send_message')
+    def test_send_sms_transient(self, mock_send_message):
+        # assume mock status response :1 = throttled
+        mock_send_message.return_value = {"messages": [{"status": "1", "error-text": "Throttled"}]}
+        with self.assertRaises(sms_utils.TransientSMSError):
+            sms_utils.send_sms_text('123456', '111111', 'Lorem ipsum')
 
 
 # NOTE: receive_sms() tested in integration testing.
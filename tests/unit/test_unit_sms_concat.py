@@ -0,0 +1,110 @@
+import unittest
+import tempfile
+import time
+import sys
+import os
+from unittest.mock import patch
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+import sms_concat
+import lsig_codec
+import message_store
+
+TOKEN_TEXT = "Amount: 100000 microAlgos\nFrom Address: " + "A" * 58 + "\nYour Token: " + "!2" + "x7Q_=" * 60
+
+
+class testUnitSmsConcat(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_patch = patch('message_store.db_path', os.path.join(self.tmp_dir.name, 'messages.db'))
+        self.db_patch.start()
+
+    def tearDown(self):
+        message_store.close()
+        self.db_patch.stop()
+        self.tmp_dir.cleanup()
+
+
+    # a text fitting a single SMS is not split
+    def test_short_text_unchanged(self):
+        self.assertEqual(sms_concat.split("Hi!"), ["Hi!"])
+        self.assertIsNone(sms_concat.parse_part({'text': "Hi!"}))
+
+
+    # every part of a long text fits a single SMS, also with extension characters
+    def test_parts_single_segment(self):
+        for text in (TOKEN_TEXT, "{}" * 200):
+            parts = sms_concat.split(text, ref='K3x')
+            self.assertGreater(len(parts), 1)
+            for part in parts:
+                self.assertEqual(lsig_codec.sms_segments(part), 1)
+            self.assertTrue(parts[0].startswith(f"(K3x 1/{len(parts)})\n"))
+
+
+    # parts received in any order are reassembled, per sender
+    def test_reassembly_out_of_order(self):
+        buffer = sms_concat.ReassemblyBuffer()
+        parts = sms_concat.split(TOKEN_TEXT)
+        other = sms_concat.split("Other " + TOKEN_TEXT)
+        results = [buffer.add({'text': part, 'from': '111'}) for part in reversed(parts[1:])]
+        results.append(buffer.add({'text': other[0], 'from': '222'}))
+        self.assertEqual(results, [None] * len(results))
+        self.assertEqual(buffer.pending_count(), 2)
+        complete = buffer.add({'text': parts[0], 'from': '111', 'messageId': 'last'})
+        self.assertEqual(complete['text'], TOKEN_TEXT)
+        self.assertEqual(complete['messageId'], 'last')
+        # the parts are kept until the text has been saved
+        self.assertEqual(buffer.pending_count(), 2)
+        buffer.release({'text': parts[0], 'from': '111'})
+        self.assertEqual(buffer.pending_count(), 1)
+
+
+    # a text not saved is completed again by the retried part, with the same message ID;
+    # parts are kept in the message store, shared by all the buffers (processes)
+    def test_completed_again_until_released(self):
+        parts = sms_concat.split(TOKEN_TEXT)
+        for number, part in enumerate(parts[:-1]):
+            self.assertIsNone(sms_concat.ReassemblyBuffer().add({'text': part, 'from': '111', 'messageId': f'id{number}'}))
+        last = {'text': parts[-1], 'from': '111', 'messageId': 'last'}
+        first = sms_concat.ReassemblyBuffer().add(last)
+        retried = sms_concat.ReassemblyBuffer().add(last)
+        self.assertEqual(first, retried)
+        self.assertEqual(retried['messageId'], 'id0')
+        sms_concat.ReassemblyBuffer().release(last)
+        self.assertEqual(sms_concat.ReassemblyBuffer().pending_count(), 0)
+
+
+    # parts of a concatenated SMS split by the carrier
+    def test_carrier_concat(self):
+        buffer = sms_concat.ReassemblyBuffer()
+        first = {'msisdn': '111', 'text': 'Your Token: abc', 'concat': 'true', 'concat-ref': '7', 'concat-part': '1', 'concat-total': '2'}
+        second = dict(first, text='def', **{'concat-part': '2'})
+        self.assertIsNone(buffer.add(second))
+        complete = buffer.add(first)
+        self.assertEqual(complete['text'], 'Your Token: abcdef')
+        self.assertNotIn('concat', complete)
+
+
+    # incomplete texts time out, and the oldest are evicted above maxsize
+    def test_timeout_and_eviction(self):
+        buffer = sms_concat.ReassemblyBuffer(maxsize=1, timeout=0.05)
+        parts = sms_concat.split(TOKEN_TEXT, ref='AAA')
+        buffer.add({'text': parts[0], 'from': '111'})
+        time.sleep(0.1)
+        for part in parts[1:]:
+            self.assertIsNone(buffer.add({'text': part, 'from': '111'}))
+
+        buffer = sms_concat.ReassemblyBuffer(maxsize=1)
+        buffer.add({'text': parts[0], 'from': '222'})
+        buffer.add({'text': sms_concat.split(TOKEN_TEXT, ref='BBB')[0], 'from': '222'})
+        self.assertEqual(buffer.pending_count(), 1)
+        for part in parts[1:]:
+            self.assertIsNone(buffer.add({'text': part, 'from': '222'}))
+
+
+
+if __name__ == '__main__':
+    unittest.main()
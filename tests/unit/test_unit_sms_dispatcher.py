@@ -0,0 +1,88 @@
+import unittest
+import threading
+import time
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+import sms_dispatcher
+import backends
+
+SENT = {"messages": [{"status": "0"}]}
+THROTTLED = {"messages": [{"status": "1", "error-text": "Throttled"}]}
+INVALID = {"messages": [{"status": "3", "error-text": "Invalid to parameter"}]}
+
+
+# retries run without waiting
+@patch('sms_dispatcher._backoff', return_value=0)
+class testUnitSmsDispatcher(unittest.TestCase):
+
+    # stand-in of the Vonage client: no client is built, no API keys needed
+    def setUp(self):
+        backends.use('sms', MagicMock())
+
+    def tearDown(self):
+        backends.reset('sms')
+
+
+    # transient errors are retried until the message is accepted
+    @patch('sms_utils.client.sms.send_message')
+    def test_retry_transient(self, mock_send_message, mock_backoff):
+        mock_send_message.side_effect = [THROTTLED, THROTTLED, SENT]
+        self.assertTrue(sms_dispatcher.send("Vonage APIs", "111111", "Lorem ipsum").result(timeout=5))
+        self.assertEqual(mock_send_message.call_count, 3)
+
+
+    # permanent errors are not retried, and retries stop after MAX_RETRIES
+    @patch('sms_utils.client.sms.send_message')
+    def test_no_retry_permanent(self, mock_send_message, mock_backoff):
+        mock_send_message.return_value = INVALID
+        self.assertFalse(sms_dispatcher.send("Vonage APIs", "111111", "Lorem ipsum").result(timeout=5))
+        self.assertEqual(mock_send_message.call_count, 1)
+
+        mock_send_message.reset_mock()
+        mock_send_message.return_value = THROTTLED
+        self.assertFalse(sms_dispatcher.send("Vonage APIs", "111111", "Lorem ipsum").result(timeout=5))
+        self.assertEqual(mock_send_message.call_count, sms_dispatcher.MAX_RETRIES + 1)
+
+
+    # messages to the same destination are sent in order, one at a time
+    @patch('sms_utils.client.sms.send_message')
+    def test_ordered_per_destination(self, mock_send_message, mock_backoff):
+        sent = []
+        active = []
+        def send_message(params):
+            active.append(params['to'])
+            # only one message at a time to a destination
+            self.assertEqual(active.count(params['to']), 1)
+            time.sleep(0.01)
+            sent.append((params['to'], params['text']))
+            active.remove(params['to'])
+            return SENT
+        mock_send_message.side_effect = send_message
+
+        futures = [sms_dispatcher.send("Vonage APIs", to, str(i)) for i in range(10) for to in ("111111", "222222")]
+        self.assertTrue(all(f.result(timeout=5) for f in futures))
+        for to in ("111111", "222222"):
+            self.assertEqual([text for dest, text in sent if dest == to], [str(i) for i in range(10)])
+
+
+    # unordered messages to the same destination are sent concurrently
+    @patch('sms_utils.client.sms.send_message')
+    def test_unordered_concurrent(self, mock_send_message, mock_backoff):
+        barrier = threading.Barrier(2, timeout=5)
+        def send_message(params):
+            barrier.wait()
+            return SENT
+        mock_send_message.side_effect = send_message
+        first = sms_dispatcher.send("Vonage APIs", "111111", "first", ordered=False)
+        second = sms_dispatcher.send("Vonage APIs", "111111", "second", ordered=False)
+        self.assertTrue(first.result(timeout=5) and second.result(timeout=5))
+
+
+
+if __name__ == '__main__':
+    unittest.main()
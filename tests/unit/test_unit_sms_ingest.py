@@ -0,0 +1,74 @@
+import unittest
+import tempfile
+import threading
+from unittest.mock import patch
+import sys
+import os
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+import message_store
+import sms_ingest
+
+
+class testUnitSmsIngest(unittest.TestCase):
+
+    def setUp(self):
+        # use a fresh database for every test
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_patch = patch('message_store.db_path', os.path.join(self.tmp_dir.name, 'messages.db'))
+        self.db_patch.start()
+
+    def tearDown(self):
+        sms_ingest.flush(timeout=5)
+        message_store.close()
+        self.db_patch.stop()
+        self.tmp_dir.cleanup()
+
+
+    # queued messages are saved in batches by the worker
+    def test_messages_saved_in_batches(self):
+        persisted = sms_ingest.stats['persisted']
+        batches = sms_ingest.stats['batches']
+        for i in range(250):
+            self.assertTrue(sms_ingest.enqueue({'text': 'Hi!', 'from': '111', 'message_uuid': f'm-{i}'}))
+        self.assertTrue(sms_ingest.flush(timeout=5))
+        self.assertEqual(sms_ingest.stats['persisted'] - persisted, 250)
+        self.assertLess(sms_ingest.stats['batches'] - batches, 250)
+        self.assertEqual(message_store.latest_message()['message_id'], 'm-249')
+
+
+    # the callback of a message runs once it has been saved, not if saving fails
+    def test_on_saved(self):
+        saved = threading.Event()
+        self.assertTrue(sms_ingest.enqueue({'text': 'Hi!', 'message_uuid': 'm-1'}, on_saved=saved.set))
+        self.assertTrue(sms_ingest.flush(timeout=5))
+        self.assertTrue(saved.is_set())
+
+        failed = threading.Event()
+        with patch('message_store.save_messages', side_effect=Exception("disk full")), \
+             patch('sms_ingest.RETRIES', 1):
+            self.assertTrue(sms_ingest.enqueue({'text': 'Hi!', 'message_uuid': 'm-2'}, on_saved=failed.set))
+            self.assertTrue(sms_ingest.flush(timeout=5))
+        self.assertFalse(failed.is_set())
+
+
+    # messages above the queue capacity are dropped and counted
+    def test_full_queue_drops(self):
+        release = threading.Event()
+        dropped = sms_ingest.stats['dropped']
+        # block the worker on its first batch
+        with patch('message_store.save_messages', side_effect=lambda batch: release.wait(5)), \
+             patch.object(sms_ingest._queue, 'maxsize', 2):
+            results = [sms_ingest.enqueue({'text': str(i), 'message_uuid': str(i)}) for i in range(10)]
+            self.assertIn(False, results)
+            self.assertEqual(sms_ingest.stats['dropped'] - dropped, results.count(False))
+            release.set()
+            self.assertTrue(sms_ingest.flush(timeout=5))
+        self.assertEqual(sms_ingest.depth(), 0)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
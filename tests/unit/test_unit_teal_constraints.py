@@ -0,0 +1,93 @@
+import unittest
+import tempfile
+from unittest.mock import patch
+import sys
+import os
+
+
+# adjust path at runtime since src and test are in separate folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..','..', 'src')))
+import teal_constraints
+import program_registry
+import core
+from algosdk import account
+from algosdk.transaction import SuggestedParams
+
+
+contracts_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'smart_contracts'))
+SHOP_ADDRESS = 'OOGPCELYKLWNTNUBAYP5RCKZHJJZ22F3TJXWZZOGGJO3FRMD6GFZQFWFNM'
+PROGRAM = b'\x02\x20\x01\x01\x22'
+
+
+class testUnitTealConstraints(unittest.TestCase):
+
+    def read_contract(self, name):
+        with open(os.path.join(contracts_dir, name)) as f:
+            return f.read()
+
+
+    # all the conditions of the shop contract are extracted
+    def test_parse_my_teal(self):
+        constraints = teal_constraints.parse_constraints(self.read_contract('my_teal.teal'))
+        self.assertEqual(constraints, [('Receiver', '==', SHOP_ADDRESS), ('TypeEnum', '==', 1), ('Amount', '<=', 100000)])
+        constraints = teal_constraints.parse_constraints(self.read_contract('another_teal.teal'))
+        self.assertEqual(constraints, [('Receiver', '==', SHOP_ADDRESS), ('Amount', '<=', 100000)])
+
+
+    # constants on the left are swapped, comparisons not leading to a rejection are ignored
+    def test_parse_variants(self):
+        source = "#pragma version 5\nint 1000\ntxn Fee\n>=\nassert\ntxn FirstValid\nint 5\n>\npop\nint 1\nreturn\n"
+        self.assertEqual(teal_constraints.parse_constraints(source), [('Fee', '<=', 1000)])
+
+
+    # a check guarding one branch only is not a constraint of the program
+    def test_parse_branching(self):
+        source = ("#pragma version 5\ntxn Receiver\naddr " + SHOP_ADDRESS + "\n==\nbnz shop_a\n"
+                  "txn Receiver\naddr " + teal_constraints.ZERO_ADDRESS + "\n==\nassert\nb pass\n"
+                  "shop_a:\ntxn Amount\nint 100000\n<=\nassert\npass:\nint 1\nreturn\n")
+        self.assertEqual(teal_constraints.parse_constraints(source), [])
+        self.assertEqual(teal_constraints.check(teal_constraints.parse_constraints(source),
+                                                {'Receiver': SHOP_ADDRESS, 'Amount': 5}), [])
+        # checks before the first branch apply to every transaction
+        source = "#pragma version 5\ntxn Fee\nint 1000\n<=\nassert\nb next\nnext:\ntxn Amount\nint 5\n<=\nassert\nint 1\nreturn\n"
+        self.assertEqual(teal_constraints.parse_constraints(source), [('Fee', '<=', 1000)])
+
+
+    def test_check(self):
+        constraints = teal_constraints.parse_constraints(self.read_contract('my_teal.teal'))
+        fields = {'Receiver': SHOP_ADDRESS, 'TypeEnum': 1, 'Amount': 100000}
+        self.assertEqual(teal_constraints.check(constraints, fields), [])
+        fields['Amount'] = 100001
+        self.assertEqual(len(teal_constraints.check(constraints, fields)), 1)
+
+
+    def test_extract_txn_amount_from_teal(self):
+        self.assertEqual(core.extract_txn_amount_from_teal(os.path.join(contracts_dir, 'my_teal.teal')), 100000)
+        # conditions combined with && are not constraints, but the limit is still shown
+        source = "#pragma version 5\ntxn TypeEnum\nint pay\n==\ntxn Amount\nint 100000\n<=\n&&\nreturn\n"
+        self.assertEqual(teal_constraints.parse_constraints(source), [])
+        self.assertEqual(teal_constraints.displayed_amount_limit(source), 100000)
+
+
+    # transactions violating the lsig conditions are rejected before being sent
+    def test_preflight_check(self):
+        with tempfile.TemporaryDirectory() as registry_dir, patch('program_registry.registry_dir', registry_dir):
+            program_registry.reset()
+            program_registry.register(PROGRAM, teal_constraints.parse_constraints(self.read_contract('my_teal.teal')))
+            private_key, address = account.generate_account()
+            lsig = core.LogicSigAccount(PROGRAM)
+            lsig.sign(private_key)
+            params = SuggestedParams(1000, 10, 1010, 'SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=', 'sandnet-v1', flat_fee=True)
+
+            signed_txn = core.build_lsig_transaction(address, SHOP_ADDRESS, 100000, lsig, 'token', params)
+            self.assertEqual(signed_txn.transaction.amt, 100000)
+            with self.assertRaisesRegex(ValueError, 'rejected by logic'):
+                core.build_lsig_transaction(address, SHOP_ADDRESS, 200000, lsig, 'token', params)
+            with self.assertRaisesRegex(ValueError, 'rejected by logic'):
+                core.build_lsig_transaction(address, address, 1000, lsig, 'token', params)
+        program_registry.reset()
+
+
+
+if __name__ == '__main__':
+    unittest.main()